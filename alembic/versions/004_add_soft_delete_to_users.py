@@ -0,0 +1,37 @@
+"""add soft delete to users
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.drop_index('ix_users_email', table_name='users')
+    op.create_index(
+        'ix_users_email_active', 'users', ['email'], unique=True,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_users_deleted_at', 'users', ['deleted_at'],
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_deleted_at', table_name='users')
+    op.drop_index('ix_users_email_active', table_name='users')
+    op.execute('DELETE FROM users WHERE deleted_at IS NOT NULL')
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.drop_column('users', 'deleted_at')
@@ -0,0 +1,78 @@
+"""add users query indexes
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 19:00:00.000000
+
+Indexes are built with CREATE INDEX CONCURRENTLY so the users table stays
+writable. That cannot run inside a transaction, hence the autocommit block;
+if a build fails it leaves an INVALID index behind, which the IF NOT EXISTS
+guard would keep, so drop it by hand before re-running.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+
+
+def upgrade() -> None:
+    # The new unique index is case-insensitive; refuse to start rather than
+    # fail halfway through a concurrent build
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(email) FROM users WHERE deleted_at IS NULL "
+        "GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "Live users share these emails ignoring case; resolve them first: "
+            + ", ".join(duplicates)
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_lower_active', 'users', [sa.text('lower(email)')], unique=True,
+            postgresql_where=LIVE, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_users_email_active', table_name='users',
+            postgresql_concurrently=True, if_exists=True,
+        )
+        op.create_index(
+            'ix_users_role_active', 'users', ['role', 'id'],
+            postgresql_where=LIVE, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_created_at_active', 'users', ['created_at'],
+            postgresql_where=LIVE, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_inactive', 'users', ['id'],
+            postgresql_where=sa.text('is_active = false AND deleted_at IS NULL'),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Duplicates the primary key
+        op.drop_index('ix_users_id', table_name='users', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_id', 'users', ['id'], postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index('ix_users_inactive', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_created_at_active', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_role_active', table_name='users', postgresql_concurrently=True)
+        op.create_index(
+            'ix_users_email_active', 'users', ['email'], unique=True,
+            postgresql_where=LIVE, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_users_email_lower_active', table_name='users', postgresql_concurrently=True,
+        )
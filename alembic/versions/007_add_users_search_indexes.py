@@ -0,0 +1,44 @@
+"""add users search indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 21:00:00.000000
+
+Needs the pg_trgm extension (part of the standard contrib modules); creating
+it requires a role allowed to create extensions. The indexes are built
+concurrently, as in 006.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+INDEXES = {
+    'ix_users_email_search_prefix': ('btree', 'lower(email) COLLATE "C"'),
+    'ix_users_full_name_search_prefix': ('btree', 'lower(full_name) COLLATE "C"'),
+    'ix_users_email_search_trgm': ('gin', 'lower(email) gin_trgm_ops'),
+    'ix_users_full_name_search_trgm': ('gin', 'lower(full_name) gin_trgm_ops'),
+}
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, (using, expression) in INDEXES.items():
+            op.create_index(
+                name, 'users', [sa.text(expression)], postgresql_using=using,
+                postgresql_where=LIVE, postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='users', postgresql_concurrently=True, if_exists=True)
+    # pg_trgm is left installed; other objects may depend on it
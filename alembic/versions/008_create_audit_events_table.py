@@ -0,0 +1,42 @@
+"""create audit events table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('event_id', sa.String(length=32), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('target_id', sa.Integer(), nullable=True),
+        sa.Column('trace_id', sa.String(length=32), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id'),
+    )
+    op.create_index('ix_audit_events_actor_id', 'audit_events', ['actor_id', 'id'], unique=False)
+    op.create_index('ix_audit_events_target_id', 'audit_events', ['target_id', 'id'], unique=False)
+    op.create_index('ix_audit_events_action', 'audit_events', ['action', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_action', table_name='audit_events')
+    op.drop_index('ix_audit_events_target_id', table_name='audit_events')
+    op.drop_index('ix_audit_events_actor_id', table_name='audit_events')
+    op.drop_table('audit_events')
@@ -0,0 +1,40 @@
+"""create user changes table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_changes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('user', sa.JSON(), nullable=True),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('position', sa.BigInteger(), nullable=True),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('position'),
+    )
+    op.create_index(
+        'ix_user_changes_unpublished', 'user_changes', ['id'], unique=False,
+        postgresql_where=sa.text('position IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_changes_unpublished', table_name='user_changes')
+    op.drop_table('user_changes')
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.health import ReadinessProbe
+from app.db.base import engine
+
+router = APIRouter()
+
+readiness_probe = ReadinessProbe(engine)
+
+@router.get("/health")
+def health_check(request: Request):
+    return {"status": "ok", "version": settings.VERSION, "ready": request.app.state.ready}
+
+@router.get("/health/live")
+async def liveness():
+    """The event loop is serving requests"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness(request: Request):
+    """Dependency checks; 503 tells the load balancer to stop routing to this worker"""
+    result = await readiness_probe.check(started=request.app.state.ready)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if result["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if result["ready"] else "not ready", **result},
+    )
@@ -1,14 +1,48 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, Any, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.db.base import get_db
+from app.core.config import settings
+from app.core.invalidation import InvalidatedCache
 from app.core.security import decode_access_token
+from app.core.serialization import parse_fields
+from app.core.singleflight import SingleFlight
+from app.core.tracing import traced
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+current_user_flight = SingleFlight("current_user")
+# Keyed by lower-cased email; endpoints that change a user invalidate it
+current_user_cache = InvalidatedCache("users", settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
 
+def _load_user_row(db: Session, email: str) -> Optional[Dict[str, Any]]:
+    row = db.execute(
+        select(*User.__table__.columns)
+        .where(func.lower(User.email) == email, User.deleted_at.is_(None))
+        .limit(1)
+    ).mappings().first()
+    return dict(row) if row else None
+
+def _load_and_cache_user_row(db: Session, email: str, generation: int) -> Optional[Dict[str, Any]]:
+    row = _load_user_row(db, email)
+    if row:
+        current_user_cache.set(email, row, generation)
+    return row
+
+def _get_user_row(db: Session, email: str) -> Optional[Dict[str, Any]]:
+    row = current_user_cache.get(email)
+    if row is not None:
+        return row
+    # The flight is keyed on the generation too: a miss after an invalidation
+    # must not join a load that started before it. Only the leader stores,
+    # with the generation it read before loading
+    generation = current_user_cache.generation
+    return current_user_flight.do((email, generation), _load_and_cache_user_row, db, email, generation)
+
+@traced("get_current_user")
 def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[Session, Depends(get_db)]
@@ -23,13 +57,17 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
+    # Concurrent requests for the same subject share one lookup; each gets its
+    # own instance attached to its session without another query
+    row = _get_user_row(db, email.lower())
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    user = User(**row)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
 
 def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)]
@@ -52,3 +90,18 @@ def get_current_admin_user(
             detail="The user doesn't have enough privileges"
         )
     return current_user
+
+def get_user_fields(
+    fields: Annotated[
+        Optional[str],
+        Query(description="Comma-separated subset of user fields to return, e.g. id,email")
+    ] = None
+) -> Tuple[str, ...]:
+    """Get the user fields selected with ?fields="""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1.dependencies import get_current_admin_user
+from app.core.audit import list_audit_events
+from app.core.config import settings
+from app.core.profiling import (
+    ProfilerBusy,
+    SampledRoute,
+    cpu_profiler,
+    memory_profiler,
+    slow_request_sampler,
+)
+from app.db.base import get_db
+from app.schemas.audit import AuditEventPage
+
+router = APIRouter(dependencies=[Depends(get_current_admin_user)], route_class=SampledRoute)
+
+@router.get("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: Annotated[float, Query(gt=0)] = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5
+) -> PlainTextResponse:
+    """Sample every thread for a number of seconds and return folded stacks"""
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profiles are limited to {settings.PROFILING_MAX_SECONDS} seconds"
+        )
+    try:
+        cpu_profiler.start(interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        result = cpu_profiler.stop()
+    return PlainTextResponse(result["folded"], headers={"X-Profile-Samples": str(result["samples"])})
+
+@router.post("/profile/memory/start", status_code=status.HTTP_204_NO_CONTENT)
+def start_memory_profile(frames: Annotated[int, Query(ge=1, le=50)] = 10) -> None:
+    """Start tracing allocations and take the baseline snapshot"""
+    memory_profiler.start(frames)
+
+@router.get("/profile/memory")
+def memory_snapshot(
+    limit: Annotated[int, Query(ge=1, le=500)] = 20,
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno"
+) -> dict:
+    """Top allocation sites, with growth since the baseline snapshot"""
+    if not memory_profiler.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory profiling is not running"
+        )
+    return memory_profiler.snapshot(limit, group_by)
+
+@router.post("/profile/memory/stop", status_code=status.HTTP_204_NO_CONTENT)
+def stop_memory_profile() -> None:
+    """Stop tracing allocations"""
+    memory_profiler.stop()
+
+@router.get("/profile/slow-requests")
+def slow_requests() -> dict:
+    """Stack samples captured for requests slower than the threshold"""
+    return {
+        "threshold_ms": slow_request_sampler.threshold * 1000,
+        "captures": list(slow_request_sampler.captures),
+    }
+
+@router.get("/audit-events", response_model=AuditEventPage)
+def read_audit_events(
+    db: Annotated[Session, Depends(get_db)],
+    action: Optional[str] = None,
+    actor_id: Optional[int] = None,
+    target_id: Optional[int] = None,
+    before_id: Annotated[Optional[int], Query(description="Return events older than this id (keyset pagination)")] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100
+) -> dict:
+    """Audit events, newest first"""
+    events = list_audit_events(db, action, actor_id, target_id, before_id, limit)
+    return {
+        "events": events,
+        "next_before_id": events[-1].id if len(events) == limit else None,
+    }
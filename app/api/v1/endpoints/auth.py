@@ -2,17 +2,23 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.api.v1.dependencies import get_current_user
+from app.core.audit import audit_log
 from app.core.config import settings
+from app.core.outbox import record_user_changes
+from app.core.profiling import SampledRoute
 from app.core.security import create_access_token, verify_password, get_password_hash
-from app.db.base import get_db
+from app.core.serialization import user_to_dict
+from app.core.sessions import InactiveUser, InvalidRefreshToken, create_session, revoke_session, rotate_session
+from app.db.base import dialect_insert, get_db
 from app.models.user import User
-from app.schemas.user import User as UserSchema, UserCreate, Token
+from app.schemas.user import User as UserSchema, UserCreate, Token, RefreshTokenRequest
 
 # Create router without dependencies (no auth required for these endpoints)
-router = APIRouter()
+router = APIRouter(route_class=SampledRoute)
 
 @router.post("/login", 
     response_model=Token, 
@@ -27,14 +33,21 @@ def login(
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = db.query(User).filter(
+        func.lower(User.email) == form_data.username.lower(), User.deleted_at.is_(None)
+    ).first()
     if not user or not verify_password(form_data.password, user.hashed_password):
+        audit_log.record(
+            "auth.login_failed", actor_id=user.id if user else None,
+            email=form_data.username, reason="invalid_credentials",
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     elif not user.is_active:
+        audit_log.record("auth.login_failed", actor_id=user.id, email=form_data.username, reason="inactive")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
@@ -44,7 +57,57 @@ def login(
     access_token = create_access_token(
         subject=user.email, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = create_session(db, user)
+    audit_log.record("auth.login", actor_id=user.id, target_id=user.id)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh",
+    response_model=Token,
+    status_code=status.HTTP_200_OK,
+    description="Exchange a refresh token for a new access token and refresh token",
+    tags=["authentication"]
+)
+def refresh(
+    token_in: RefreshTokenRequest,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Rotate a refresh token without re-checking the password.
+    """
+    try:
+        user, refresh_token = rotate_session(db, token_in.refresh_token)
+    except InvalidRefreshToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except InactiveUser:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        subject=user.email, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/logout",
+    status_code=status.HTTP_200_OK,
+    description="Revoke a refresh token",
+    tags=["authentication"]
+)
+def logout(
+    token_in: RefreshTokenRequest,
+    db: Session = Depends(get_db),
+) -> dict:
+    """
+    Revoke the session behind a refresh token.
+    """
+    revoke_session(db, token_in.refresh_token)
+    return {"message": "Logged out successfully"}
 
 @router.post("/register", 
     response_model=UserSchema, 
@@ -60,26 +123,36 @@ def create_user(
     """
     Create new user.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The user with this email already exists in the system",
-        )
-    
     if user_in.admin_token and user_in.admin_token != "string" and user_in.admin_token != settings.ADMIN_REGISTRATION_TOKEN:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid admin registration token",
         )
 
-    user = User(
-        email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
-        full_name=user_in.full_name,
-        role="admin" if user_in.admin_token == settings.ADMIN_REGISTRATION_TOKEN else "user",
+    # Single INSERT ... ON CONFLICT DO NOTHING RETURNING instead of SELECT + INSERT + refresh
+    stmt = (
+        dialect_insert(db)(User)
+        .values(
+            email=user_in.email,
+            hashed_password=get_password_hash(user_in.password),
+            full_name=user_in.full_name,
+            role="admin" if user_in.admin_token == settings.ADMIN_REGISTRATION_TOKEN else "user",
+        )
+        .on_conflict_do_nothing(
+            index_elements=[func.lower(User.email)], index_where=User.deleted_at.is_(None)
+        )
+        .returning(User)
     )
-    db.add(user)
+    user = db.scalars(stmt).first()
+    if user is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The user with this email already exists in the system",
+        )
+    # Serialise before commit so the expired instance is not reloaded
+    response = UserSchema.model_validate(user)
+    record_user_changes(db, "created", [user_to_dict(user)])
     db.commit()
-    db.refresh(user)
-    return user
+    audit_log.record("user.register", target_id=response.id, role=response.role)
+    return response
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, File, UploadFile, Form, HTTPException
-from app.core.rag import process_pdf_from_bytes, add_chunks_to_chroma, get_vector_store
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.context_packing import estimate_tokens, pack_context
+from app.core.metrics import RAG_CONTEXT_CHUNKS, RAG_PROMPT_TOKENS
+from app.core.profiling import slow_request_sampler
+from app.core.rag import (
+    QA_SYSTEM_PROMPT, process_pdf_from_bytes, add_chunks_to_chroma, get_vector_store, get_llm, retrieve
+)
+from app.core.singleflight import AsyncSingleFlight
+from app.core.tracing import span
 
 import os
-from langchain_groq import ChatGroq
-from langchain.chains.retrieval_qa.base import RetrievalQA
 
 router = APIRouter()
+question_flight = AsyncSingleFlight("rag_question")
 
 @router.post("/upload_pdf/")
 async def upload_pdf(file: UploadFile = File(...)):
@@ -16,6 +24,44 @@ async def upload_pdf(file: UploadFile = File(...)):
 
     return {"message": "PDF processed successfully", "filename": file.filename}
 
+def _record_packing(stats: dict, prompt_tokens: int) -> None:
+    RAG_PROMPT_TOKENS.observe(prompt_tokens)
+    RAG_CONTEXT_CHUNKS.labels("packed").inc(stats["packed"])
+    for outcome, key in (("truncated", "truncated"), ("duplicate", "duplicates"), ("over_budget", "over_budget")):
+        RAG_CONTEXT_CHUNKS.labels(outcome).inc(stats[key])
+
+@slow_request_sampler.track_thread
+def _answer_question(vector_store, api_key: str, question: str) -> dict:
+    with span("rag.retrieve", k=settings.RAG_RETRIEVAL_K):
+        scored_documents = retrieve(vector_store, question, k=settings.RAG_RETRIEVAL_K)
+    with span("rag.pack_context", retrieved=len(scored_documents)):
+        context, pieces, stats = pack_context(
+            scored_documents,
+            budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+            min_chunk_tokens=settings.RAG_CONTEXT_MIN_CHUNK_TOKENS,
+        )
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from app.core.rag_instrumentation import LLMTimingCallback
+    messages = [SystemMessage(QA_SYSTEM_PROMPT.format(context=context)), HumanMessage(question)]
+    estimated_prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+    _record_packing(stats, estimated_prompt_tokens)
+    with span("rag.llm", prompt_tokens=estimated_prompt_tokens):
+        response = get_llm(api_key).invoke(messages, config={"callbacks": [LLMTimingCallback()]})
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {
+        "question": question,
+        "answer": response.content,
+        "sources": [f"Page {piece['metadata']['page']}" for piece in pieces],
+        "context": {
+            **stats,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            # As counted by the LLM provider, when it reports usage
+            "prompt_tokens": usage.get("input_tokens"),
+        },
+    }
+
 @router.post("/ask_question/")
 async def ask_question(question: str = Form(...)):
     """Endpoint to ask a question based on the uploaded PDF."""
@@ -24,29 +70,12 @@ async def ask_question(question: str = Form(...)):
     if vector_store is None:
         raise HTTPException(status_code=400, detail="No vector database found. Upload and process a PDF first.")
 
-    retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 2})
-
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     if not GROQ_API_KEY:
         raise HTTPException(status_code=500, detail="Missing GROQ_API_KEY in environment variables")
 
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.1,
-        groq_api_key=GROQ_API_KEY
-    )
-
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm, 
-        chain_type="stuff", 
-        retriever=retriever,
-        return_source_documents=True
+    # Identical questions asked concurrently share one retrieval and LLM call.
+    # The chain blocks, so it runs in the threadpool instead of on the event loop
+    return await question_flight.do(
+        question, run_in_threadpool, _answer_question, vector_store, GROQ_API_KEY, question
     )
-
-    response = qa_chain.invoke({"query": question})
-    
-    return {
-        "question": question,
-        "answer": response['result'],
-        "sources": [f"Page {doc.metadata['page']}" for doc in response['source_documents']]
-    }
\ No newline at end of file
@@ -1,25 +1,59 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import Annotated, List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import false, true, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.v1.dependencies import (
+    current_user_cache,
     get_current_user,
     get_current_active_user,
     get_current_admin_user,
+    get_user_fields,
 )
+from app.core.audit import audit_log
+from app.core.auth import authorized_filter, is_allowed
+from app.core.bulk import detect_format, export_users, import_users, iter_rows
+from app.core.config import settings
+from app.core.http_cache import (
+    as_utc,
+    cache_headers,
+    fields_etag_parts,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    query_etag_parts,
+    table_version,
+    user_etag,
+    user_version,
+)
+from app.core.outbox import list_user_changes, record_user_changes
+from app.core.profiling import SampledRoute
+from app.core.search import search_users
 from app.core.security import get_password_hash
-from app.db.base import get_db
+from app.core.serialization import select_user_dict_with_version, select_user_dicts, user_to_dict
+from app.core.singleflight import SingleFlight
+from app.db.base import get_db, is_unique_violation
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate, UserResponse
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, BulkImportResult, UserChangePage
 
-router = APIRouter()
+router = APIRouter(route_class=SampledRoute)
+user_by_id_flight = SingleFlight("user_by_id")
 
 @router.get("/me", response_model=UserResponse)
 def read_current_user(
-    current_user: Annotated[User, Depends(get_current_active_user)]
-) -> User:
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    fields: Annotated[Tuple[str, ...], Depends(get_user_fields)]
+) -> Response:
     """Get current user profile"""
-    return current_user
+    version = user_version(current_user)
+    headers = cache_headers(user_etag(current_user.id, version, fields), version)
+    if is_not_modified(request, headers["ETag"], version):
+        return not_modified(headers)
+    return ORJSONResponse(user_to_dict(current_user, fields), headers=headers)
 
 @router.patch("/me", response_model=UserResponse)
 def update_current_user(
@@ -27,60 +61,166 @@ def update_current_user(
     current_user: Annotated[User, Depends(get_current_active_user)],
     user_in: UserUpdate,
     db: Annotated[Session, Depends(get_db)]
-) -> User:
+) -> UserResponse:
     """Update current user profile"""
-    # Check if email exists
-    if user_in.email:
-        user = db.query(User).filter(
-            User.email == user_in.email,
-            User.id != current_user.id
-        ).first()
-        if user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-    
-    # Update user fields
+    values = {}
     for field, value in user_in.model_dump(exclude_unset=True).items():
-        if field == "password" and value:
-            setattr(current_user, "hashed_password", get_password_hash(value))
+        if field == "password":
+            if value:
+                values["hashed_password"] = get_password_hash(value)
         else:
-            setattr(current_user, field, value)
-    
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+            values[field] = value
+    if not values:
+        return UserResponse.model_validate(current_user)
+
+    # Single UPDATE ... RETURNING; the unique index on email rejects conflicts
+    stmt = update(User).where(User.id == current_user.id).values(**values).returning(User)
+    try:
+        user = db.scalars(stmt).one()
+        response = UserResponse.model_validate(user)
+        record_user_changes(db, "updated", [user_to_dict(user)])
+        db.commit()
+        current_user_cache.invalidate(current_user.email.lower(), response.email.lower())
+    except IntegrityError as e:
+        db.rollback()
+        if not is_unique_violation(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    # Field names only; values (the password above all) stay out of the log
+    changed = sorted("password" if field == "hashed_password" else field for field in values)
+    audit_log.record("user.update", actor_id=current_user.id, target_id=current_user.id, fields=changed)
+    return response
+
+@router.post("/import", response_model=BulkImportResult)
+def import_users_file(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    db: Annotated[Session, Depends(get_db)],
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None),
+) -> dict:
+    """Bulk import users from a CSV or NDJSON file (admin only)"""
+    fmt = format or detect_format(file.filename, file.content_type)
+    result = import_users(db, iter_rows(file.file, fmt))
+    audit_log.record("user.import", actor_id=current_user.id, created=result["created"], failed=result["failed"])
+    return result
+
+def _stream_export(bind, fmt: str):
+    # get_db closes its session before a StreamingResponse sends its body,
+    # so the stream reads through a session of its own
+    with Session(bind=bind) as db:
+        yield from export_users(db, fmt)
+
+@router.get("/export")
+def export_users_file(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    db: Annotated[Session, Depends(get_db)],
+    format: Literal["csv", "ndjson"] = Query("ndjson"),
+) -> StreamingResponse:
+    """Stream all users as CSV or NDJSON (admin only)"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(db.get_bind(), format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=users.{format}"},
+    )
+
+@router.get("/search", response_model=List[UserResponse])
+def search_users_by_text(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    db: Annotated[Session, Depends(get_db)],
+    fields: Annotated[Tuple[str, ...], Depends(get_user_fields)],
+    q: Annotated[str, Query(min_length=1, max_length=254, description="Email or name, or part of one")],
+    limit: Annotated[int, Query(ge=1, le=settings.USER_SEARCH_MAX_LIMIT)] = settings.USER_SEARCH_DEFAULT_LIMIT,
+) -> Response:
+    """Search users by email or name (admin only)"""
+    return ORJSONResponse(search_users(db, q, limit, fields))
+
+@router.get("/changes", response_model=UserChangePage)
+def read_user_changes(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    db: Annotated[Session, Depends(get_db)],
+    since: Annotated[int, Query(ge=0, description="Position of the last change already consumed")] = 0,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> Response:
+    """Feed of user changes after a position, oldest first (admin only)"""
+    changes = list_user_changes(db, since, limit)
+    next_since = changes[-1]["position"] if changes else since
+    return ORJSONResponse({"changes": changes, "next_since": next_since})
 
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user_by_id(
+    request: Request,
     user_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
-) -> User:
+    db: Annotated[Session, Depends(get_db)],
+    fields: Annotated[Tuple[str, ...], Depends(get_user_fields)]
+) -> Response:
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    found = user_by_id_flight.do(
+        (user_id, fields), select_user_dict_with_version,
+        db, User.id == user_id, User.deleted_at.is_(None), fields=fields,
+    )
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    if user.id != current_user.id and current_user.role != "admin":
+    if not is_allowed(current_user, "read", User(id=user_id)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return user
+    user, changed_at = found
+    version = as_utc(changed_at)
+    headers = cache_headers(user_etag(user_id, version, fields), version)
+    if is_not_modified(request, headers["ETag"], version):
+        return not_modified(headers)
+    return ORJSONResponse(user, headers=headers)
 
 @router.get("/", response_model=List[UserResponse])
 def read_users_list(
+    request: Request,
     current_user: Annotated[User, Depends(get_current_admin_user)],
-    db: Annotated[Session, Depends(get_db)]
-) -> List[User]:
+    db: Annotated[Session, Depends(get_db)],
+    fields: Annotated[Tuple[str, ...], Depends(get_user_fields)],
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    after_id: Annotated[Optional[int], Query(description="Return users after this id (keyset pagination)")] = None,
+    limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+) -> Response:
     """Get list of users (admin only)"""
-    users = db.query(User).all()
-    return users
+    # Any write to users bumps the table version, so the list is only
+    # queried when it may have changed
+    version = table_version(db, "users")
+    headers = {}
+    if version is not None:
+        query = query_etag_parts(
+            role=role, is_active=is_active, created_after=created_after,
+            created_before=created_before, after_id=after_id, limit=limit,
+        )
+        headers = cache_headers(make_etag("users", version, current_user.role, *query, *fields_etag_parts(fields)))
+        if is_not_modified(request, headers["ETag"]):
+            return not_modified(headers)
+    criteria = [User.deleted_at.is_(None), authorized_filter(current_user, "read", User)]
+    if role is not None:
+        criteria.append(User.role == role)
+    if is_active is not None:
+        # A literal rather than a bound parameter, so the partial index on
+        # inactive users matches
+        criteria.append(User.is_active == (true() if is_active else false()))
+    if created_after is not None:
+        criteria.append(User.created_at >= created_after)
+    if created_before is not None:
+        criteria.append(User.created_at < created_before)
+    if after_id is not None:
+        criteria.append(User.id > after_id)
+    users = select_user_dicts(db, *criteria, fields=fields, limit=limit)
+    return ORJSONResponse(users, headers=headers)
 
 @router.delete("/me", status_code=status.HTTP_200_OK)
 def delete_current_user(
@@ -88,6 +228,14 @@ def delete_current_user(
     db: Annotated[Session, Depends(get_db)]
 ) -> dict:
     """Delete current user"""
-    db.delete(current_user)
+    # Soft delete; the row and its related data are removed later by the purge worker
+    db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(deleted_at=datetime.now(timezone.utc))
+    )
+    record_user_changes(db, "deleted", [{"id": current_user.id}])
     db.commit()
+    current_user_cache.invalidate(current_user.email.lower())
+    audit_log.record("user.delete", actor_id=current_user.id, target_id=current_user.id)
     return {"message": "User deleted successfully"}
@@ -1,10 +1,16 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, rag
+from app.api.v1.endpoints import admin, auth, users
+from app.core.config import settings
 
 api_router = APIRouter()
 # Add auth routes without any dependencies
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 # Add user routes with their own security dependencies
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(rag.router, prefix="/rag", tags=["rag"])
+# Admin-only diagnostics
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+# The RAG stack is optional; its heavy dependencies load on first use
+if settings.RAG_ENABLED:
+    from app.api.v1.endpoints import rag
+    api_router.include_router(rag.router, prefix="/rag", tags=["rag"])
 
@@ -0,0 +1,126 @@
+"""Command line tools for operating the service.
+
+    python -m app.cli import-users users.csv
+    python -m app.cli export-users --format csv --output users.csv
+    python -m app.cli purge-users --grace-hours 0
+    python -m app.cli init-db
+    python -m app.cli export-embeddings --output models/all-MiniLM-L6-v2-onnx --quantize
+    python -m app.cli reindex-embeddings
+"""
+import argparse
+import json
+import sys
+from datetime import timedelta
+
+# app.db.base must be imported before any model module
+from app.db.base import Base, SessionLocal, engine
+from app.core.bulk import FORMATS, detect_format, export_users, import_users, iter_rows
+from app.core.purge import purge_deleted_users
+
+
+def cmd_import_users(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.file)
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as stream:
+            report = import_users(db, iter_rows(stream, fmt), batch_size=args.batch_size)
+    finally:
+        db.close()
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report["failed"] else 0
+
+
+def cmd_export_users(args: argparse.Namespace) -> int:
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        with SessionLocal() as db:
+            for chunk in export_users(db, args.format):
+                output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def cmd_purge_users(args: argparse.Namespace) -> int:
+    grace_period = None if args.grace_hours is None else timedelta(hours=args.grace_hours)
+    db = SessionLocal()
+    try:
+        purged = purge_deleted_users(db, grace_period=grace_period, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Purged {purged} deleted users")
+    return 0
+
+
+def cmd_init_db(args: argparse.Namespace) -> int:
+    """Create any missing tables; production databases are migrated with Alembic"""
+    Base.metadata.create_all(bind=engine)
+    print("Database schema created")
+    return 0
+
+
+def cmd_export_embeddings(args: argparse.Namespace) -> int:
+    """Export the embedding model to ONNX; needs torch, unlike the workers that load it"""
+    from app.core.embeddings import export_onnx
+    from app.core.rag import EMBEDDING_MODEL_NAME
+
+    manifest = export_onnx(args.model or EMBEDDING_MODEL_NAME, args.output, quantize=args.quantize)
+    json.dump(manifest, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+def cmd_reindex_embeddings(args: argparse.Namespace) -> int:
+    from app.core.rag import reindex_vector_store
+
+    print(f"Re-embedded {reindex_vector_store(batch_size=args.batch_size)} chunks")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-users", help="Bulk import users from CSV or NDJSON")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int)
+    import_parser.set_defaults(func=cmd_import_users)
+
+    export_parser = commands.add_parser("export-users", help="Export all users as CSV or NDJSON")
+    export_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    export_parser.add_argument("--output")
+    export_parser.set_defaults(func=cmd_export_users)
+
+    purge_parser = commands.add_parser("purge-users", help="Hard-delete soft-deleted users")
+    purge_parser.add_argument("--grace-hours", type=float)
+    purge_parser.add_argument("--batch-size", type=int)
+    purge_parser.set_defaults(func=cmd_purge_users)
+
+    init_parser = commands.add_parser("init-db", help="Create missing tables (development only)")
+    init_parser.set_defaults(func=cmd_init_db)
+
+    export_embeddings_parser = commands.add_parser("export-embeddings", help="Export the embedding model to ONNX")
+    export_embeddings_parser.add_argument("--model", help="sentence-transformers model name or path")
+    export_embeddings_parser.add_argument("--output", required=True)
+    export_embeddings_parser.add_argument("--quantize", action="store_true", help="also write an int8 model")
+    export_embeddings_parser.set_defaults(func=cmd_export_embeddings)
+
+    reindex_parser = commands.add_parser(
+        "reindex-embeddings", help="Re-embed stored chunks with the configured embedding backend"
+    )
+    reindex_parser.add_argument("--batch-size", type=int, default=256)
+    reindex_parser.set_defaults(func=cmd_reindex_embeddings)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Admission control with adaptive per-route-class concurrency limits.
+
+Requests are sorted into classes before routing (see ``classify``) and
+each class admits up to its current limit concurrently, so a surge of
+expensive requests (RAG, password hashing) cannot take the threadpool and
+event loop from cheap ones. Limits adapt AIMD style: one more slot per
+window of completions within the class's latency target while the limit
+is in use, a multiplicative cut (at most once per target interval) when
+completions are slower. Over the limit a request waits in a short queue;
+when the queue is full or the wait runs out it gets 503 with Retry-After
+straight away, before any work is done for it.
+
+Health probes, metrics and docs are never limited. GET/HEAD requests on
+/users with a valid bearer token form the "read" class, the priority lane:
+a high limit and a deep queue of its own, untouched by load on the other
+classes. The token's signature and expiry are checked here, so junk
+credentials cannot take the lane; the user is still looked up later.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_LIMIT, ADMISSION_REJECTED
+from app.core.security import is_valid_access_token
+
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json")
+AUTH_PATHS = (
+    f"{settings.API_V1_STR}/auth/login",
+    f"{settings.API_V1_STR}/auth/register",
+    f"{settings.API_V1_STR}/users/import",
+)
+READ_PREFIX = f"{settings.API_V1_STR}/users"
+READ_EXCLUDED = (f"{settings.API_V1_STR}/users/export",)
+RAG_PREFIX = f"{settings.API_V1_STR}/rag"
+
+
+def _has_valid_token(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return scheme.lower() == "bearer" and bool(token) and is_valid_access_token(token)
+    return False
+
+
+def classify(scope: Scope) -> Optional[str]:
+    """Route class of a request, or None when it is never limited"""
+    path = scope["path"]
+    if path.startswith(EXEMPT_PATHS):
+        return None
+    if path.startswith(RAG_PREFIX):
+        return "rag"
+    if path.startswith(AUTH_PATHS):
+        return "auth"
+    if (
+        scope["method"] in ("GET", "HEAD")
+        and (path == READ_PREFIX or path.startswith(READ_PREFIX + "/"))
+        and not path.startswith(READ_EXCLUDED)
+        and _has_valid_token(scope)
+    ):
+        return "read"
+    return "default"
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded wait queue"""
+
+    def __init__(self, name: str, limit: float, min_limit: float, max_limit: float,
+                 target_ms: float, queue: float = 0, max_wait_ms: float = 0,
+                 backoff_ratio: float = 0.9):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.target = target_ms / 1000
+        self.queue_size = int(queue)
+        self.max_wait = max_wait_ms / 1000
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.labels(name).set(self.limit)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if allowed; False means shed"""
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.queue_size or self.max_wait <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # The client went away just as a slot was handed over
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+        # A slot handed over by release() is already counted in in_flight
+        return not waiter.cancelled()
+
+    def release(self, latency: float) -> None:
+        was_full = not self._has_capacity()
+        self.in_flight -= 1
+        if latency > self.target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+        elif was_full:
+            # Only grow a limit that is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        ADMISSION_LIMIT.labels(self.name).set(self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, classes: Dict[str, Dict[str, float]],
+                 backoff_ratio: float = 0.9, retry_after: int = 1):
+        self.app = app
+        self.limiters = {
+            name: AdaptiveLimiter(name, backoff_ratio=backoff_ratio, **config)
+            for name, config in classes.items()
+        }
+        self.retry_after = str(retry_after)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope)
+        limiter = self.limiters.get(route_class) if route_class else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            ADMISSION_REJECTED.labels(route_class).inc()
+            await self._reject(send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    async def _reject(self, send: Send) -> None:
+        body = orjson.dumps({"detail": "Server is busy, retry later"})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
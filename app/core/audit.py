@@ -0,0 +1,229 @@
+"""Audit log of authentication events and user changes.
+
+``audit_log.record()`` only puts the event on an in-memory queue, so the
+request pays for no extra write. A background thread writes the queue to
+the sink in batches, when ``AUDIT_BATCH_SIZE`` events are waiting or every
+``AUDIT_FLUSH_INTERVAL_SECONDS``. Delivery is at least once:
+
+- a batch the sink rejects is kept and retried, and the database sink
+  skips events it already stored (``event_id`` is unique), so retries
+  cannot duplicate rows;
+- when the queue is full (the sink is slow or down) ``record()`` waits for
+  room, then writes its own event; this backpressure slows the requests
+  rather than dropping events;
+- on shutdown the queue is drained, and whatever the sink still refuses is
+  appended to ``AUDIT_UNDELIVERED_PATH`` for replay.
+
+Events are recorded after the change commits. They live only in memory
+until written, so a worker that is killed outright loses its queue.
+"""
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import AUDIT_EVENTS, AUDIT_QUEUE_DEPTH
+from app.core.tracing import current_trace_id
+from app.db.base import SessionLocal, dialect_insert
+from app.models.audit import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseAuditSink:
+    """Inserts each batch into audit_events with one statement"""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        with self.session_factory() as db:
+            stmt = dialect_insert(db)(AuditEvent).on_conflict_do_nothing(index_elements=["event_id"])
+            db.execute(stmt, events)
+            db.commit()
+
+
+class FileAuditSink:
+    """Appends one JSON object per event to a local file, synced per batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        data = b"".join(orjson.dumps(event) + b"\n" for event in events)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class AuditLog:
+    def __init__(self):
+        self.sink = None
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(
+        self,
+        sink,
+        batch_size: Optional[int] = None,
+        interval: Optional[float] = None,
+        max_queue_size: Optional[int] = None,
+        enqueue_timeout: Optional[float] = None,
+        undelivered_path: Optional[str] = None,
+    ) -> None:
+        """Replace the sink, draining events queued for the previous one"""
+        self.shutdown()
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.interval = interval or settings.AUDIT_FLUSH_INTERVAL_SECONDS
+        self.enqueue_timeout = (
+            settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS if enqueue_timeout is None else enqueue_timeout
+        )
+        self.undelivered_path = undelivered_path or settings.AUDIT_UNDELIVERED_PATH
+        self._queue = queue.Queue(max_queue_size or settings.AUDIT_MAX_QUEUE_SIZE)
+        self._pending = []
+        self.sink = sink
+        if sink is not None:
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, action: str, actor_id: Optional[int] = None, target_id: Optional[int] = None,
+               **details: Any) -> None:
+        """Queue an audit event; blocks briefly, then writes it inline, when the queue is full"""
+        if self.sink is None:
+            return
+        event = {
+            "event_id": os.urandom(16).hex(),
+            "occurred_at": datetime.now(timezone.utc),
+            "action": action,
+            "actor_id": actor_id,
+            "target_id": target_id,
+            "trace_id": current_trace_id(),
+            "details": details or None,
+        }
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._write_inline(event)
+            return
+        AUDIT_QUEUE_DEPTH.inc()
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> bool:
+        """Write everything queued so far; False when the sink failed"""
+        return self._drain()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        if self._thread:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        if self.sink is not None:
+            self._drain(final=True)
+        self.sink = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._drain():
+                # Don't retry a failing sink on every new event
+                self._stop.wait(self.interval)
+        self._drain(final=True)
+
+    def _take(self, limit: Optional[int]) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        AUDIT_QUEUE_DEPTH.dec(len(batch))
+        return batch
+
+    def _drain(self, final: bool = False) -> bool:
+        with self._lock:
+            while self.sink is not None:
+                if not self._pending:
+                    self._pending = self._take(self.batch_size)
+                if not self._pending:
+                    return True
+                try:
+                    self.sink.write(self._pending)
+                except Exception as e:
+                    logger.warning(f"Failed to write {len(self._pending)} audit events: {e}")
+                    if final:
+                        self._spill(self._pending + self._take(None))
+                        self._pending = []
+                    # Otherwise the batch is kept and retried first next time
+                    return False
+                AUDIT_EVENTS.labels("batched").inc(len(self._pending))
+                self._pending = []
+            return True
+
+    def _write_inline(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                self.sink.write([event])
+            except Exception as e:
+                logger.warning(f"Failed to write audit event: {e}")
+                self._spill([event])
+                return
+        AUDIT_EVENTS.labels("inline").inc()
+
+    def _spill(self, events: List[Dict[str, Any]]) -> None:
+        try:
+            FileAuditSink(self.undelivered_path).write(events)
+        except Exception as e:
+            logger.critical(f"Lost {len(events)} audit events: {e}")
+            return
+        AUDIT_EVENTS.labels("undelivered").inc(len(events))
+        logger.error(f"Appended {len(events)} undelivered audit events to {self.undelivered_path}")
+
+
+audit_log = AuditLog()
+
+
+def init_audit() -> None:
+    """Configure the audit log from settings"""
+    sink = None
+    if settings.AUDIT_SINK == "database":
+        sink = DatabaseAuditSink(SessionLocal)
+    elif settings.AUDIT_SINK == "file":
+        sink = FileAuditSink(settings.AUDIT_FILE_PATH)
+    audit_log.configure(sink)
+
+
+def list_audit_events(
+    db: Session,
+    action: Optional[str] = None,
+    actor_id: Optional[int] = None,
+    target_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[AuditEvent]:
+    """Newest events first, continuing below ``before_id``"""
+    stmt = select(AuditEvent).order_by(AuditEvent.id.desc()).limit(limit)
+    if action is not None:
+        stmt = stmt.where(AuditEvent.action == action)
+    if actor_id is not None:
+        stmt = stmt.where(AuditEvent.actor_id == actor_id)
+    if target_id is not None:
+        stmt = stmt.where(AuditEvent.target_id == target_id)
+    if before_id is not None:
+        stmt = stmt.where(AuditEvent.id < before_id)
+    return list(db.scalars(stmt))
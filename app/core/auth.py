@@ -1,5 +1,8 @@
+from typing import Any, Callable, Dict, Tuple
 from oso import Oso
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import false, true
+from sqlalchemy.sql.elements import ColumnElement
 from app.api.v1.dependencies import get_current_user
 from app.models.user import User
 
@@ -19,15 +22,95 @@ allow(user: User, "delete", target: User) if user.id = target.id;
 allow(user: User, "list", "users") if user.role = "admin";
 """
 
+ROLES = ("admin", "user")
+ACTIONS = ("read", "update", "delete", "list")
+# Resource types are keyed by class name for objects and by value for string resources
+RESOURCE_TYPES = ("User", "users")
+
+# Compiled decisions
+DENY = "deny"
+ALLOW = "allow"
+OWNER = "owner"
+
+_decisions: Dict[Tuple[str, str, str], str] = {}
+
+
 def init_oso():
-    oso.load_str(POLAR_RULES)
     oso.register_class(User)
+    oso.load_str(POLAR_RULES)
+
+
+def _resource_key(resource: Any) -> str:
+    if isinstance(resource, str):
+        return resource
+    return type(resource).__name__
+
+
+def _compile_decision(role: str, action: str, resource_type: str) -> str:
+    """Evaluate the Polar policy once for a (role, action, resource type).
+
+    Object resources are probed with a target the actor owns and one it does
+    not, which tells an unconditional allow apart from an ownership rule.
+    """
+    actor = User(id=1, role=role)
+    if resource_type != "User":
+        return ALLOW if oso.is_allowed(actor, action, resource_type) else DENY
+    if oso.is_allowed(actor, action, User(id=2)):
+        return ALLOW
+    if oso.is_allowed(actor, action, User(id=1)):
+        return OWNER
+    return DENY
+
+
+def compile_policy():
+    """Precompute the decision table for every known role, action and resource type"""
+    _decisions.clear()
+    for role in ROLES:
+        for action in ACTIONS:
+            for resource_type in RESOURCE_TYPES:
+                _decisions[(role, action, resource_type)] = _compile_decision(
+                    role, action, resource_type
+                )
+
+
+def get_decision(role: str, action: str, resource_type: str) -> str:
+    """Look up a compiled decision, compiling and memoising unseen combinations"""
+    key = (role, action, resource_type)
+    decision = _decisions.get(key)
+    if decision is None:
+        decision = _compile_decision(role, action, resource_type)
+        _decisions[key] = decision
+    return decision
+
 
 init_oso()
+compile_policy()
+
+
+def is_allowed(user: User, action: str, resource: Any) -> bool:
+    """Check a permission against the compiled decision table"""
+    resource_type = _resource_key(resource)
+    if resource_type not in RESOURCE_TYPES:
+        return oso.is_allowed(user, action, resource)
+    decision = get_decision(user.role, action, resource_type)
+    if decision == OWNER:
+        return user.id == resource.id
+    return decision == ALLOW
+
+
+def authorized_filter(user: User, action: str, model: Any) -> ColumnElement:
+    """Translate the policy into a WHERE clause selecting the rows the user may act on"""
+    decision = get_decision(user.role, action, model.__name__)
+    if decision == ALLOW:
+        return true()
+    if decision == OWNER:
+        return model.id == user.id
+    return false()
+
 
-def authorize(action: str, resource: any = None):
+def authorize(action: str, resource: any = None) -> Callable:
     async def authorization_dependency(current_user: User = Depends(get_current_user)):
-        if not oso.is_allowed(current_user, action, resource):
+        if not is_allowed(current_user, action, resource):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions"
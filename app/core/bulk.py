@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.outbox import record_user_changes
+from app.core.security import get_password_hash, pwd_context
+from app.core.serialization import USER_RESPONSE_FIELDS
+from app.models.user import User
+from app.schemas.user import UserImport
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+EXPORT_COLUMNS = ("id", "email", "full_name", "role", "is_active", "created_at")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Guess the import format from a file name or content type"""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if content_type and "ndjson" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, raw row) pairs from a binary CSV or NDJSON stream"""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "ndjson":
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, e
+    else:
+        # Row 1 is the header line
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, {k: v for k, v in row.items() if k and v not in (None, "")}
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.created = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.max_errors = max_errors
+
+    def error(self, row: int, email: Optional[str], message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "email": email, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+def _insert_batch(db: Session, batch: List[Tuple[int, UserImport]], report: ImportReport,
+                  pool: ThreadPoolExecutor) -> None:
+    # Rows that carry an existing bcrypt hash skip the expensive hashing step
+    hashes = pool.map(
+        lambda row: row.hashed_password or get_password_hash(row.password),
+        [row for _, row in batch],
+    )
+    values = [
+        {
+            "email": row.email,
+            "hashed_password": hashed,
+            "full_name": row.full_name,
+            "role": row.role,
+            "is_active": row.is_active,
+        }
+        for (_, row), hashed in zip(batch, hashes)
+    ]
+    stmt = insert(User).returning(*(getattr(User, field) for field in USER_RESPONSE_FIELDS))
+    try:
+        created = db.execute(stmt, values)
+        record_user_changes(db, "created", [dict(user._mapping) for user in created])
+        db.commit()
+        report.created += len(values)
+        return
+    except IntegrityError:
+        db.rollback()
+
+    # A concurrent writer beat us to some emails; retry row by row to find them
+    for (row_number, row), value in zip(batch, values):
+        try:
+            created = db.execute(stmt, [value])
+            record_user_changes(db, "created", [dict(user._mapping) for user in created])
+            db.commit()
+            report.created += 1
+        except IntegrityError:
+            db.rollback()
+            report.error(row_number, row.email, "The user with this email already exists in the system")
+
+
+def import_users(db: Session, rows: Iterable[Tuple[int, Any]],
+                 batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Validate, deduplicate, hash and insert users in batches.
+
+    Bad rows are reported individually and never abort the import.
+    """
+    batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+    report = ImportReport(settings.BULK_IMPORT_MAX_REPORTED_ERRORS)
+    known_emails = {
+        email.lower() for email in db.scalars(select(User.email).where(User.deleted_at.is_(None)))
+    }
+    batch: List[Tuple[int, UserImport]] = []
+
+    with ThreadPoolExecutor(max_workers=settings.BULK_IMPORT_HASH_WORKERS) as pool:
+        for row_number, raw in rows:
+            if isinstance(raw, Exception):
+                report.error(row_number, None, f"Invalid JSON: {raw}")
+                continue
+            email = raw.get("email") if isinstance(raw, dict) else None
+            try:
+                row = UserImport.model_validate(raw)
+            except ValidationError as e:
+                message = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}".lstrip(": ")
+                    for err in e.errors()
+                )
+                report.error(row_number, email, message)
+                continue
+            if row.hashed_password and pwd_context.identify(row.hashed_password) != "bcrypt":
+                report.error(row_number, row.email, "hashed_password is not a bcrypt hash")
+                continue
+
+            key = row.email.lower()
+            if key in known_emails:
+                report.error(row_number, row.email, "The user with this email already exists in the system")
+                continue
+            known_emails.add(key)
+
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                _insert_batch(db, batch, report, pool)
+                batch = []
+        if batch:
+            _insert_batch(db, batch, report, pool)
+
+    logger.info(f"Bulk import finished: {report.created} created, {report.failed} failed")
+    return report.as_dict()
+
+
+def export_users(db: Session, fmt: str, chunk_size: int = 1000) -> Iterator[str]:
+    """Stream all users as CSV or NDJSON without loading the table into memory"""
+    columns = [getattr(User, name) for name in EXPORT_COLUMNS]
+    stmt = (
+        select(*columns)
+        .where(User.deleted_at.is_(None))
+        .order_by(User.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in db.execute(stmt).partitions():
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for rows in db.execute(stmt).partitions():
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n"
+                for row in rows
+            )
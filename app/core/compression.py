@@ -0,0 +1,192 @@
+"""Negotiated response compression.
+
+gzip is always available; brotli and zstd are used when the ``brotli`` and
+``zstandard`` packages are installed. Complete bodies below the size
+threshold are sent as-is. Streamed bodies (e.g. the NDJSON export) are
+compressed chunk by chunk and flushed after every chunk so clients still
+receive rows as they are produced.
+"""
+import gzip
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+# Whole bodies larger than this are compressed in a worker thread
+THREAD_OFFLOAD_SIZE = 256 * 1024
+
+
+class _StreamEncoder:
+    """Incremental encoder whose ``compress`` output is decodable up to that point"""
+
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]):
+        self.compress = compress
+        self.finish = finish
+
+
+def _gzip_stream(level: int) -> _StreamEncoder:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return _StreamEncoder(
+        lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli_stream(level: int) -> _StreamEncoder:
+    compressor = brotli.Compressor(quality=level)
+    return _StreamEncoder(
+        lambda data: compressor.process(data) + compressor.flush(),
+        compressor.finish,
+    )
+
+
+def _zstd_stream(level: int) -> _StreamEncoder:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return _StreamEncoder(
+        lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# encoding -> (one-shot compress, streaming encoder factory)
+ENCODERS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[int], _StreamEncoder]]] = {
+    "gzip": (lambda data, level: gzip.compress(data, level, mtime=0), _gzip_stream),
+}
+if brotli is not None:
+    ENCODERS["br"] = (lambda data, level: brotli.compress(data, quality=level), _brotli_stream)
+if zstandard is not None:
+    ENCODERS["zstd"] = (
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _zstd_stream
+    )
+
+
+def negotiate(accept_encoding: str, preference: List[str]) -> Optional[str]:
+    """Pick the client's highest-q encoding, breaking ties by server preference"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 encodings: Tuple[str, ...] = ("zstd", "br", "gzip"),
+                 levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.preference = [encoding for encoding in encodings if encoding in ENCODERS]
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding, send).run(scope, receive)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.app = middleware.app
+        self.minimum_size = middleware.minimum_size
+        self.encoding = encoding
+        self.level = middleware.levels[encoding]
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional[_StreamEncoder] = None
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _set_encoding_headers(self, length: Optional[int]) -> MutableHeaders:
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+        return headers
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.start = message
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is None and not more_body:
+            # Complete body in one message
+            if len(body) < self.minimum_size:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            compress = ENCODERS[self.encoding][0]
+            if len(body) > THREAD_OFFLOAD_SIZE:
+                body = await anyio.to_thread.run_sync(compress, body, self.level)
+            else:
+                body = compress(body, self.level)
+            self._set_encoding_headers(len(body))
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        if self.stream is None:
+            self.stream = ENCODERS[self.encoding][1](self.level)
+            self._set_encoding_headers(None)
+            await self.send(self.start)
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
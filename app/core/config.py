@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_CACHE_SIZE: int = 10000
     
     # Admin Settings
     ADMIN_REGISTRATION_TOKEN: str
@@ -22,29 +24,164 @@ class Settings(BaseSettings):
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:8000", "http://localhost:3000"]
     
+    # Production server (gunicorn -c python:app.gunicorn_conf app.main:app)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: Optional[int] = None  # default: one per CPU of the container's quota
+    SERVER_WORKERS_PER_CPU: float = 1.0
+    SERVER_MAX_WORKERS: int = 16
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_MAX_REQUESTS: int = 10000  # recycle workers after this many requests (0 disables)
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_MAX_WORKER_MEMORY_MB: int = 0  # recycle workers above this private memory (0 disables)
+    SERVER_MEMORY_CHECK_INTERVAL_SECONDS: int = 10
+    SERVER_PRELOAD_APP: bool = True
+    SERVER_ACCESS_LOG: bool = False
+
     # Database
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "app"
-    DATABASE_URL: Optional[PostgresDsn] = None
+    # Any SQLAlchemy URL; assembled from the POSTGRES_* settings when unset
+    DATABASE_URL: Optional[str] = None
     TEST_DATABASE_URL: Optional[PostgresDsn] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP_CONNECTIONS: int = 5
+
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_EXPORTER: str = "json"  # json, otlp or none
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+
+    # Response compression (brotli and zstd need the brotli / zstandard packages)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"  # server preference order
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Profiling
+    PROFILING_MAX_SECONDS: int = 60
+    SLOW_REQUEST_SAMPLING_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_MS: float = 2000.0
+    SLOW_REQUEST_SAMPLE_INTERVAL_MS: float = 10.0
+    SLOW_REQUEST_MAX_CAPTURES: int = 50
+
+    # Admission control (app/core/admission.py). Each route class has an
+    # adaptive concurrency limit: "limit" is the starting value, raised by one
+    # per window of fast completions up to "max_limit" and cut by
+    # ADMISSION_BACKOFF_RATIO when completions take longer than "target_ms",
+    # down to "min_limit". Requests over the limit wait up to "max_wait_ms" in
+    # a queue of "queue" places, otherwise get 503 with Retry-After.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_CLASSES: Dict[str, Dict[str, float]] = {
+        # GET/HEAD on /users with a bearer token: the priority lane
+        "read": {"limit": 32, "min_limit": 8, "max_limit": 256, "target_ms": 100,
+                 "queue": 128, "max_wait_ms": 1000},
+        # Password hashing: login, register, bulk import
+        "auth": {"limit": 8, "min_limit": 2, "max_limit": 32, "target_ms": 1000,
+                 "queue": 16, "max_wait_ms": 500},
+        "rag": {"limit": 4, "min_limit": 1, "max_limit": 16, "target_ms": 15000,
+                "queue": 0, "max_wait_ms": 0},
+        "default": {"limit": 32, "min_limit": 4, "max_limit": 128, "target_ms": 500,
+                    "queue": 32, "max_wait_ms": 500},
+    }
+    ADMISSION_BACKOFF_RATIO: float = 0.9
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Audit log (app/core/audit.py). Events are queued in memory and written
+    # in batches; when the queue is full a request waits up to
+    # AUDIT_ENQUEUE_TIMEOUT_SECONDS and then writes its event itself. Events
+    # the sink still refuses at shutdown are appended to AUDIT_UNDELIVERED_PATH
+    AUDIT_SINK: str = "database"  # database, file or none
+    AUDIT_FILE_PATH: str = "audit.jsonl"
+    AUDIT_UNDELIVERED_PATH: str = "audit-undelivered.jsonl"
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_MAX_QUEUE_SIZE: int = 10000
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 0.5
+
+    # Outbox of user changes (app/core/outbox.py). The relay positions
+    # committed changes for GET /users/changes and publishes them to OUTBOX_SINK
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_SINK: str = "none"  # none (feed only), queue (in-process) or file
+    OUTBOX_FILE_PATH: str = "user-changes.jsonl"
+
+    # Cache invalidation (app/core/invalidation.py): postgres broadcasts to
+    # every worker and replica with LISTEN/NOTIFY on the application
+    # database; local reaches this worker only
+    INVALIDATION_BUS: str = "postgres"
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    # Users looked up from access tokens, dropped on every worker when the
+    # user changes (0 disables)
+    USER_CACHE_TTL_SECONDS: float = 0
+    USER_CACHE_SIZE: int = 10000
+
+    # Share one in-flight lookup among identical concurrent requests
+    SINGLEFLIGHT_ENABLED: bool = True
+
+    # Health probes
+    HEALTH_CACHE_TTL_SECONDS: float = 2.0
+    HEALTH_DB_LATENCY_THRESHOLD_MS: float = 250.0
+    HEALTH_POOL_SATURATION_THRESHOLD: float = 0.9
+    HEALTH_EXECUTOR_QUEUE_THRESHOLD: int = 20
+
+    # Bulk import
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_HASH_WORKERS: int = 4
+    BULK_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # User search
+    USER_SEARCH_DEFAULT_LIMIT: int = 20
+    USER_SEARCH_MAX_LIMIT: int = 100
+
+    # Soft-deleted user purge
+    USER_PURGE_ENABLED: bool = False
+    USER_PURGE_INTERVAL_SECONDS: int = 300
+    USER_PURGE_GRACE_PERIOD_HOURS: int = 24
+    USER_PURGE_BATCH_SIZE: int = 500
+    USER_PURGE_BATCH_PAUSE_SECONDS: float = 0.5
 
     #rag
     GROQ_API_KEY: str
+    RAG_ENABLED: bool = True
+    RAG_PRELOAD_MODELS: bool = False
+    RAG_LLM_PROVIDER: str = "groq"  # groq, or fake for load tests
+    RAG_RETRIEVAL_K: int = 6
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1024
+    RAG_CONTEXT_MIN_CHUNK_TOKENS: int = 64  # smallest part of a chunk worth sending when the rest does not fit
+    EMBEDDING_BACKEND: str = "torch"  # torch, or onnx for a model exported with `python -m app.cli export-embeddings`
+    EMBEDDING_ONNX_PATH: str = "./models/all-MiniLM-L6-v2-onnx"
+    EMBEDDING_ONNX_QUANTIZED: bool = False
+    EMBEDDING_ONNX_THREADS: int = 0  # 0 lets onnxruntime use one thread per core
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_COMPAT_MIN_COSINE: float = 0.99
 
     @field_validator("DATABASE_URL", mode="before")
     @classmethod
     def assemble_db_connection(cls, v: Optional[str], info: Dict[str, Any]) -> Any:
         if isinstance(v, str):
             return v
-        return PostgresDsn.build(
+        return str(PostgresDsn.build(
             scheme="postgresql",
             username=info.data.get("POSTGRES_USER"),
             password=info.data.get("POSTGRES_PASSWORD"),
             host=info.data.get("POSTGRES_SERVER"),
             path=f"{info.data.get('POSTGRES_DB') or ''}",
-        )
+        ))
 
     @field_validator("TEST_DATABASE_URL", mode="before")
     @classmethod
@@ -0,0 +1,145 @@
+"""Assemble retrieved chunks into a token-budgeted QA context.
+
+Retrieval returns more chunks than fit, with relevance scores. Going from
+the most relevant down, each chunk is:
+
+- dropped if its text is already in the context (re-uploaded pages,
+  chunks inside a longer one);
+- trimmed where it overlaps a chunk already taken, which the splitter's
+  ``chunk_overlap`` guarantees for neighbours;
+- taken if it fits the remaining budget, cut at a word boundary if only
+  part of it fits and that part is worth sending, and skipped otherwise.
+
+Packed chunks are put back in document order so neighbours read on. Token
+counts are estimates (see ``estimate_tokens``); the LLM's own count is
+reported alongside when the provider returns usage.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+SEPARATOR = "\n\n"
+
+# Shorter shared text between chunks is left alone as a likely coincidence
+MIN_OVERLAP_CHARS = 20
+
+_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate a BPE tokenizer like Llama 3's without loading one.
+
+    Words count one token per six characters, digits one per three (Llama 3
+    splits numbers into groups of three), and each punctuation mark one.
+    """
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += math.ceil(len(piece) / 6)
+    return tokens
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _edge_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of ``first`` that is a prefix of ``second``"""
+    if len(first) < MIN_OVERLAP_CHARS or len(second) < MIN_OVERLAP_CHARS:
+        return 0
+    head = second[:MIN_OVERLAP_CHARS]
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(head, start + 1)
+    return 0
+
+
+def _truncate(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> str:
+    """Longest run of whole words from the start that fits ``max_tokens``"""
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def _document_order(piece: Dict[str, Any]):
+    metadata = piece["metadata"]
+    return (str(metadata.get("source", "")), metadata.get("page", 0), metadata.get("start_index", 0))
+
+
+def pack_context(
+    scored_documents: List[Tuple[Any, float]],
+    budget: int,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+    min_chunk_tokens: int = 0,
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """Pack (document, relevance) pairs into at most ``budget`` context tokens.
+
+    Returns the context text, the packed pieces in document order (each with
+    its metadata, text, score and tokens) and packing statistics.
+    """
+    ranked = sorted(scored_documents, key=lambda pair: pair[1], reverse=True)
+    pieces: List[Dict[str, Any]] = []
+    stats = {
+        "retrieved": len(ranked),
+        "packed": 0,
+        "duplicates": 0,
+        "overlap_chars_trimmed": 0,
+        "truncated": 0,
+        "over_budget": 0,
+    }
+    separator_tokens = count_tokens(SEPARATOR)
+    remaining = budget
+
+    for document, score in ranked:
+        text = _normalize(document.page_content)
+        metadata = dict(document.metadata or {})
+        if not text or any(text in piece["text"] for piece in pieces):
+            stats["duplicates"] += 1
+            continue
+
+        original_length = len(text)
+        for piece in pieces:
+            head = _edge_overlap(piece["text"], text)
+            if head:
+                text = text[head:].lstrip()
+                metadata["start_index"] = metadata.get("start_index", 0) + head
+            tail = _edge_overlap(text, piece["text"])
+            if tail:
+                text = text[:-tail].rstrip()
+        stats["overlap_chars_trimmed"] += original_length - len(text)
+        if len(text) < MIN_OVERLAP_CHARS:
+            stats["duplicates"] += 1
+            continue
+
+        available = remaining - (separator_tokens if pieces else 0)
+        tokens = count_tokens(text)
+        if tokens > available:
+            if available < max(min_chunk_tokens, 1):
+                stats["over_budget"] += 1
+                continue
+            text = _truncate(text, available, count_tokens)
+            if not text:
+                stats["over_budget"] += 1
+                continue
+            tokens = count_tokens(text)
+            stats["truncated"] += 1
+        pieces.append({"metadata": metadata, "text": text, "score": score, "tokens": tokens})
+        remaining = available - tokens
+
+    pieces.sort(key=_document_order)
+    context = SEPARATOR.join(piece["text"] for piece in pieces)
+    stats["packed"] = len(pieces)
+    stats["budget"] = budget
+    stats["context_tokens"] = count_tokens(context)
+    return context, pieces, stats
+
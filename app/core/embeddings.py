@@ -0,0 +1,209 @@
+"""ONNX Runtime backend for the sentence embedding model.
+
+``export_onnx`` converts a sentence-transformers model to ONNX once, with
+PyTorch, and optionally writes an int8 copy with dynamic quantisation. The
+output directory holds the graph(s), ``tokenizer.json`` and a manifest with
+the pooling settings and how closely each file reproduces the source model
+on a set of probe sentences.
+
+``OnnxEmbeddings`` serves that directory with onnxruntime, tokenizers and
+numpy only, so workers using it never import torch. Like the rest of the
+RAG stack, this module is imported on first use.
+
+Vectors are only comparable within one embedding space. The space an index
+was built in is kept next to it in ``embedding_space.json``; an ONNX file
+whose worst probe cosine against its source model is at least
+EMBEDDING_COMPAT_MIN_COSINE counts as the source model's space, anything
+else gets a space of its own and needs a re-index.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+SPACE_FILE = "embedding_space.json"
+MODEL_FILES = {"fp32": "model.onnx", "int8": "model.int8.onnx"}
+
+# Compared between the source model and each exported file
+PROBE_TEXTS = [
+    "How do I reset my password?",
+    "The quarterly report shows revenue grew by 12% compared to last year.",
+    "Users can be imported in bulk from CSV or NDJSON files.",
+    "a",
+    "Refresh tokens are rotated on every use and revoked on logout.",
+    "The patient was prescribed 20mg twice daily for two weeks.",
+    "ERROR 503: service unavailable, retry after 5 seconds",
+    " ".join(["Long inputs are truncated to the model's maximum sequence length."] * 40),
+]
+
+
+def _cosines(a, b) -> List[float]:
+    import numpy as np
+
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return list(np.sum(a * b, axis=1) / np.maximum(norms, 1e-12))
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False, opset: int = 17) -> Dict[str, Any]:
+    """Export a mean-pooling sentence-transformers model; returns the manifest"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    module_types = [type(module).__name__ for module in model]
+    if module_types[:2] != ["Transformer", "Pooling"] or set(module_types[2:]) - {"Normalize"}:
+        raise ValueError(f"Only Transformer + mean Pooling [+ Normalize] models can be exported, got {module_types}")
+    transformer, pooling = model[0], model[1]
+    if pooling.get_config_dict().get("pooling_mode") != "mean":
+        raise ValueError("Only mean pooling is supported")
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(PROBE_TEXTS[:2], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, MODEL_FILES["fp32"])
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in [*input_names, "token_embeddings"]},
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.save_pretrained(output_dir)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(output_dir, MODEL_FILES["int8"]), weight_type=QuantType.QInt8)
+
+    reference = model.encode(PROBE_TEXTS)
+    manifest = {
+        "source_model": model_name,
+        "dimension": int(reference.shape[1]),
+        "max_seq_length": model.max_seq_length,
+        "pooling": "mean",
+        "normalize": "Normalize" in module_types,
+        "inputs": input_names,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "files": {},
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+    for variant in ("fp32", "int8") if quantize else ("fp32",):
+        onnx_model = OnnxEmbeddings(output_dir, quantized=variant == "int8")
+        manifest["files"][variant] = {
+            "path": MODEL_FILES[variant],
+            "min_cosine": round(float(min(_cosines(reference, onnx_model.embed_documents(PROBE_TEXTS)))), 6),
+        }
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class OnnxEmbeddings(Embeddings):
+    """Encodes with a model written by ``export_onnx``"""
+
+    def __init__(self, path: str, quantized: bool = False, threads: int = 0, batch_size: int = 32):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.variant = "int8" if quantized else "fp32"
+        model_path = os.path.join(path, MODEL_FILES[self.variant])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} does not exist; export the model with --quantize")
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.manifest["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.manifest["pad_token_id"], pad_token=self.manifest["pad_token"])
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+    @property
+    def space(self) -> str:
+        return onnx_space(self.manifest, self.variant)
+
+    def _encode(self, texts: List[str]):
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {name: features[name] for name in self.manifest["inputs"]})[0]
+        mask = features["attention_mask"][:, :, None].astype(token_embeddings.dtype)
+        vectors = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.manifest["normalize"]:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Batches of similar length waste less work on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def onnx_space(manifest: Dict[str, Any], variant: str) -> str:
+    """The source model's space if the export reproduces it closely enough"""
+    source = manifest["source_model"]
+    min_cosine = manifest["files"][variant]["min_cosine"]
+    if min_cosine >= settings.EMBEDDING_COMPAT_MIN_COSINE:
+        return source
+    logger.warning(
+        f"ONNX {variant} embeddings reach a cosine of only {min_cosine} against {source}; "
+        "indexes built with the source model must be re-indexed"
+    )
+    return f"{source}:onnx-{variant}"
+
+
+def read_index_space(persist_directory: str, default: str) -> Optional[str]:
+    """Space recorded for an index; ``default`` for one built before spaces were recorded"""
+    path = os.path.join(persist_directory, SPACE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)["space"]
+    if os.path.isdir(persist_directory) and os.listdir(persist_directory):
+        return default
+    return None
+
+
+def write_index_space(persist_directory: str, space: str) -> None:
+    os.makedirs(persist_directory, exist_ok=True)
+    with open(os.path.join(persist_directory, SPACE_FILE), "w") as f:
+        json.dump({"space": space}, f)
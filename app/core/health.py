@@ -0,0 +1,109 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+import anyio.to_thread
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+def check_database(engine: Engine) -> Dict[str, Any]:
+    """Time a round trip to the database"""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"healthy": False, "error": str(e)}
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {
+        "healthy": latency_ms <= settings.HEALTH_DB_LATENCY_THRESHOLD_MS,
+        "latency_ms": round(latency_ms, 2),
+        "threshold_ms": settings.HEALTH_DB_LATENCY_THRESHOLD_MS,
+    }
+
+
+def check_pool(engine: Engine) -> Dict[str, Any]:
+    """Report how many pooled connections are checked out"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {"healthy": True, "skipped": True}
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity else 0.0
+    return {
+        "healthy": saturation < settings.HEALTH_POOL_SATURATION_THRESHOLD,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(saturation, 3),
+        "threshold": settings.HEALTH_POOL_SATURATION_THRESHOLD,
+    }
+
+
+def check_vector_store() -> Dict[str, Any]:
+    """Check the vector store without loading the embedding model"""
+    if not settings.RAG_ENABLED:
+        return {"healthy": True, "skipped": True}
+    from app.core import rag
+
+    embeddings_loaded = rag._embeddings is not None
+    return {
+        # A preloading worker is not ready until the model is in memory
+        "healthy": embeddings_loaded or not settings.RAG_PRELOAD_MODELS,
+        "embeddings_loaded": embeddings_loaded,
+        "embedding_backend": settings.EMBEDDING_BACKEND,
+        # Queries still run, but against vectors from another model
+        "reindex_required": rag.reindex_required,
+        "persist_directory_exists": os.path.isdir(rag.CHROMA_PERSIST_DIRECTORY),
+    }
+
+
+def check_executor() -> Dict[str, Any]:
+    """Report the threadpool that runs sync endpoints and dependencies"""
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "healthy": stats.tasks_waiting <= settings.HEALTH_EXECUTOR_QUEUE_THRESHOLD,
+        "busy_threads": stats.borrowed_tokens,
+        "total_threads": stats.total_tokens,
+        "queued": stats.tasks_waiting,
+        "threshold": settings.HEALTH_EXECUTOR_QUEUE_THRESHOLD,
+    }
+
+
+class ReadinessProbe:
+    """Runs the readiness checks at most once per TTL and serves the cached result"""
+
+    def __init__(self, engine: Engine, ttl: Optional[float] = None):
+        self.engine = engine
+        self.ttl = settings.HEALTH_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def invalidate(self) -> None:
+        self._result = None
+
+    async def check(self, started: bool) -> Dict[str, Any]:
+        if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+            self._checked_at = time.monotonic()
+            self._result = await self._run_checks()
+        checks = dict(self._result["checks"], startup={"healthy": started})
+        return {
+            "ready": started and self._result["ready"],
+            "checks": checks,
+        }
+
+    async def _run_checks(self) -> Dict[str, Any]:
+        checks = {
+            # Checked first so a saturated threadpool is reported even if the DB check queues
+            "executor": check_executor(),
+            "pool": check_pool(self.engine),
+            "vector_store": check_vector_store(),
+            "database": await run_in_threadpool(check_database, self.engine),
+        }
+        return {
+            "ready": all(check["healthy"] for check in checks.values()),
+            "checks": checks,
+        }
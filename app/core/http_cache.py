@@ -0,0 +1,85 @@
+"""Validators for conditional GET.
+
+ETags are weak because the same representation may be sent compressed or
+not. Responses are marked ``private, no-cache`` so clients (and only
+clients) keep them but revalidate on every use.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.serialization import USER_RESPONSE_FIELDS
+from app.models.table_version import TableVersion
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; everything is stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def user_version(user) -> datetime:
+    return as_utc(user.updated_at or user.created_at)
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def fields_etag_parts(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """A ``?fields=`` selection changes the body, so it is part of the ETag; the full user adds nothing"""
+    return () if fields == USER_RESPONSE_FIELDS else fields
+
+
+def query_etag_parts(**params: Any) -> Tuple[str, ...]:
+    """A digest of the query parameters that were set; none when all are unset"""
+    selected = sorted((name, repr(value)) for name, value in params.items() if value is not None)
+    if not selected:
+        return ()
+    return (hashlib.blake2b(repr(selected).encode(), digest_size=8).hexdigest(),)
+
+
+def user_etag(user_id: int, version: datetime, fields: Tuple[str, ...] = USER_RESPONSE_FIELDS) -> str:
+    return make_etag("user", user_id, int(version.timestamp() * 1_000_000), *fields_etag_parts(fields))
+
+
+def table_version(db: Session, name: str) -> Optional[int]:
+    """Change counter of a table, or None if the table is not versioned"""
+    return db.scalar(select(TableVersion.version).where(TableVersion.name == name))
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETags were sent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {_strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+        return _strip_weak(etag) in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return as_utc(last_modified).replace(microsecond=0) <= as_utc(since)
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
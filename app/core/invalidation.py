@@ -0,0 +1,272 @@
+"""Cross-worker cache invalidation.
+
+In-process caches subscribe to a channel on ``invalidation_bus`` and drop
+keys when anything is published to it, on this worker straight away and
+on every other worker through the configured transport:
+
+- ``PostgresTransport`` uses LISTEN/NOTIFY on the application database, so
+  every worker and replica sharing the database hears it without another
+  service. Each worker holds one extra connection for listening.
+- ``LocalTransport`` connects buses in one process; tests use it to stand
+  in for several workers.
+
+Subscribers are called with ``None`` after the listener reconnects, as
+messages may have been missed; caches whose entries can go stale drop
+everything.
+Propagation lag is measured from the publisher's wall clock, so across
+hosts it includes clock skew.
+"""
+import logging
+import os
+import select
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import INVALIDATION_LAG
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[Optional[str]], None]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+
+class LocalTransport:
+    """Delivers messages to the other transports on the same ``network`` list"""
+
+    def __init__(self, network: Optional[list] = None):
+        self.network = network if network is not None else []
+        self.network.append(self)
+        self._receive: Optional[Callable[[bytes], None]] = None
+
+    def start(self, receive: Callable[[bytes], None]) -> None:
+        self._receive = receive
+
+    def send(self, payload: bytes) -> None:
+        for transport in list(self.network):
+            if transport is not self and transport._receive:
+                transport._receive(payload)
+
+    def stop(self) -> None:
+        self._receive = None
+        if self in self.network:
+            self.network.remove(self)
+
+
+class PostgresTransport:
+    """LISTEN/NOTIFY on a dedicated connection, outside the engine's pool"""
+
+    def __init__(self, engine: Engine, channel: Optional[str] = None, reconnect_delay: float = 1.0):
+        self.engine = engine
+        self.channel = channel or settings.INVALIDATION_CHANNEL
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._receive: Optional[Callable[[Optional[bytes]], None]] = None
+        self.listening = threading.Event()
+
+    def start(self, receive: Callable[[Optional[bytes]], None]) -> None:
+        self._receive = receive
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def send(self, payload: bytes) -> None:
+        # Published after the change has committed, on a pooled connection
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                         {"channel": self.channel, "payload": payload.decode()})
+            conn.commit()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _connect(self):
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        conn = dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                if connected_before:
+                    # Anything published while we were away is lost
+                    self._receive(None)
+                connected_before = True
+                self.listening.set()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self._receive(conn.notifies.pop(0).payload.encode())
+            except Exception as e:
+                logger.warning(f"Invalidation listener disconnected: {e}")
+                self.listening.clear()
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+class InvalidationBus:
+    def __init__(self):
+        self.transport = None
+        self.origin = ""
+        self._subscribers: Dict[str, List[Subscriber]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Subscriber) -> None:
+        self._subscribers[channel].append(callback)
+
+    def configure(self, transport) -> None:
+        self.shutdown()
+        # Set per worker, after any fork, so workers can tell their own messages apart
+        self.origin = os.urandom(8).hex()
+        self.transport = transport
+        if transport is not None:
+            transport.start(self._receive)
+
+    def shutdown(self) -> None:
+        if self.transport is not None:
+            self.transport.stop()
+        self.transport = None
+
+    def publish(self, channel: str, *keys: str) -> None:
+        """Drop keys here, then broadcast; a failed broadcast is logged, never raised"""
+        self._dispatch(channel, keys)
+        if self.transport is None:
+            return
+        try:
+            for payload in self._payloads(channel, keys):
+                self.transport.send(payload)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast invalidation of {channel}: {e}")
+
+    def _payloads(self, channel: str, keys) -> List[bytes]:
+        """Messages carrying ``keys``, each under MAX_PAYLOAD_BYTES.
+
+        A key too long to fit a message on its own is sent as ``None``, which
+        makes peers drop the whole channel.
+        """
+        sent = time.time()
+        overhead = len(orjson.dumps({"o": self.origin, "c": channel, "k": [], "t": sent}))
+        chunks: List[list] = [[]]
+        size = overhead
+        for key in keys:
+            key_size = len(orjson.dumps(key)) + 1
+            if overhead + key_size > MAX_PAYLOAD_BYTES:
+                key, key_size = None, 5
+            if chunks[-1] and size + key_size > MAX_PAYLOAD_BYTES:
+                chunks.append([])
+                size = overhead
+            chunks[-1].append(key)
+            size += key_size
+        return [orjson.dumps({"o": self.origin, "c": channel, "k": chunk, "t": sent}) for chunk in chunks]
+
+    def _receive(self, payload: Optional[bytes]) -> None:
+        if payload is None:
+            for channel in self._subscribers:
+                self._dispatch(channel, (None,))
+            return
+        try:
+            message = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning("Ignoring a malformed invalidation message")
+            return
+        if message["o"] == self.origin:
+            return
+        INVALIDATION_LAG.labels(message["c"]).observe(max(0.0, time.time() - message["t"]))
+        self._dispatch(message["c"], message["k"])
+
+    def _dispatch(self, channel: str, keys) -> None:
+        for callback in self._subscribers.get(channel, ()):
+            for key in keys:
+                try:
+                    callback(key)
+                except Exception as e:
+                    logger.error(f"Invalidation subscriber for {channel} failed: {e}")
+
+
+invalidation_bus = InvalidationBus()
+
+
+def init_invalidation(engine: Engine) -> None:
+    """Configure the bus from settings; Postgres needs a Postgres engine"""
+    if settings.INVALIDATION_BUS == "postgres" and engine.dialect.name == "postgresql":
+        invalidation_bus.configure(PostgresTransport(engine))
+    else:
+        invalidation_bus.configure(LocalTransport())
+
+
+class InvalidatedCache:
+    """Bounded TTL cache whose keys are dropped on every worker through the bus.
+
+    A reader that misses takes ``generation`` before loading and passes it to
+    ``set``; if an invalidation arrived in between, the possibly stale value
+    is not stored.
+    """
+
+    def __init__(self, channel: str, maxsize: int, ttl: float, bus: Optional[InvalidationBus] = None):
+        self.channel = channel
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.bus = bus or invalidation_bus
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bus.subscribe(channel, self._drop)
+
+    def get(self, key: Hashable) -> Any:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop keys on this worker and every other"""
+        self.bus.publish(self.channel, *keys)
+
+    def clear(self) -> None:
+        self._drop(None)
+
+    def _drop(self, key: Optional[str]) -> None:
+        with self._lock:
+            self.generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
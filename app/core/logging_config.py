@@ -0,0 +1,38 @@
+"""Log format for the application and the production server.
+
+Every line carries the trace and span ids of the request that logged it
+(``-`` outside a request), so a line can be found from the ``X-Trace-Id``
+response header and its spans from the line.
+"""
+import logging.config
+from typing import Any, Dict
+
+from app.core.config import settings
+
+LOG_FORMAT = (
+    "%(asctime)s [%(process)d] [%(levelname)s] [trace_id=%(trace_id)s span_id=%(span_id)s] "
+    "%(name)s: %(message)s"
+)
+
+
+def logging_config() -> Dict[str, Any]:
+    """dictConfig for the root logger, which the application's loggers propagate to"""
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "filters": {"trace_context": {"()": "app.core.tracing.TraceContextFilter"}},
+        "formatters": {"default": {"format": LOG_FORMAT}},
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "formatter": "default",
+                "filters": ["trace_context"],
+                "stream": "ext://sys.stderr",
+            },
+        },
+        "root": {"level": settings.LOG_LEVEL, "handlers": ["console"]},
+    }
+
+
+def configure_logging() -> None:
+    logging.config.dictConfig(logging_config())
@@ -0,0 +1,180 @@
+"""Prometheus metrics.
+
+When PROMETHEUS_MULTIPROC_DIR is set (it must be set before this module is
+imported, e.g. by the process manager), every worker writes its samples to
+that directory and /metrics aggregates all workers.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_duration_per_request_seconds", "Time spent in SQL per HTTP request", ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds", "SQL statement latency", buckets=LATENCY_BUCKETS,
+)
+BCRYPT_LATENCY = Histogram(
+    "bcrypt_duration_seconds", "Password hashing and verification time", ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+EMBEDDING_LATENCY = Histogram(
+    "embedding_duration_seconds", "Embedding model encode time", ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "llm_duration_seconds", "LLM call time", buckets=LATENCY_BUCKETS,
+)
+RAG_PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens", "Estimated tokens in each QA prompt",
+    buckets=(128, 256, 512, 768, 1024, 1536, 2048, 4096, 8192),
+)
+RAG_CONTEXT_CHUNKS = Counter(
+    "rag_context_chunks_total",
+    "Retrieved chunks by packing outcome: packed (truncated ones included), truncated, duplicate or over_budget",
+    ["outcome"],
+)
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit", "Current adaptive concurrency limit", ["route_class"],
+    multiprocess_mode="liveall",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests shed with 503 by admission control", ["route_class"],
+)
+AUDIT_EVENTS = Counter(
+    "audit_events_total",
+    "Audit events by delivery: batched, inline (written by the request when the queue was full) or undelivered",
+    ["delivery"],
+)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth", "Audit events waiting to be written", multiprocess_mode="livesum",
+)
+INVALIDATION_LAG = Histogram(
+    "cache_invalidation_lag_seconds",
+    "Time from publishing a cache invalidation to another worker receiving it", ["channel"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Calls through a single-flight group; coalesced calls shared a concurrent leader's result",
+    ["group", "role"],
+)
+
+
+class _RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Shared with threadpool workers, which run in a copy of the request's context
+_request_db_stats: ContextVar[Optional[_RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record per-statement latency and per-request query counts for an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_STATEMENT_LATENCY.observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+
+def _route_label(scope: Scope) -> str:
+    # Templated paths keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Per-route request count, latency, in-flight and DB usage"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = _RequestDBStats()
+        token = _request_db_stats.set(stats)
+        # The route is only known after routing, so in-flight is tracked per method
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            _request_db_stats.reset(token)
+            route = _route_label(scope)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition output for this worker, or for all workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,177 @@
+"""Transactional outbox for user changes.
+
+Endpoints that create, update or delete users call ``record_user_changes``
+before committing, so a change event exists exactly when the change does.
+The relay then takes committed events in batches, gives them consecutive
+positions and publishes them to a sink. Positions are handed out by one
+relay at a time (a transaction-scoped advisory lock on Postgres), so they
+follow the order in which changes became visible and never leave a gap a
+consumer could skip over. ``GET /users/changes?since=`` pages through them.
+
+Publishing happens before the batch commits: after a crash the batch is
+published again, so consumers should dedupe on the change ``id``.
+"""
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.user_change import UserChange
+
+logger = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock held while positions are assigned
+RELAY_LOCK_KEY = 0x757365725F6368  # "user_ch"
+
+
+def record_user_changes(db: Session, operation: str, users: Iterable[Dict[str, Any]]) -> None:
+    """Add change events to the session's transaction; ``users`` are user dicts with an id"""
+    values = [
+        {"user_id": user["id"], "operation": operation, "user": None if operation == "deleted" else user}
+        for user in users
+    ]
+    if values:
+        db.execute(insert(UserChange), values)
+
+
+def change_to_dict(change: UserChange) -> Dict[str, Any]:
+    return {
+        "id": change.id,
+        "position": change.position,
+        "user_id": change.user_id,
+        "operation": change.operation,
+        "occurred_at": change.occurred_at,
+        "user": change.user,
+    }
+
+
+class QueueOutboxSink:
+    """Puts published changes on an in-process queue; a full queue holds the relay back"""
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize)
+
+    def publish(self, changes: List[Dict[str, Any]]) -> None:
+        for change in changes:
+            self.queue.put(change)
+
+
+class FileOutboxSink:
+    """Appends one JSON object per change to a local file, synced per batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def publish(self, changes: List[Dict[str, Any]]) -> None:
+        data = b"".join(orjson.dumps(change) + b"\n" for change in changes)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def make_outbox_sink():
+    """The sink named by OUTBOX_SINK, or None to only assign feed positions"""
+    if settings.OUTBOX_SINK == "queue":
+        return QueueOutboxSink()
+    if settings.OUTBOX_SINK == "file":
+        return FileOutboxSink(settings.OUTBOX_FILE_PATH)
+    return None
+
+
+def _lock_relay(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        # SQLite runs one write transaction at a time anyway
+        return True
+    return db.scalar(select(func.pg_try_advisory_xact_lock(RELAY_LOCK_KEY)))
+
+
+def relay_user_changes(
+    db: Session,
+    sink=None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Position and publish committed change events in batches.
+
+    Returns the number relayed; 0 when another worker holds the relay.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    relayed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        if not _lock_relay(db):
+            db.rollback()
+            break
+        changes = list(db.scalars(
+            select(UserChange)
+            .where(UserChange.position.is_(None))
+            .order_by(UserChange.id)
+            .limit(batch_size)
+        ))
+        if not changes:
+            db.rollback()
+            break
+        last = db.scalar(select(func.coalesce(func.max(UserChange.position), 0)))
+        now = datetime.now(timezone.utc)
+        for offset, change in enumerate(changes, 1):
+            change.position = last + offset
+            change.published_at = now
+        if sink is not None:
+            sink.publish([change_to_dict(change) for change in changes])
+        db.commit()
+
+        relayed += len(changes)
+        batches += 1
+        if len(changes) < batch_size:
+            break
+    return relayed
+
+
+def list_user_changes(db: Session, since: int, limit: int) -> List[Dict[str, Any]]:
+    """Relayed changes after position ``since``, oldest first"""
+    changes = db.scalars(
+        select(UserChange)
+        .where(UserChange.position > since)
+        .order_by(UserChange.position)
+        .limit(limit)
+    )
+    return [change_to_dict(change) for change in changes]
+
+
+class OutboxRelayWorker:
+    """Background thread that relays user changes"""
+
+    def __init__(self, sink=None, interval: Optional[float] = None):
+        self.sink = sink
+        self.interval = interval or settings.OUTBOX_RELAY_INTERVAL_SECONDS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                relay_user_changes(db, self.sink)
+            except Exception as e:
+                logger.error(f"Error relaying user changes: {e}")
+                db.rollback()
+            finally:
+                db.close()
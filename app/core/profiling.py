@@ -0,0 +1,283 @@
+"""On-demand profiling for a running worker.
+
+Stacks are written in the collapsed ("folded") format understood by
+flamegraph.pl, speedscope and inferno: one ``frame;frame;frame count`` line
+per distinct stack, root first.
+"""
+import asyncio
+import functools
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Threads parked in these files are idle (waiting on a lock, a queue or the selector)
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _folded_stack(frame) -> Optional[str]:
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(exclude: Optional[set] = None) -> List[str]:
+    """Folded stacks of every busy thread"""
+    thread_names = _thread_names()
+    stacks = []
+    for ident, frame in sys._current_frames().items():
+        if exclude and ident in exclude:
+            continue
+        stack = _folded_stack(frame)
+        if stack:
+            stacks.append(f"{thread_names.get(ident, ident)};{stack}")
+    return stacks
+
+
+def _thread_names() -> Dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate()}
+
+
+def render_folded(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed interval; one profile at a time per worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._counts: Counter = Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, interval: float) -> None:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being recorded")
+        self._counts = Counter()
+        self._samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="cpu-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._thread.join()
+        self._lock.release()
+        return {"samples": self._samples, "folded": render_folded(self._counts)}
+
+    def _run(self, interval: float) -> None:
+        me = {threading.get_ident()}
+        while not self._stop.wait(interval):
+            self._counts.update(sample_stacks(exclude=me))
+            self._samples += 1
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots compared against the snapshot taken at start"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def snapshot(self, limit: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        if self._baseline is not None:
+            stats = snapshot.compare_to(self._baseline, key_type)
+            top = [
+                {"location": str(stat.traceback), "size_kb": stat.size / 1024,
+                 "size_diff_kb": stat.size_diff / 1024, "count": stat.count,
+                 "count_diff": stat.count_diff}
+                for stat in stats[:limit]
+            ]
+        else:
+            top = [
+                {"location": str(stat.traceback), "size_kb": stat.size / 1024, "count": stat.count}
+                for stat in snapshot.statistics(key_type)[:limit]
+            ]
+        return {"traced_kb": current / 1024, "peak_kb": peak / 1024, "top": top}
+
+    def stop(self) -> None:
+        self._baseline = None
+        tracemalloc.stop()
+
+
+# Sampler id of the request being served, copied into threadpool calls
+_current_request: ContextVar[Optional[int]] = ContextVar("slow_request", default=None)
+
+
+class SlowRequestSampler:
+    """Captures stack samples while a request runs longer than the threshold.
+
+    Only the thread running the request's handler is sampled: the event
+    loop thread, which async handlers block while they compute, or the
+    threadpool thread of a sync handler or other call wrapped with
+    ``track_thread``.
+
+    The watchdog thread blocks while no request is in flight, so an idle
+    worker pays nothing. While requests are in flight it wakes every
+    sampling interval but only walks a stack once its request has crossed
+    the threshold.
+    """
+
+    def __init__(self, threshold: float, interval: float, max_captures: int):
+        self.threshold = threshold
+        self.interval = interval
+        self.captures: Deque[Dict[str, Any]] = deque(maxlen=max_captures)
+        self._in_flight: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._active.set()
+        if self._thread:
+            self._thread.join(5.0)
+        self._thread = None
+
+    def begin(self, method: str, path: str) -> int:
+        request_id = next(self._ids)
+        with self._lock:
+            self._in_flight[request_id] = {
+                "method": method, "path": path, "start": time.perf_counter(),
+                "thread": threading.get_ident(), "samples": None,
+            }
+        self._active.set()
+        return request_id
+
+    def track_thread(self, func: Callable) -> Callable:
+        """Wrap a blocking call so the current request is sampled on the thread running it"""
+        @functools.wraps(func)
+        def tracked(*args, **kwargs):
+            with self._lock:
+                request = self._in_flight.get(_current_request.get())
+                if request is not None:
+                    caller, request["thread"] = request["thread"], threading.get_ident()
+            if request is None:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    request["thread"] = caller
+        return tracked
+
+    def end(self, request_id: int) -> None:
+        with self._lock:
+            request = self._in_flight.pop(request_id)
+        # Out of _in_flight, the watchdog no longer updates its samples
+        duration = time.perf_counter() - request["start"]
+        if duration >= self.threshold and request["samples"]:
+            self.captures.append({
+                "method": request["method"],
+                "path": request["path"],
+                "duration_ms": round(duration * 1000, 2),
+                "captured_at": time.time(),
+                "folded": render_folded(request["samples"]),
+            })
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._active.wait()
+            if self._stop.wait(self.interval):
+                return
+            now = time.perf_counter()
+            with self._lock:
+                if not self._in_flight:
+                    self._active.clear()
+                    continue
+                if all(now - r["start"] < self.threshold for r in self._in_flight.values()):
+                    continue
+            frames = sys._current_frames()
+            thread_names = _thread_names()
+            with self._lock:
+                for request in self._in_flight.values():
+                    if now - request["start"] < self.threshold:
+                        continue
+                    ident = request["thread"]
+                    frame = frames.get(ident)
+                    stack = _folded_stack(frame) if frame is not None else None
+                    if stack:
+                        if request["samples"] is None:
+                            request["samples"] = Counter()
+                        request["samples"][f"{thread_names.get(ident, ident)};{stack}"] += 1
+
+
+cpu_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
+slow_request_sampler = SlowRequestSampler(
+    threshold=settings.SLOW_REQUEST_THRESHOLD_MS / 1000,
+    interval=settings.SLOW_REQUEST_SAMPLE_INTERVAL_MS / 1000,
+    max_captures=settings.SLOW_REQUEST_MAX_CAPTURES,
+)
+
+
+class SlowRequestMiddleware:
+    def __init__(self, app: ASGIApp, sampler: SlowRequestSampler = slow_request_sampler):
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = self.sampler.begin(scope["method"], scope["path"])
+        token = _current_request.set(request_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            self.sampler.end(request_id)
+
+
+class SampledRoute(APIRoute):
+    """Route whose sync endpoint is sampled on the threadpool thread running it"""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if call is not None and not asyncio.iscoroutinefunction(call):
+            self.dependant.call = slow_request_sampler.track_thread(call)
+        return super().get_route_handler()
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.session import UserSession
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PurgeHook = Callable[[Session, List[int]], None]
+
+_purge_hooks: List[PurgeHook] = []
+
+
+def register_purge_hook(hook: PurgeHook) -> PurgeHook:
+    """Register cleanup for data owned by users, run inside each purge batch"""
+    _purge_hooks.append(hook)
+    return hook
+
+
+@register_purge_hook
+def _purge_sessions(db: Session, user_ids: List[int]) -> None:
+    db.execute(delete(UserSession).where(UserSession.user_id.in_(user_ids)))
+
+
+def purge_deleted_users(
+    db: Session,
+    grace_period: Optional[timedelta] = None,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Hard-delete soft-deleted users past the grace period in bounded batches.
+
+    Each batch is its own short transaction followed by a pause, so the purge
+    never holds locks on the users table for long. Returns the number of
+    users removed.
+    """
+    if grace_period is None:
+        grace_period = timedelta(hours=settings.USER_PURGE_GRACE_PERIOD_HOURS)
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    pause = settings.USER_PURGE_BATCH_PAUSE_SECONDS if pause is None else pause
+    cutoff = datetime.now(timezone.utc) - grace_period
+
+    purged = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        # SKIP LOCKED lets several workers purge side by side on Postgres
+        user_ids = list(db.scalars(
+            select(User.id)
+            .where(User.deleted_at.isnot(None), User.deleted_at <= cutoff)
+            .order_by(User.deleted_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ))
+        if not user_ids:
+            break
+        for hook in _purge_hooks:
+            hook(db, user_ids)
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+        purged += len(user_ids)
+        batches += 1
+        if len(user_ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if purged:
+        logger.info(f"Purged {purged} deleted users")
+    return purged
+
+
+class UserPurgeWorker:
+    """Background thread that periodically purges soft-deleted users"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.USER_PURGE_INTERVAL_SECONDS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="user-purge", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                purge_deleted_users(db)
+            except Exception as e:
+                logger.error(f"Error purging deleted users: {e}")
+                db.rollback()
+            finally:
+                db.close()
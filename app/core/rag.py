@@ -1,45 +1,69 @@
 import os
+import threading
 import warnings
 import logging
-from typing import List
+from typing import TYPE_CHECKING, List
 from dotenv import load_dotenv
-from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from io import BytesIO
-import pdfplumber
+from app.core.config import settings
+from app.core.tracing import span
+
+# langchain, pdfplumber and sentence-transformers (and through them torch) are
+# imported on first use so that workers which never touch /rag skip their
+# import time and memory
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 load_dotenv()
 warnings.filterwarnings('ignore')
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHROMA_PERSIST_DIRECTORY = "./chroma_db"
+
+_embeddings = None
+_embedding_space = None
+_vector_store = None
+_lock = threading.Lock()
+# Set when the index was built in a different embedding space than the loaded model's
+reindex_required = False
+
 def process_pdf_from_bytes(pdf_bytes):
     """Process a PDF from bytes and split it into text chunks."""
+    import pdfplumber
+    from langchain_core.documents import Document
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     chunks = []
-    
+
     with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
         for i, page in enumerate(pdf.pages):
-            text = page.extract_text()
+            with span("pdf.extract_page", page=i + 1):
+                text = page.extract_text()
             if text:
                 chunks.append(Document(page_content=text, metadata={"page": i + 1}))
 
     # Split text into chunks
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
-        chunk_overlap=200
+        chunk_overlap=200,
+        add_start_index=True
     )
-    
-    return text_splitter.split_documents(chunks)
 
-def add_chunks_to_chroma(chunks: List[Document]):
+    with span("pdf.split", pages=len(chunks)):
+        return text_splitter.split_documents(chunks)
+
+def add_chunks_to_chroma(chunks: List["Document"]):
     """Load the existing vector store and add new documents."""
     vector_store = get_vector_store()
-    
-    if vector_store:
+
+    if vector_store and reindex_required:
+        logger.error(
+            "Not adding documents to an index from another embedding space; "
+            "run `python -m app.cli reindex-embeddings`"
+        )
+    elif vector_store:
         print("Adding new chunks to existing ChromaDB.")
         try:
             vector_store.add_documents(chunks)  # ✅ Efficiently add new docs
@@ -50,16 +74,117 @@ def add_chunks_to_chroma(chunks: List[Document]):
     else:
         logger.error("No vector database found. Upload and process a PDF first.")
 
+def load_embedding_model():
+    """Build the embedding model selected by EMBEDDING_BACKEND and its vector space."""
+    if settings.EMBEDDING_BACKEND == "onnx":
+        from app.core.embeddings import OnnxEmbeddings
+        model = OnnxEmbeddings(
+            settings.EMBEDDING_ONNX_PATH,
+            quantized=settings.EMBEDDING_ONNX_QUANTIZED,
+            threads=settings.EMBEDDING_ONNX_THREADS,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+        )
+        return model, model.space
+
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        encode_kwargs={"batch_size": settings.EMBEDDING_BATCH_SIZE},
+    )
+    return model, EMBEDDING_MODEL_NAME
+
+def get_embeddings():
+    """Load the embedding model once per process."""
+    global _embeddings, _embedding_space, reindex_required
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                from app.core.embeddings import read_index_space
+                from app.core.rag_instrumentation import TimedEmbeddings
+                model, space = load_embedding_model()
+                # Indexes without a recorded space were built with the PyTorch model
+                index_space = read_index_space(CHROMA_PERSIST_DIRECTORY, default=EMBEDDING_MODEL_NAME)
+                reindex_required = index_space is not None and index_space != space
+                if reindex_required:
+                    logger.error(
+                        f"The vector store was built with {index_space} but the embedding model is {space}; "
+                        "run `python -m app.cli reindex-embeddings`"
+                    )
+                _embedding_space = space
+                _embeddings = TimedEmbeddings(model)
+    return _embeddings
+
 def get_vector_store():
     """Load the existing ChromaDB vector store."""
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    
+    global _vector_store
+    if _vector_store is not None:
+        return _vector_store
+
+    embeddings = get_embeddings()
+
     try:
-        vector_store = Chroma(
-            persist_directory="./chroma_db",
-            embedding_function=embeddings
-        )
-        return vector_store
+        from langchain_community.vectorstores import Chroma
+        from app.core.embeddings import write_index_space
+        with _lock:
+            if _vector_store is None:
+                _vector_store = Chroma(
+                    persist_directory=CHROMA_PERSIST_DIRECTORY,
+                    embedding_function=embeddings
+                )
+                if not reindex_required:
+                    write_index_space(CHROMA_PERSIST_DIRECTORY, _embedding_space)
+        return _vector_store
     except Exception as e:
         logger.error(f"Error loading ChromaDB: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def reindex_vector_store(batch_size: int = 256) -> int:
+    """Re-embed every stored chunk with the current model; returns the number of chunks"""
+    global reindex_required
+    from langchain_core.documents import Document
+    from app.core.embeddings import write_index_space
+
+    vector_store = get_vector_store()
+    if vector_store is None:
+        raise RuntimeError("Could not load the vector store")
+    reindexed = 0
+    while True:
+        batch = vector_store.get(limit=batch_size, offset=reindexed, include=["documents", "metadatas"])
+        if not batch["ids"]:
+            break
+        documents = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(batch["documents"], batch["metadatas"])
+        ]
+        vector_store.update_documents(batch["ids"], documents)
+        reindexed += len(batch["ids"])
+    write_index_space(CHROMA_PERSIST_DIRECTORY, _embedding_space)
+    reindex_required = False
+    return reindexed
+
+def retrieve(vector_store, question: str, k: int):
+    """The k nearest chunks with their cosine similarity to the question."""
+    # Chroma's default l2 space returns squared distances, 2 - 2cos between unit vectors
+    return [(doc, 1 - distance / 2) for doc, distance in vector_store.similarity_search_with_score(question, k=k)]
+
+# The prompt RetrievalQA's "stuff" chain used for chat models
+QA_SYSTEM_PROMPT = """Use the following pieces of context to answer the user's question.
+If you don't know the answer, just say that you don't know, don't try to make up an answer.
+----------------
+{context}"""
+
+FAKE_LLM_ANSWER = "This is a canned answer from the fake LLM."
+
+def get_llm(api_key: str):
+    """Build the chat model used to answer questions."""
+    if settings.RAG_LLM_PROVIDER == "fake":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=[FAKE_LLM_ANSWER])
+
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model="llama3-70b-8192",
+        temperature=0.1,
+        groq_api_key=api_key
+    )
@@ -0,0 +1,46 @@
+"""Timing hooks for the RAG stack; imported lazily together with langchain."""
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+from app.core.metrics import EMBEDDING_LATENCY, LLM_LATENCY
+from app.core.tracing import span
+
+
+class TimedEmbeddings(Embeddings):
+    """Delegates to another embedding model and records encode time"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with span("embedding.batch", texts=len(texts)), EMBEDDING_LATENCY.labels("documents").time():
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with span("embedding.query"), EMBEDDING_LATENCY.labels("query").time():
+            return self.embeddings.embed_query(text)
+
+
+class LLMTimingCallback(BaseCallbackHandler):
+    """Records the duration of each LLM call made while running a chain"""
+
+    def __init__(self):
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_LATENCY.observe(time.perf_counter() - start)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs) -> None:
+        self._starts.pop(run_id, None)
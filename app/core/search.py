@@ -0,0 +1,169 @@
+"""User search by email and full name.
+
+Results are ranked by how they match ``q`` (case-insensitively): email
+prefix first, then full name prefix, then a substring of either, which needs
+at least SUBSTRING_MIN_LENGTH characters. Within a rank, prefix matches come
+in alphabetical order and substring matches shortest email first.
+
+On Postgres every rank is one indexed query: ``lower(...) COLLATE "C"``
+btrees return prefix matches in order and stop at the limit, pg_trgm GIN
+indexes find substring matches. Substring matches are deliberately not
+ordered by id; Postgres would walk the primary key hoping to meet matches
+early, which reads the whole table when there are none. Other databases
+(SQLite) search an in-process index of the live users instead, rebuilt
+whenever the users table version changes.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.http_cache import table_version
+from app.core.serialization import USER_RESPONSE_FIELDS, select_user_dicts_by_id
+from app.models.user import User
+
+# Shortest query a trigram index can answer; shorter ones only match prefixes
+SUBSTRING_MIN_LENGTH = 3
+
+
+def normalize_query(q: str) -> str:
+    return q.strip().lower()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_postgres(db: Session, q: str, limit: int) -> List[int]:
+    email_sorted = func.lower(User.email).collate("C")
+    name_sorted = func.lower(User.full_name).collate("C")
+    prefix = _escape_like(q) + "%"
+    stages = [
+        (email_sorted.like(prefix, escape="\\"), (email_sorted,)),
+        (name_sorted.like(prefix, escape="\\"), (name_sorted,)),
+    ]
+    if len(q) >= SUBSTRING_MIN_LENGTH:
+        substring = "%" + _escape_like(q) + "%"
+        stages.append((
+            or_(
+                func.lower(User.email).like(substring, escape="\\"),
+                func.lower(User.full_name).like(substring, escape="\\"),
+            ),
+            (func.length(User.email), User.id),
+        ))
+
+    ids: List[int] = []
+    for condition, order in stages:
+        if len(ids) >= limit:
+            break
+        stmt = select(User.id).where(User.deleted_at.is_(None), condition)
+        if ids:
+            stmt = stmt.where(User.id.notin_(ids))
+        ids.extend(db.scalars(stmt.order_by(*order).limit(limit - len(ids))))
+    return ids
+
+
+class _Snapshot(NamedTuple):
+    emails: List[Tuple[str, int]]  # (lower(email), id), sorted
+    names: List[Tuple[str, int]]  # (lower(full_name), id), sorted
+    text: str  # one "email\tname\n" line per user, in id order
+    offsets: List[int]  # start of each line in text
+    ids: List[int]  # id of each line
+    email_lengths: List[int]  # length of each line's email
+
+
+class UserSearchIndex:
+    """In-process search index over live users for databases without pg_trgm"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._snapshot: Optional[_Snapshot] = None
+
+    def _load(self, db: Session) -> _Snapshot:
+        rows = db.execute(
+            select(User.id, User.email, User.full_name)
+            .where(User.deleted_at.is_(None))
+            .order_by(User.id)
+        ).all()
+        emails, names, lines, offsets, ids, email_lengths = [], [], [], [], [], []
+        position = 0
+        for user_id, email, full_name in rows:
+            email, full_name = email.lower(), (full_name or "").lower()
+            emails.append((email, user_id))
+            if full_name:
+                names.append((full_name, user_id))
+            line = f"{email}\t{full_name}\n"
+            lines.append(line)
+            offsets.append(position)
+            ids.append(user_id)
+            email_lengths.append(len(email))
+            position += len(line)
+        emails.sort()
+        names.sort()
+        return _Snapshot(emails, names, "".join(lines), offsets, ids, email_lengths)
+
+    def snapshot(self, db: Session) -> _Snapshot:
+        """The index for the current users table version, rebuilt if it changed"""
+        version = table_version(db, "users")
+        with self._lock:
+            if self._snapshot is None or version is None or version != self._version:
+                self._snapshot = self._load(db)
+                self._version = version
+            return self._snapshot
+
+    def search(self, db: Session, q: str, limit: int) -> List[int]:
+        snapshot = self.snapshot(db)
+        ids: List[int] = []
+        seen: Set[int] = set()
+
+        def add(user_id: int) -> bool:
+            if user_id not in seen:
+                seen.add(user_id)
+                ids.append(user_id)
+            return len(ids) >= limit
+
+        for entries in (snapshot.emails, snapshot.names):
+            for index in range(bisect_left(entries, (q,)), len(entries)):
+                value, user_id = entries[index]
+                if not value.startswith(q) or add(user_id):
+                    break
+            if len(ids) >= limit:
+                return ids
+
+        if len(q) >= SUBSTRING_MIN_LENGTH and "\t" not in q and "\n" not in q:
+            matches = []
+            position = snapshot.text.find(q)
+            while position != -1:
+                line = bisect_right(snapshot.offsets, position) - 1
+                matches.append((snapshot.email_lengths[line], snapshot.ids[line]))
+                if line + 1 == len(snapshot.offsets):
+                    break
+                position = snapshot.text.find(q, snapshot.offsets[line + 1])
+            for _, user_id in sorted(matches):
+                if add(user_id):
+                    break
+        return ids
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+
+user_search_index = UserSearchIndex()
+
+
+def search_users(db: Session, q: str, limit: int,
+                 fields: Tuple[str, ...] = USER_RESPONSE_FIELDS) -> List[Dict[str, Any]]:
+    """Ranked users matching ``q`` by email or full name"""
+    q = normalize_query(q)
+    if not q:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        ids = _search_postgres(db, q, limit)
+    else:
+        ids = user_search_index.search(db, q, limit)
+    return select_user_dicts_by_id(db, ids, User.deleted_at.is_(None), fields=fields)
@@ -1,17 +1,24 @@
+import hashlib
+import hmac
+import secrets
 from datetime import datetime, timedelta
 from typing import Any, Union, Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import BCRYPT_LATENCY
+from app.core.tracing import span, traced
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt.verify"), BCRYPT_LATENCY.labels("verify").time():
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with span("bcrypt.hash"), BCRYPT_LATENCY.labels("hash").time():
+        return pwd_context.hash(password)
 
 def create_access_token(
     subject: Union[str, Any],
@@ -27,7 +34,7 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, key=settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_access_token(token: str) -> str:
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -36,3 +43,24 @@ def decode_access_token(token: str) -> str:
         return email
     except JWTError:
         raise ValueError("Invalid token")
+
+@traced("decode_access_token")
+def decode_access_token(token: str) -> str:
+    return _token_subject(token)
+
+def is_valid_access_token(token: str) -> bool:
+    """Signature and expiry check without a span, for admission control"""
+    try:
+        _token_subject(token)
+    except ValueError:
+        return False
+    return True
+
+def create_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """Keyed digest of a refresh token; only this digest is stored in the database"""
+    return hmac.new(
+        settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256
+    ).hexdigest()
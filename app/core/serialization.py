@@ -0,0 +1,80 @@
+"""Fast path for user payloads.
+
+Rows read from the database were validated when they were written, so
+endpoints returning users load only the ``UserResponse`` columns and hand
+plain dicts to orjson instead of validating ORM objects through the
+response model and encoding them with the stdlib encoder. ``role`` and
+``is_active`` are nullable in the schema, with defaults applied by the
+ORM only, so they are coalesced to those defaults here.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+USER_RESPONSE_FIELDS = tuple(UserResponse.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Validate a comma-separated ``?fields=`` selection, defaulting to every field"""
+    if not fields:
+        return USER_RESPONSE_FIELDS
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in USER_RESPONSE_FIELDS]
+    if unknown or not selected:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(USER_RESPONSE_FIELDS)}"
+        )
+    return selected
+
+
+# Defaults of nullable columns the response model declares non-null
+_NULL_DEFAULTS = {"role": "user", "is_active": True}
+
+
+def _columns(fields: Tuple[str, ...]):
+    return [
+        func.coalesce(getattr(User, field), _NULL_DEFAULTS[field]).label(field)
+        if field in _NULL_DEFAULTS else getattr(User, field)
+        for field in fields
+    ]
+
+
+def user_to_dict(user: User, fields: Tuple[str, ...] = USER_RESPONSE_FIELDS) -> Dict[str, Any]:
+    values = {field: getattr(user, field) for field in fields}
+    for field, default in _NULL_DEFAULTS.items():
+        if values.get(field, default) is None:
+            values[field] = default
+    return values
+
+
+def select_user_dicts(db: Session, *criteria, fields: Tuple[str, ...] = USER_RESPONSE_FIELDS,
+                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Load only the requested response columns of matching users"""
+    result = db.execute(select(*_columns(fields)).where(*criteria).order_by(User.id).limit(limit))
+    return [dict(zip(fields, row)) for row in result]
+
+
+def select_user_dicts_by_id(db: Session, ids: List[int], *criteria,
+                            fields: Tuple[str, ...] = USER_RESPONSE_FIELDS) -> List[Dict[str, Any]]:
+    """Like select_user_dicts, keeping the order of ``ids``"""
+    result = db.execute(select(User.id, *_columns(fields)).where(User.id.in_(ids), *criteria))
+    found = {user_id: dict(zip(fields, values)) for user_id, *values in result}
+    return [found[user_id] for user_id in ids if user_id in found]
+
+
+def select_user_dict_with_version(
+    db: Session, *criteria, fields: Tuple[str, ...] = USER_RESPONSE_FIELDS
+) -> Optional[Tuple[Dict[str, Any], datetime]]:
+    """Like select_user_dicts for a single user, also returning its last change time"""
+    row = db.execute(
+        select(*_columns(fields), User.created_at, User.updated_at).where(*criteria)
+    ).first()
+    if row is None:
+        return None
+    *values, created_at, updated_at = row
+    return dict(zip(fields, values)), updated_at or created_at
@@ -0,0 +1,67 @@
+"""Process sizing helpers for the production server.
+
+Kept free of gunicorn and application imports so the gunicorn config can use
+them before the app (and prometheus_client) is loaded.
+"""
+import math
+import os
+from typing import Optional
+
+
+def cpu_quota() -> float:
+    """CPUs available to this process, honouring cgroup v2/v1 quotas and affinity"""
+    available = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    return min(available, quota) if quota else float(available)
+
+
+def worker_count(configured: Optional[int], per_cpu: float, maximum: int) -> int:
+    """Explicit worker count, or one per CPU of quota (rounded up) times ``per_cpu``"""
+    if configured:
+        return configured
+    return max(1, min(maximum, math.ceil(math.ceil(cpu_quota()) * per_cpu)))
+
+
+def private_memory_mb() -> float:
+    """Memory owned by this process alone.
+
+    Unlike RSS this excludes pages still shared copy-on-write with a
+    preloading parent, so it measures what a worker has grown by itself.
+    Falls back to RSS where /proc/self/smaps_rollup is unavailable.
+    """
+    try:
+        private_kb = 0
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private_kb += int(line.split()[1])
+        return private_kb / 1024
+    except (OSError, ValueError):
+        return rss_mb()
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
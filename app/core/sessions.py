@@ -0,0 +1,180 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.security import create_refresh_token, hash_refresh_token
+from app.models.session import UserSession
+from app.models.user import User
+
+
+class RevocationCache:
+    """Bounded in-memory map of revoked refresh token hashes.
+
+    Lets a worker reject replayed or logged-out refresh tokens without a
+    database round trip. Tokens revoked by rotation remember their owner so a
+    replay can still revoke the rest of that user's sessions. The sessions
+    table stays the source of truth, so a miss here always falls through to
+    the database check.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._hashes: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, token_hash: str, rotated_from_user: Optional[int] = None) -> None:
+        with self._lock:
+            self._hashes[token_hash] = rotated_from_user
+            self._hashes.move_to_end(token_hash)
+            while len(self._hashes) > self.maxsize:
+                self._hashes.popitem(last=False)
+
+    def lookup(self, token_hash: str) -> Tuple[bool, Optional[int]]:
+        """Return (revoked, owner id if the token was revoked by rotation)"""
+        with self._lock:
+            if token_hash not in self._hashes:
+                return False, None
+            return True, self._hashes[token_hash]
+
+    def __contains__(self, token_hash: str) -> bool:
+        with self._lock:
+            return token_hash in self._hashes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hashes.clear()
+
+
+revocation_cache = RevocationCache(settings.REVOCATION_CACHE_SIZE)
+
+
+def _on_revoked(key: Optional[str]) -> None:
+    # Entries never go stale, so a reconnect (None) needs no reset
+    if key is None:
+        return
+    token_hash, _, rotated_from_user = key.partition(":")
+    revocation_cache.add(token_hash, int(rotated_from_user) if rotated_from_user else None)
+
+
+invalidation_bus.subscribe("refresh_tokens", _on_revoked)
+
+
+def _broadcast_revoked(*token_hashes: str, rotated_from_user: Optional[int] = None) -> None:
+    """Add revoked tokens to the cache of this worker and every other"""
+    owner = "" if rotated_from_user is None else str(rotated_from_user)
+    invalidation_bus.publish("refresh_tokens", *(f"{token_hash}:{owner}" for token_hash in token_hashes))
+
+
+class InvalidRefreshToken(ValueError):
+    pass
+
+
+class InactiveUser(ValueError):
+    pass
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_session(db: Session, user: User) -> str:
+    """Open a new session for the user and return its refresh token"""
+    refresh_token = create_refresh_token()
+    session = UserSession(
+        user_id=user.id,
+        refresh_token_hash=hash_refresh_token(refresh_token),
+        expires_at=_now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(session)
+    db.commit()
+    return refresh_token
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> None:
+    """Revoke every active session of a user"""
+    sessions = db.query(UserSession).filter(
+        UserSession.user_id == user_id,
+        UserSession.revoked_at.is_(None),
+    ).all()
+    now = _now()
+    for session in sessions:
+        session.revoked_at = now
+    db.commit()
+    if sessions:
+        _broadcast_revoked(*(session.refresh_token_hash for session in sessions))
+
+
+def rotate_session(db: Session, refresh_token: str) -> Tuple[User, str]:
+    """Exchange a refresh token for a new one, revoking the old token.
+
+    Presenting a token that was already rotated means it leaked, so every
+    session of that user is revoked.
+    """
+    token_hash = hash_refresh_token(refresh_token)
+    revoked, rotated_from_user = revocation_cache.lookup(token_hash)
+    if revoked:
+        if rotated_from_user is not None:
+            revoke_user_sessions(db, rotated_from_user)
+            _broadcast_revoked(token_hash)
+        raise InvalidRefreshToken("Refresh token revoked")
+
+    session = db.query(UserSession).filter(
+        UserSession.refresh_token_hash == token_hash
+    ).first()
+    if not session:
+        raise InvalidRefreshToken("Unknown refresh token")
+    if session.revoked_at is not None:
+        revocation_cache.add(token_hash)
+        if session.replaced_by_id is not None:
+            revoke_user_sessions(db, session.user_id)
+        raise InvalidRefreshToken("Refresh token revoked")
+
+    user = db.query(User).filter(
+        User.id == session.user_id, User.deleted_at.is_(None)
+    ).first()
+    if not user or not user.is_active:
+        # Leave the token unclaimed; nothing has been written yet
+        db.rollback()
+        raise InactiveUser("Inactive user")
+
+    now = _now()
+    # Conditional update so two concurrent refreshes cannot both rotate the same token
+    claimed = db.query(UserSession).filter(
+        UserSession.id == session.id,
+        UserSession.revoked_at.is_(None),
+        UserSession.expires_at > now,
+    ).update({UserSession.revoked_at: now}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        raise InvalidRefreshToken("Refresh token expired or revoked")
+
+    new_token = create_refresh_token()
+    new_session = UserSession(
+        user_id=session.user_id,
+        refresh_token_hash=hash_refresh_token(new_token),
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(new_session)
+    db.flush()
+    db.query(UserSession).filter(UserSession.id == session.id).update(
+        {UserSession.replaced_by_id: new_session.id}, synchronize_session=False
+    )
+    db.commit()
+    _broadcast_revoked(token_hash, rotated_from_user=session.user_id)
+    return user, new_token
+
+
+def revoke_session(db: Session, refresh_token: str) -> None:
+    """Revoke the session behind a refresh token (logout)"""
+    token_hash = hash_refresh_token(refresh_token)
+    db.query(UserSession).filter(
+        UserSession.refresh_token_hash == token_hash,
+        UserSession.revoked_at.is_(None),
+    ).update({UserSession.revoked_at: _now()}, synchronize_session=False)
+    db.commit()
+    _broadcast_revoked(token_hash)
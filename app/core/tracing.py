@@ -0,0 +1,369 @@
+"""Lightweight request tracing.
+
+Spans are recorded only for sampled requests, batched in memory and written
+by a background thread either as JSON lines to a local file or as OTLP/JSON
+to a collector (e.g. an OpenTelemetry collector on localhost:4318). Every
+request gets a trace id, sampled or not, which is returned in the
+``X-Trace-Id`` and ``traceparent`` response headers and is added to every
+log line (see app/core/logging_config.py).
+"""
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonFileExporter:
+    """Appends one JSON object per span to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [self._span(span) for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them from a background thread.
+
+    Spans are dropped rather than blocking requests when the queue is full.
+    """
+
+    def __init__(self, exporter, max_queue_size: int = 10000, batch_size: int = 512,
+                 interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(max_queue_size)
+        self._export_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> None:
+        while True:
+            batch: List[Span] = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                with self._export_lock:
+                    self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._drain()
+        self._drain()
+
+    def flush(self) -> None:
+        self._drain()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(5.0)
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.processor: Optional[BatchSpanProcessor] = None
+
+    def configure(self, enabled: bool, sample_rate: float = 1.0, exporter=None) -> None:
+        if self.processor:
+            self.processor.shutdown()
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.processor = BatchSpanProcessor(exporter) if enabled and exporter else None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None) -> Span:
+        """Start a root span, continuing the caller's trace when a W3C traceparent is given"""
+        trace_id, parent_id, sampled = None, None, None
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_id = parts[1], parts[2]
+                sampled = parts[3] == "01"
+        if sampled is None:
+            sampled = random.random() < self.sample_rate
+        return Span(name, trace_id or os.urandom(16).hex(), parent_id, sampled)
+
+    def finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.sampled and self.processor:
+            self.processor.on_end(span)
+
+    def flush(self) -> None:
+        if self.processor:
+            self.processor.flush()
+
+
+tracer = Tracer()
+
+
+def init_tracing() -> None:
+    """Configure the tracer from settings"""
+    exporter = None
+    if settings.TRACE_EXPORTER == "json":
+        exporter = JsonFileExporter(settings.TRACE_FILE_PATH)
+    elif settings.TRACE_EXPORTER == "otlp":
+        exporter = OTLPHttpExporter(settings.TRACE_OTLP_ENDPOINT, settings.PROJECT_NAME)
+    tracer.configure(settings.TRACING_ENABLED, settings.TRACE_SAMPLE_RATE, exporter)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span; free when the request is not sampled"""
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, True, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.finish(child)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span() for sync functions"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_engine_tracing(engine: Engine) -> None:
+    """Record a span for every SQL statement executed during a sampled request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is not None and parent.sampled:
+            child = Span("sql", parent.trace_id, parent.span_id, True,
+                         {"db.statement": statement[:500], "db.executemany": executemany})
+            conn.info.setdefault("trace_spans", []).append(child)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            tracer.finish(spans.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            child = spans.pop()
+            child.error = repr(exception_context.original_exception)
+            tracer.finish(child)
+
+
+_record_factory = logging.getLogRecordFactory()
+
+
+def _trace_record_factory(*args, **kwargs) -> logging.LogRecord:
+    record = _record_factory(*args, **kwargs)
+    span = _current_span.get()
+    record.trace_id = span.trace_id if span else "-"
+    record.span_id = span.span_id if span else "-"
+    return record
+
+
+logging.setLogRecordFactory(_trace_record_factory)
+
+
+class TraceContextFilter(logging.Filter):
+    """Fills in trace_id and span_id on records created before the factory was installed"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "trace_id"):
+            span = _current_span.get()
+            record.trace_id = span.trace_id if span else "-"
+            record.span_id = span.span_id if span else "-"
+        return True
+
+
+class TracingMiddleware:
+    """Opens a root span per request and returns the trace id in the response headers"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = tracer.start_trace(f"{scope['method']} {scope['path']}", traceparent)
+        root.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+        token = _current_span.set(root)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Trace-Id"] = root.trace_id
+                headers["traceparent"] = (
+                    f"00-{root.trace_id}-{root.span_id}-{'01' if root.sampled else '00'}"
+                )
+                root.attributes["http.status_code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = repr(e)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            _current_span.reset(token)
+            tracer.finish(root)
@@ -0,0 +1,50 @@
+"""Gunicorn worker for production mode (see app/gunicorn_conf.py)"""
+import logging
+import os
+import signal
+from importlib.util import find_spec
+
+try:
+    from uvicorn_worker import UvicornWorker
+except ImportError:  # pragma: no cover - older installs
+    from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+from app.core.server import private_memory_mb
+
+logger = logging.getLogger(__name__)
+
+
+class RecyclingUvicornWorker(UvicornWorker):
+    """Uvicorn worker on uvloop/httptools that restarts itself when its memory grows too large.
+
+    Request-count recycling is gunicorn's ``max_requests``. The memory check
+    runs on the worker heartbeat; going over the limit triggers the same
+    graceful shutdown as SIGTERM and the arbiter starts a replacement.
+    """
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools" if find_spec("httptools") else "h11",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_memory_mb = settings.SERVER_MAX_WORKER_MEMORY_MB
+        if self.max_memory_mb:
+            self.config.timeout_notify = min(
+                self.config.timeout_notify, settings.SERVER_MEMORY_CHECK_INTERVAL_SECONDS
+            )
+
+    async def callback_notify(self) -> None:
+        await super().callback_notify()
+        if not self.max_memory_mb or not self.alive:
+            return
+        memory = private_memory_mb()
+        if memory > self.max_memory_mb:
+            logger.warning(
+                f"Worker {os.getpid()} private memory {memory:.0f} MB is over "
+                f"{self.max_memory_mb} MB; recycling"
+            )
+            self.alive = False
+            os.kill(os.getpid(), signal.SIGTERM)
@@ -1,8 +1,13 @@
 from typing import Any
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import DeclarativeBase, registry, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import DeclarativeBase, Session, registry, sessionmaker
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.tracing import instrument_engine_tracing
 
 class Base(DeclarativeBase):
     """Base class for all database models"""
@@ -12,7 +17,16 @@ class Base(DeclarativeBase):
         return cls.__name__.lower()
 
 # Database configuration
-engine = create_engine(str(settings.DATABASE_URL))
+# Creating the engine does not connect; connections are opened by warm_up_pool()
+# during application start-up or lazily on first use
+engine = create_engine(
+    str(settings.DATABASE_URL),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+instrument_engine(engine)
+instrument_engine_tracing(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -22,5 +36,40 @@ def get_db():
     finally:
         db.close()
 
+def warm_up_pool(engine: Engine, connections: int) -> None:
+    """Open connections up front so the first requests don't pay for connecting"""
+    pool_size = getattr(engine.pool, "size", None)
+    if pool_size is not None:
+        connections = min(connections, pool_size())
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+def dialect_insert(db: Session):
+    """Return the insert() construct of the session's dialect, which supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+
+def is_unique_violation(exc: IntegrityError) -> bool:
+    """Tell unique constraint violations apart from other integrity errors"""
+    pgcode = getattr(exc.orig, "pgcode", None)
+    if pgcode is not None:
+        return pgcode == "23505"
+    return "UNIQUE constraint failed" in str(exc.orig)
+
 # Import all models here for Alembic
 from app.models.user import User
+from app.models.session import UserSession
+from app.models.table_version import TableVersion
+from app.models.audit import AuditEvent
+from app.models.user_change import UserChange
@@ -0,0 +1,68 @@
+"""Gunicorn configuration for production mode.
+
+    gunicorn -c python:app.gunicorn_conf app.main:app
+
+Every value comes from Settings (environment or .env).
+"""
+import gc
+import os
+import tempfile
+
+from app.core.config import settings
+from app.core.logging_config import logging_config
+from app.core.server import worker_count
+
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = worker_count(settings.SERVER_WORKERS, settings.SERVER_WORKERS_PER_CPU,
+                       settings.SERVER_MAX_WORKERS)
+worker_class = "app.core.workers.RecyclingUvicornWorker"
+backlog = settings.SERVER_BACKLOG
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+preload_app = settings.SERVER_PRELOAD_APP
+accesslog = "-" if settings.SERVER_ACCESS_LOG else None
+errorlog = "-"
+# The application's format, with trace ids, for gunicorn's and uvicorn's
+# loggers too. A logconfig_dict turns gunicorn's access log on, so
+# SERVER_ACCESS_LOG=false raises its level instead
+logconfig_dict = logging_config()
+logconfig_dict["loggers"] = {
+    "gunicorn.error": {"level": settings.LOG_LEVEL, "handlers": ["console"], "propagate": False},
+    "gunicorn.access": {
+        "level": "INFO" if settings.SERVER_ACCESS_LOG else "WARNING",
+        "handlers": ["console"],
+        "propagate": False,
+    },
+}
+
+# Workers must share one metrics directory, and prometheus_client reads it at
+# import, so it is set here before the app is loaded
+if workers > 1 and settings.METRICS_ENABLED and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def when_ready(server):
+    if preload_app:
+        if settings.RAG_ENABLED and settings.RAG_PRELOAD_MODELS:
+            # Load weights once in the master; workers share the pages copy-on-write.
+            # The vector store (SQLite-backed) is still opened per worker
+            from app.core.rag import get_embeddings
+            get_embeddings()
+        # Keep the cyclic GC from touching (and so copying) pre-fork objects
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections must never cross a fork; drop any the master might hold
+    # without closing them from under the parent
+    from app.db.base import engine
+    engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
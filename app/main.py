@@ -1,18 +1,77 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.api import health, metrics
 from app.api.v1.router import api_router
+from app.core.admission import AdmissionMiddleware
+from app.core.audit import audit_log, init_audit
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.db.base import Base, engine
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.core.invalidation import init_invalidation, invalidation_bus
+from app.core.logging_config import configure_logging
+from app.core.metrics import MetricsMiddleware
+from app.core.outbox import OutboxRelayWorker, make_outbox_sink
+from app.core.profiling import SlowRequestMiddleware, slow_request_sampler
+from app.core.tracing import TracingMiddleware, init_tracing, tracer
+from app.core.purge import UserPurgeWorker
+from app.db.base import engine, warm_up_pool
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# The schema is managed by Alembic (`alembic upgrade head`) or, for local
+# development, `python -m app.cli init-db`; nothing touches the database at import
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    init_tracing()
+    init_audit()
+    init_invalidation(engine)
+    try:
+        await run_in_threadpool(warm_up_pool, engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+    except Exception as e:
+        logger.error(f"Database pool warm-up failed: {e}")
+    if settings.RAG_ENABLED and settings.RAG_PRELOAD_MODELS:
+        from app.core.rag import get_embeddings
+        await run_in_threadpool(get_embeddings)
+
+    if settings.SLOW_REQUEST_SAMPLING_ENABLED:
+        slow_request_sampler.start()
+    purge_worker = UserPurgeWorker() if settings.USER_PURGE_ENABLED else None
+    if purge_worker:
+        purge_worker.start()
+    outbox_relay = OutboxRelayWorker(make_outbox_sink()) if settings.OUTBOX_RELAY_ENABLED else None
+    if outbox_relay:
+        outbox_relay.start()
+    app.state.outbox_relay = outbox_relay
+    app.state.ready = True
+
+    yield
+
+    app.state.ready = False
+    if purge_worker:
+        purge_worker.stop()
+    if outbox_relay:
+        outbox_relay.stop()
+    slow_request_sampler.stop()
+    # Drains the queue, before the engine it writes through is disposed
+    audit_log.shutdown()
+    invalidation_bus.shutdown()
+    tracer.configure(enabled=False)
+    engine.dispose()
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
@@ -20,6 +79,7 @@ app = FastAPI(
     redoc_url="/redoc",
     description="FastAPI User Management Service with JWT Authentication and RBAC"
 )
+app.state.ready = False
 
 # Set all CORS enabled origins
 app.add_middleware(
@@ -30,6 +90,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        encodings=tuple(e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",")),
+        levels={
+            "gzip": settings.COMPRESSION_GZIP_LEVEL,
+            "br": settings.COMPRESSION_BROTLI_QUALITY,
+            "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+        },
+    )
+# Inside the metrics middleware so shed requests are still counted
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        classes=settings.ADMISSION_CLASSES,
+        backoff_ratio=settings.ADMISSION_BACKOFF_RATIO,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.SLOW_REQUEST_SAMPLING_ENABLED:
+    app.add_middleware(SlowRequestMiddleware)
+# Added last so it is outermost and every other layer runs inside the request span
+app.add_middleware(TracingMiddleware)
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -72,10 +158,10 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 def root():
     return {"message": "Welcome to FastAPI User Management Service"}
 
-# Health check endpoint
-@app.get("/health")
-def health_check():
-    return {"status": "ok", "version": settings.VERSION}
+# Health check endpoints
+app.include_router(health.router, tags=["health"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 # Exception handlers
 @app.exception_handler(StarletteHTTPException)
@@ -0,0 +1,24 @@
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String
+from app.db.base import Base
+
+class AuditEvent(Base):
+    """Append-only record of authentication events and user changes"""
+    __tablename__ = "audit_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # Generated when the event is recorded, so a batch delivered twice is only stored once
+    event_id = Column(String(32), nullable=False, unique=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    action = Column(String, nullable=False)
+    # No foreign keys: the trail outlives purged users
+    actor_id = Column(Integer)
+    target_id = Column(Integer)
+    trace_id = Column(String(32))
+    details = Column(JSON)
+
+    # Newest-first keyset pagination, optionally filtered by one of these
+    __table_args__ = (
+        Index("ix_audit_events_actor_id", "actor_id", "id"),
+        Index("ix_audit_events_target_id", "target_id", "id"),
+        Index("ix_audit_events_action", "action", "id"),
+    )
@@ -0,0 +1,46 @@
+from sqlalchemy import BigInteger, Column, DDL, String, event
+from app.db.base import Base
+
+class TableVersion(Base):
+    """Per-table change counter bumped by database triggers on every write"""
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+VERSIONED_TABLES = ("users",)
+
+# Statement-level on Postgres, so a bulk insert bumps the counter once
+POSTGRES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+def _create_triggers(target, connection, **kw):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(DDL(POSTGRES_TRIGGER_FUNCTION))
+    for table in VERSIONED_TABLES:
+        connection.execute(DDL(
+            f"INSERT INTO table_versions (name, version) VALUES ('{table}', 0) "
+            "ON CONFLICT (name) DO NOTHING"
+        ))
+        if dialect == "postgresql":
+            connection.execute(DDL(
+                f"CREATE OR REPLACE TRIGGER {table}_bump_version "
+                f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+            ))
+        elif dialect == "sqlite":
+            for operation in ("INSERT", "UPDATE", "DELETE"):
+                connection.execute(DDL(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_bump_version_{operation.lower()} "
+                    f"AFTER {operation} ON {table} BEGIN "
+                    f"UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END"
+                ))
+
+event.listen(Base.metadata, "after_create", _create_triggers)
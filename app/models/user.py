@@ -1,15 +1,83 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Boolean, Column, DDL, Integer, String, DateTime, Index, event, false
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
     role = Column(String, default="user")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set client-side so it has microsecond precision on every backend; it is
+    # part of the user's ETag
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Queries must repeat an index's WHERE clause (deleted_at IS NULL,
+    # is_active = false) for the planner to use it; tests/test_query_plans.py
+    # fails on any endpoint query that falls back to a table scan
+    __table_args__ = (
+        # Emails are unique among live accounts only, so a soft-deleted
+        # address can register again before the row is purged. Lookups go
+        # through lower(email), which also makes the uniqueness case-insensitive
+        Index(
+            "ix_users_email_lower_active", func.lower(email), unique=True,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        # Admin listing filtered by role, paged by id
+        Index(
+            "ix_users_role_active", "role", "id",
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        Index(
+            "ix_users_created_at_active", "created_at",
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        # Deactivated accounts are few, so is_active alone is never selective;
+        # only the inactive side is indexed
+        Index(
+            "ix_users_inactive", "id",
+            postgresql_where=(is_active == false()) & deleted_at.is_(None),
+            sqlite_where=(is_active == false()) & deleted_at.is_(None),
+        ),
+        # Small index over the purge backlog
+        Index(
+            "ix_users_deleted_at", "deleted_at",
+            postgresql_where=deleted_at.isnot(None),
+            sqlite_where=deleted_at.isnot(None),
+        ),
+        # User search (app/core/search.py); Postgres only, other databases
+        # search an in-process index. "C" collation btrees answer prefix
+        # LIKEs in order, trigram GIN indexes answer substring LIKEs
+        Index(
+            "ix_users_email_search_prefix", func.lower(email).collate("C"),
+            postgresql_where=deleted_at.is_(None),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_full_name_search_prefix", func.lower(full_name).collate("C"),
+            postgresql_where=deleted_at.is_(None),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_email_search_trgm", func.lower(email).label("email_lower"),
+            postgresql_using="gin", postgresql_ops={"email_lower": "gin_trgm_ops"},
+            postgresql_where=deleted_at.is_(None),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_full_name_search_trgm", func.lower(full_name).label("full_name_lower"),
+            postgresql_using="gin", postgresql_ops={"full_name_lower": "gin_trgm_ops"},
+            postgresql_where=deleted_at.is_(None),
+        ).ddl_if(dialect="postgresql"),
+    )
+
+event.listen(
+    User.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
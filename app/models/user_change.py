@@ -0,0 +1,28 @@
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class UserChange(Base):
+    """Outbox of user changes, written in the transaction that makes the change"""
+    __tablename__ = "user_changes"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)  # created, updated or deleted
+    # The user's public fields after the change; null when deleted
+    user = Column(JSON)
+    occurred_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Assigned by the relay in the order changes became visible; ids follow
+    # insert order, which concurrent transactions can commit out of, so the
+    # change feed pages on position instead
+    position = Column(BigInteger, unique=True)
+    published_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Small index over the relay backlog
+        Index(
+            "ix_user_changes_unpublished", "id",
+            postgresql_where=position.is_(None),
+            sqlite_where=position.is_(None),
+        ),
+    )
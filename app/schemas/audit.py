@@ -0,0 +1,20 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class AuditEvent(BaseModel):
+    """Audit Event Schema"""
+    id: int
+    occurred_at: datetime
+    action: str
+    actor_id: Optional[int] = None
+    target_id: Optional[int] = None
+    trace_id: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class AuditEventPage(BaseModel):
+    """Audit Event Page Schema"""
+    events: List[AuditEvent]
+    # Pass as before_id for the next page; null on the last page
+    next_before_id: Optional[int] = None
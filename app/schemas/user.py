@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -42,9 +42,52 @@ class User(UserInDBBase):
 class UserInDB(UserInDBBase):
     hashed_password: str
 
+class UserImport(BaseModel):
+    """Bulk Import Row Schema"""
+    email: EmailStr
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+    full_name: Optional[str] = None
+    role: Literal["user", "admin"] = "user"
+    is_active: bool = True
+
+    @model_validator(mode="after")
+    def check_password(self) -> "UserImport":
+        if not self.password and not self.hashed_password:
+            raise ValueError("either password or hashed_password is required")
+        return self
+
+class BulkImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkImportError]
+
+class UserChange(BaseModel):
+    """User Change Event Schema"""
+    id: int
+    position: int
+    user_id: int
+    operation: Literal["created", "updated", "deleted"]
+    occurred_at: datetime
+    user: Optional[UserResponse] = None
+
+class UserChangePage(BaseModel):
+    changes: List[UserChange]
+    # Pass as since for the next page
+    next_since: int
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenPayload(BaseModel):
     sub: int
@@ -0,0 +1,43 @@
+"""Compare per-request Polar evaluation with the compiled decision table.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_authorization
+"""
+import timeit
+
+from app.core.auth import is_allowed, oso
+from app.models.user import User
+
+ITERATIONS = 20000
+
+admin = User(id=1, role="admin")
+user = User(id=2, role="user")
+other = User(id=3, role="user")
+
+CASES = [
+    ("admin read other", admin, "read", other),
+    ("user read self", user, "read", user),
+    ("user read other", user, "read", other),
+    ("user list users", user, "list", "users"),
+]
+
+
+def main():
+    print(f"{'case':<20} {'oso us/op':>12} {'compiled us/op':>16} {'speedup':>9}")
+    for name, actor, action, resource in CASES:
+        assert oso.is_allowed(actor, action, resource) == is_allowed(actor, action, resource)
+        oso_time = timeit.timeit(
+            lambda: oso.is_allowed(actor, action, resource), number=ITERATIONS
+        )
+        compiled_time = timeit.timeit(
+            lambda: is_allowed(actor, action, resource), number=ITERATIONS
+        )
+        print(
+            f"{name:<20} {oso_time / ITERATIONS * 1e6:>12.2f} "
+            f"{compiled_time / ITERATIONS * 1e6:>16.2f} {oso_time / compiled_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Bytes on the wire and CPU per response for each content encoding.
+
+Payloads are the user list (all fields and ``?fields=id,email``), the OpenAPI
+schema and a RAG answer with sources. CPU is process time spent encoding,
+median over the iterations.
+
+    python -m benchmarks.bench_compression [--rows 10000] [--iterations 20]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import orjson
+
+from app.core.compression import ENCODERS
+from app.core.config import settings
+
+WORDS = "user account token policy session latency index query cache search".split()
+
+
+def user_list(rows, fields=None):
+    users = [
+        {"email": f"user{i}@example.com", "full_name": f"User {i}", "role": "user",
+         "is_active": True, "id": i}
+        for i in range(rows)
+    ]
+    if fields:
+        users = [{field: user[field] for field in fields} for user in users]
+    return orjson.dumps(users)
+
+
+def rag_answer():
+    rng = random.Random(0)
+    return orjson.dumps({
+        "question": "What does the policy say about sessions?",
+        "answer": " ".join(rng.choice(WORDS) for _ in range(300)),
+        "sources": [f"Page {i}" for i in range(1, 5)],
+    })
+
+
+def openapi_schema():
+    from app.main import app
+    return orjson.dumps(app.openapi())
+
+
+def measure(compress, body, level, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.process_time()
+        out = compress(body, level)
+        samples.append(time.process_time() - start)
+    return len(out), statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    levels = {
+        "gzip": settings.COMPRESSION_GZIP_LEVEL,
+        "br": settings.COMPRESSION_BROTLI_QUALITY,
+        "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+    }
+    payloads = {
+        f"users x{args.rows}": user_list(args.rows),
+        f"users x{args.rows} fields=id,email": user_list(args.rows, ("id", "email")),
+        "openapi schema": openapi_schema(),
+        "rag answer": rag_answer(),
+    }
+    print(f"{'payload':<32} {'encoding':<9} {'bytes':>10} {'ratio':>6} {'cpu ms':>8}")
+    for name, body in payloads.items():
+        print(f"{name:<32} {'identity':<9} {len(body):>10} {1.0:>6.2f} {0.0:>8.3f}")
+        for encoding, (compress, _) in ENCODERS.items():
+            size, cpu_ms = measure(compress, body, levels[encoding], args.iterations)
+            print(f"{name:<32} {encoding:<9} {size:>10} {len(body) / size:>6.2f} {cpu_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Compare the PyTorch and ONNX Runtime embedding backends.
+
+Each backend runs in a fresh interpreter so its import, load time and memory
+are measured on their own. Documents are RAG-sized chunks (about 1000
+characters, as produced by ``process_pdf_from_bytes``) encoded in batches;
+queries are short questions encoded one at a time, as ``/ask_question``
+does. Agreement is the cosine similarity of each backend's document vectors
+with the PyTorch ones.
+
+    python -m app.cli export-embeddings --output models/all-MiniLM-L6-v2-onnx --quantize
+    python -m benchmarks.bench_embeddings [--docs 256] [--queries 200] [--threads 1]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+WORDS = (
+    "the user account password token session email admin report revenue quarter growth service request "
+    "response latency database index query cache worker process memory model vector embedding document "
+    "page chunk search answer question policy access role permission import export delete update create "
+    "retry error timeout network server client audit event change feed relay health ready metric trace"
+).split()
+
+BACKENDS = {
+    "torch": {"EMBEDDING_BACKEND": "torch"},
+    "onnx fp32": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZED": "false"},
+    "onnx int8": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZED": "true"},
+}
+
+
+def make_texts(count: int, chars: int, seed: int):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < chars:
+            words.append(rng.choice(WORDS))
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def run_child(args) -> None:
+    """Runs in the child interpreter; prints one JSON result"""
+    if args.threads and os.environ["EMBEDDING_BACKEND"] == "torch":
+        import torch
+        torch.set_num_threads(args.threads)
+    from app.core import rag
+
+    if args.model:
+        rag.EMBEDDING_MODEL_NAME = args.model
+    start = time.perf_counter()
+    model, space = rag.load_embedding_model()
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    docs = make_texts(args.docs, 1000, seed=1)
+    queries = [text[:80].rstrip() + "?" for text in make_texts(args.queries, 80, seed=2)]
+    model.embed_documents(docs[:8])
+    model.embed_query(queries[0])
+
+    start = time.perf_counter()
+    vectors = model.embed_documents(docs)
+    docs_s = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.embed_query(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    with open(args.vectors, "w") as f:
+        json.dump(vectors, f)
+    print(json.dumps({
+        "space": space,
+        "load_s": load_s,
+        "docs_per_s": len(docs) / docs_s,
+        "query_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "query_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "rss_loaded_mb": rss_loaded,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "imported_torch": "torch" in sys.modules,
+    }))
+
+
+def run_backend(name, args, vectors_path):
+    env = dict(os.environ, **BACKENDS[name], RAG_LLM_PROVIDER="fake")
+    if args.onnx_path:
+        env["EMBEDDING_ONNX_PATH"] = args.onnx_path
+    if args.threads:
+        env["EMBEDDING_ONNX_THREADS"] = str(args.threads)
+    command = [
+        sys.executable, "-m", "benchmarks.bench_embeddings", "--child",
+        "--docs", str(args.docs), "--queries", str(args.queries), "--threads", str(args.threads),
+        "--vectors", vectors_path,
+    ]
+    if args.model:
+        command += ["--model", args.model]
+    proc = subprocess.run(command, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"{name} failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=0, help="0 uses each backend's default")
+    parser.add_argument("--model", help="sentence-transformers model for the torch backend")
+    parser.add_argument("--onnx-path", help="defaults to EMBEDDING_ONNX_PATH")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="repeat to run several")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    import numpy as np
+
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.backend or BACKENDS:
+            path = os.path.join(tmp, f"{len(results)}.json")
+            results[name] = run_backend(name, args, path)
+            with open(path) as f:
+                vectors[name] = np.array(json.load(f))
+    if "torch" in vectors:
+        for name, result in results.items():
+            a, b = vectors["torch"], vectors[name]
+            cosines = np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+            result["min_cosine_vs_torch"] = float(cosines.min())
+            result["mean_cosine_vs_torch"] = float(cosines.mean())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<10} {'load s':>7} {'docs/s':>8} {'query p50 ms':>13} {'p95 ms':>8} "
+          f"{'RSS loaded MB':>14} {'max RSS MB':>11} {'min cos':>8}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['load_s']:>7.2f} {r['docs_per_s']:>8.1f} {r['query_p50_ms']:>13.2f} "
+              f"{r['query_p95_ms']:>8.2f} {r['rss_loaded_mb']:>14.0f} {r['max_rss_mb']:>11.0f} "
+              f"{r.get('min_cosine_vs_torch', float('nan')):>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Latency of GET /users/search's query path on a large users table.
+
+Seeds ``--rows`` users (names drawn from small lists plus a number, so
+queries range from very common to unique), then times ``search_users`` for
+a few query shapes and prints p50/p95. With a Postgres URL this measures
+the indexed queries (all tables in that database are dropped and
+recreated); on SQLite it measures the in-process index, whose one-off
+build time is reported separately.
+
+    python -m benchmarks.bench_search [--rows 1000000] [--database-url postgresql://...] [--no-seed]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.core.search import search_users, user_search_index
+from app.models.user import User
+
+FIRST = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda",
+         "david", "elizabeth", "william", "barbara", "richard", "susan", "joseph", "jessica"]
+LAST = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis",
+        "rodriguez", "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson"]
+DOMAINS = ["example.com", "mail.example.org", "corp.example.net"]
+
+QUERIES = {
+    "email prefix, unique": "mary.smith.4242",
+    "email prefix, common": "j",
+    "name prefix, common": "Jennifer Lo",
+    "substring, common": "ander",
+    "substring, unique": ".424242@",
+    "no match": "zzqx",
+}
+
+
+def seed(engine, rows: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            first, last = rng.choice(FIRST), rng.choice(LAST)
+            batch.append({
+                "email": f"{first}.{last}.{i}@{rng.choice(DOMAINS)}",
+                "hashed_password": "x",
+                "full_name": f"{first.title()} {last.title()}",
+            })
+            if len(batch) == 10_000:
+                conn.execute(insert(User), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(User), batch)
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM ANALYZE users")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--no-seed", action="store_true", help="reuse a database seeded by an earlier run")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite"):
+        engine = create_engine(args.database_url, connect_args={"check_same_thread": False},
+                               poolclass=StaticPool)
+    else:
+        engine = create_engine(args.database_url)
+    if not args.no_seed:
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"seeded {args.rows} users in {time.perf_counter() - start:.1f} s")
+    Session = sessionmaker(bind=engine)
+
+    if engine.dialect.name != "postgresql":
+        user_search_index.clear()
+        with Session() as db:
+            start = time.perf_counter()
+            user_search_index.snapshot(db)
+            print(f"in-process index built in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'query':<22} {'q':<16} {'results':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, q in QUERIES.items():
+        timings = []
+        with Session() as db:
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                results = search_users(db, q, args.limit)
+                timings.append((time.perf_counter() - start) * 1000)
+                db.rollback()
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{name:<22} {q!r:<16} {len(results):>7} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
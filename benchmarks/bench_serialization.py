@@ -0,0 +1,91 @@
+"""Compare the users endpoints' previous and current response paths.
+
+``legacy`` loads full ORM rows, validates them through ``UserResponse`` and
+encodes with the stdlib JSON encoder, as FastAPI does for a ``response_model``
+with the default ``JSONResponse``. ``fast`` loads only the response columns
+and encodes plain dicts with orjson. Each is timed for a single row and a
+10k-row list, split into query and serialisation time.
+
+    python -m benchmarks.bench_serialization [--rows 10000] [--iterations 20]
+"""
+import argparse
+import statistics
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.core.serialization import select_user_dicts
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+USER_LIST = TypeAdapter(List[UserResponse])
+
+
+def legacy(db, *criteria):
+    start = time.perf_counter()
+    users = db.query(User).filter(*criteria).order_by(User.id).all()
+    loaded = time.perf_counter()
+    JSONResponse(jsonable_encoder(USER_LIST.validate_python(users))).body
+    return loaded - start, time.perf_counter() - loaded
+
+
+def fast(db, *criteria):
+    start = time.perf_counter()
+    users = select_user_dicts(db, *criteria)
+    loaded = time.perf_counter()
+    ORJSONResponse(users).body
+    return loaded - start, time.perf_counter() - loaded
+
+
+def measure(Session, fn, criteria, iterations):
+    query, encode = [], []
+    for _ in range(iterations):
+        db = Session()
+        try:
+            q, e = fn(db, *criteria)
+        finally:
+            db.close()
+        query.append(q)
+        encode.append(e)
+    return statistics.median(query) * 1000, statistics.median(encode) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"user{i}@example.com", "hashed_password": "x" * 60,
+             "full_name": f"User {i}", "role": "user", "is_active": True}
+            for i in range(args.rows)
+        ])
+    Session = sessionmaker(bind=engine)
+
+    cases = {
+        "single row": (User.id == args.rows // 2,),
+        f"{args.rows} rows": (User.deleted_at.is_(None),),
+    }
+    print(f"{'payload':<12} {'path':<7} {'query ms':>9} {'encode ms':>10} {'total ms':>9}")
+    for name, criteria in cases.items():
+        totals = {}
+        for label, fn in (("legacy", legacy), ("fast", fast)):
+            query, encode = measure(Session, fn, criteria, args.iterations)
+            totals[label] = query + encode
+            print(f"{name:<12} {label:<7} {query:>9.3f} {encode:>10.3f} {query + encode:>9.3f}")
+        print(f"{name:<12} speed-up {totals['legacy'] / totals['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
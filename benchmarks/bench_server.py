@@ -0,0 +1,59 @@
+"""Compare the development entrypoint with the production server mode.
+
+Runs the load benchmark once per server mode on the same fixtures:
+``uvicorn-reload`` (what docker/entrypoint.sh used to run everywhere),
+plain ``uvicorn``, and ``gunicorn`` with the production config (workers
+sized from the CPU quota, uvloop/httptools, preloading). Extra arguments
+are passed to benchmarks.load.
+
+    python -m benchmarks.bench_server [--modes uvicorn-reload gunicorn] [-- --users 500]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load import SERVER_MODES
+
+SCENARIOS = ["users_me", "user_by_id", "users_list"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="*", default=["uvicorn-reload", "uvicorn", "gunicorn"],
+                        choices=sorted(SERVER_MODES))
+    parser.add_argument("load_args", nargs="*", help="arguments for benchmarks.load (after --)")
+    args = parser.parse_args()
+
+    reports = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            output = os.path.join(tmp, f"{mode}.json")
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.load", "--server", mode, "--no-rag",
+                 "--only", *SCENARIOS, "--output", output, *args.load_args],
+                check=True,
+            )
+            with open(output) as f:
+                reports[mode] = json.load(f)
+
+    print(f"\n{'scenario':<12} {'mode':<15} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'cpu s':>7}")
+    for scenario in SCENARIOS:
+        for mode, report in reports.items():
+            result = report["scenarios"].get(scenario)
+            if result:
+                print(f"{scenario:<12} {mode:<15} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} "
+                      f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                      f"{result['server_cpu_s'] or 0:>7.2f}")
+    print()
+    for mode, report in reports.items():
+        server = report["server"]
+        print(f"{mode:<15} processes {server['processes']}  summed peak RSS "
+              f"{server['max_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measure worker start-up cost of importing the application.
+
+Each scenario runs in a fresh interpreter under ``python -X importtime`` and
+reports wall-clock import time, the cumulative import time of ``app.main``
+and peak RSS. The ``eager`` scenario also imports the RAG stack up front, as
+every worker did before those imports were deferred.
+
+    python -m benchmarks.bench_startup [--repeat 3]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+EAGER_RAG_MODULES = (
+    "langchain_groq",
+    "langchain.chains.retrieval_qa.base",
+    "langchain_community.embeddings",
+    "langchain_community.vectorstores",
+    "pdfplumber",
+)
+
+SCENARIOS = {
+    "lazy (RAG_ENABLED=true)": ({"RAG_ENABLED": "true"}, ()),
+    "no rag (RAG_ENABLED=false)": ({"RAG_ENABLED": "false"}, ()),
+    "eager (previous behaviour)": ({"RAG_ENABLED": "true"}, EAGER_RAG_MODULES),
+}
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({"wall_s": elapsed, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| app\.main$", re.M)
+
+
+def run_once(env_overrides, extra_modules):
+    env = dict(os.environ, **env_overrides)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *extra_modules],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    match = IMPORTTIME.search(proc.stderr)
+    result["app_main_import_s"] = int(match.group(1)) / 1e6 if match else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for name, (env, modules) in SCENARIOS.items():
+        runs = [run_once(env, modules) for _ in range(args.repeat)]
+        results[name] = {
+            key: min(run[key] for run in runs if run[key] is not None)
+            for key in runs[0]
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<28} {'wall s':>8} {'app.main s':>11} {'max RSS MB':>11}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['wall_s']:>8.2f} {r['app_main_import_s']:>11.2f} {r['max_rss_mb']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Count database round trips for registration and profile update.
+
+Compares the previous SELECT + INSERT/UPDATE + refresh flow with the
+single-statement ON CONFLICT / RETURNING flow now used by the endpoints.
+Password hashing is stubbed out so timings reflect database work only.
+
+    python -m benchmarks.bench_upsert [--url postgresql://...] [--iterations 200]
+"""
+import argparse
+import time
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.api.v1.endpoints import auth, users
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+
+
+class RoundTripCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.count += 1
+
+    def _commit(self, *args):
+        self.count += 1
+
+
+def legacy_create_user(db, user_in):
+    user = db.query(User).filter(User.email == user_in.email).first()
+    if user:
+        raise ValueError("exists")
+    user = User(email=user_in.email, hashed_password="x", full_name=user_in.full_name, role="user")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def legacy_update_user(db, current_user, user_in):
+    if user_in.email:
+        db.query(User).filter(User.email == user_in.email, User.id != current_user.id).first()
+    for field, value in user_in.model_dump(exclude_unset=True).items():
+        setattr(current_user, field, value)
+    db.add(current_user)
+    db.commit()
+    db.refresh(current_user)
+    return current_user
+
+
+def run(label, counter, iterations, fn):
+    counter.count = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<22} {counter.count / iterations:>10.1f} {elapsed / iterations * 1e3:>10.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite"):
+        engine = create_engine(args.url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(args.url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Keep instances loaded across commits, as they are within a single request
+    Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+    counter = RoundTripCounter(engine)
+    n = args.iterations
+
+    print(f"{'flow':<22} {'trips/op':>10} {'ms/op':>10}")
+    with patch.object(auth, "get_password_hash", lambda p: "x"), Session() as db:
+        run("register (legacy)", counter, n, lambda i: legacy_create_user(
+            db, UserCreate(email=f"legacy{i}@example.com", password="x")))
+        run("register (upsert)", counter, n, lambda i: auth.create_user(
+            db=db, user_in=UserCreate(email=f"upsert{i}@example.com", password="x")))
+
+        user = db.query(User).first()
+        run("update (legacy)", counter, n, lambda i: legacy_update_user(
+            db, user, UserUpdate(email=f"legacy-upd{i}@example.com")))
+        run("update (returning)", counter, n, lambda i: users.update_current_user(
+            current_user=user, user_in=UserUpdate(email=f"upd{i}@example.com"), db=db))
+
+    Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Deterministic fixtures for the load benchmark.
+
+Run as a module to seed the database named by DATABASE_URL:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.fixtures --users 1000 [--reset]
+"""
+import argparse
+import json
+import random
+
+ADMIN_EMAIL = "admin@bench.example.com"
+PASSWORD = "bench-password"
+
+WORDS = (
+    "account access audit billing cache client cluster config customer data deploy "
+    "document email endpoint error export field index invoice latency limit login "
+    "metric network order password policy profile query quota record region report "
+    "request role schema search server session storage team tenant token update user"
+).split()
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@bench.example.com"
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, lines_per_page: int = 40) -> bytes:
+    """Build a minimal text-only PDF with one page per string in ``pages``"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        words = text.split()
+        per_line = max(1, len(words) // lines_per_page + 1)
+        lines = [" ".join(words[i:i + per_line]) for i in range(0, len(words), per_line)]
+        stream = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(
+            f"({_escape(line)}) '" for line in lines
+        ) + " ET"
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode("latin-1"))
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_pdfs(count: int, pages: int = 3, seed: int = 0):
+    rng = random.Random(seed)
+    return [make_pdf([make_text(rng, 400) for _ in range(pages)]) for _ in range(count)]
+
+
+def seed_users(count: int, reset: bool = False) -> int:
+    """Create one admin and ``count`` users sharing a single precomputed password hash"""
+    from app.db.base import Base, SessionLocal, engine
+    from app.core.bulk import import_users
+    from app.core.security import get_password_hash
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    hashed_password = get_password_hash(PASSWORD)
+    rows = [(1, {"email": ADMIN_EMAIL, "full_name": "Bench Admin", "role": "admin",
+                 "hashed_password": hashed_password})]
+    rows += [
+        (i + 2, {"email": user_email(i), "full_name": f"Bench User {i}", "role": "user",
+                 "hashed_password": hashed_password})
+        for i in range(count)
+    ]
+    db = SessionLocal()
+    try:
+        report = import_users(db, rows)
+    finally:
+        db.close()
+    return report["created"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+    print(json.dumps({"created": seed_users(args.users, args.reset)}))
+
+
+if __name__ == "__main__":
+    main()
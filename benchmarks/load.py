@@ -0,0 +1,363 @@
+"""End-to-end load benchmark.
+
+Seeds a database with deterministic fixtures, boots the app under uvicorn and
+drives each endpoint with a fixed number of requests at a fixed concurrency.
+Reports RPS, p50/p95/p99 latency, error counts and server CPU/RSS per
+scenario as JSON, and can fail when results regress against a baseline.
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --baseline before.json --max-regression 0.15
+    python -m benchmarks.load --database-url postgresql://postgres@localhost/bench --reset-db
+
+SQLite runs use a throwaway database in a temporary directory. Postgres runs
+drop and recreate every table, so point them at a dedicated database. The
+LLM is always stubbed (RAG_LLM_PROVIDER=fake); the embedding model is real,
+so the RAG scenarios need it cached locally or network access. Use --no-rag
+to skip them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fixtures import ADMIN_EMAIL, PASSWORD, make_pdfs, make_text, user_email
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = "/api/v1"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def _proc_usage(pid: int) -> Dict[str, float]:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/status") as f:
+        status = dict(line.split(":", 1) for line in f if ":" in line)
+    return {
+        "ppid": int(fields[1]),
+        "cpu_s": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "rss_mb": int(status["VmRSS"].split()[0]) / 1024,
+        "max_rss_mb": int(status["VmHWM"].split()[0]) / 1024,
+    }
+
+
+def process_usage(pid: int) -> Dict[str, Optional[float]]:
+    """CPU seconds and RSS of a process and its descendants, from /proc where available"""
+    try:
+        procs = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    procs[int(entry)] = _proc_usage(int(entry))
+                except (OSError, KeyError, IndexError, ValueError):
+                    pass
+    except OSError:
+        procs = {}
+    if pid not in procs:
+        return {"cpu_s": None, "rss_mb": None, "max_rss_mb": None, "processes": None}
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [p for p, usage in procs.items() if usage["ppid"] == parent and p not in tree]
+        tree.update(children)
+        frontier.extend(children)
+    # RSS is summed, so pages shared between processes are counted more than once
+    return {
+        "cpu_s": sum(procs[p]["cpu_s"] for p in tree),
+        "rss_mb": sum(procs[p]["rss_mb"] for p in tree),
+        "max_rss_mb": sum(procs[p]["max_rss_mb"] for p in tree),
+        "processes": len(tree),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# How the app is served: the development entrypoint, a single plain uvicorn
+# process, and the production gunicorn configuration
+SERVER_MODES = {
+    "uvicorn": lambda port: [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning", "--no-access-log"],
+    "uvicorn-reload": lambda port: [sys.executable, "-m", "uvicorn", "app.main:app", "--reload",
+                                    "--port", str(port), "--log-level", "warning",
+                                    "--no-access-log"],
+    "gunicorn": lambda port: [sys.executable, "-m", "gunicorn", "-c", "python:app.gunicorn_conf",
+                              "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+                              "app.main:app"],
+}
+
+
+class Server:
+    def __init__(self, env: Dict[str, str], workdir: str, mode: str = "uvicorn"):
+        self.env = env
+        self.workdir = workdir
+        self.mode = mode
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.proc: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 120.0) -> None:
+        self.proc = subprocess.Popen(
+            SERVER_MODES[self.mode](self.port), env=self.env, cwd=self.workdir,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.proc.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health/ready", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("Server did not become ready")
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request: RequestFactory, total: int,
+                       concurrency: int, pid: int, warmup: int) -> Dict[str, Any]:
+    for i in range(warmup):
+        try:
+            await make_request(client, i)
+        except httpx.HTTPError:
+            pass
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                key = None if response.is_success else str(response.status_code)
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if key:
+                errors[key] = errors.get(key, 0) + 1
+
+    before = process_usage(pid)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = process_usage(pid)
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "server_cpu_s": round(after["cpu_s"] - before["cpu_s"], 3) if after["cpu_s"] is not None else None,
+        "server_rss_mb": after["rss_mb"],
+    }
+
+
+async def login(client: httpx.AsyncClient, email: str) -> Dict[str, str]:
+    response = await client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def drive(server: Server, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=120.0) as client:
+        admin_headers = await login(client, ADMIN_EMAIL)
+        sample = rng.sample(range(args.users), min(args.users, args.token_users))
+        user_headers = [await login(client, user_email(i)) for i in sample]
+        response = await client.get(f"{API}/users/", headers=admin_headers)
+        user_ids = [user["id"] for user in response.json()]
+
+        def pick(items):
+            return items[rng.randrange(len(items))]
+
+        scenarios: Dict[str, RequestFactory] = {
+            "login": lambda c, i: c.post(
+                f"{API}/auth/login",
+                data={"username": user_email(rng.randrange(args.users)), "password": PASSWORD},
+            ),
+            "users_me": lambda c, i: c.get(f"{API}/users/me", headers=pick(user_headers)),
+            "user_by_id": lambda c, i: c.get(f"{API}/users/{pick(user_ids)}", headers=admin_headers),
+            "users_list": lambda c, i: c.get(f"{API}/users/", headers=admin_headers),
+        }
+        requests = {"login": args.login_requests}
+        if args.rag:
+            pdfs = make_pdfs(args.pdfs, seed=args.seed)
+            scenarios["rag_upload"] = lambda c, i: c.post(
+                f"{API}/rag/upload_pdf/",
+                files={"file": (f"doc{i}.pdf", pdfs[i % len(pdfs)], "application/pdf")},
+            )
+            scenarios["rag_ask"] = lambda c, i: c.post(
+                f"{API}/rag/ask_question/", data={"question": make_text(rng, 8) + "?"},
+            )
+            requests["rag_upload"] = args.pdfs
+
+        results = {}
+        for name, make_request in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            total = requests.get(name, args.requests)
+            # Uploads are not repeatable, so they are not warmed up
+            warmup = 0 if name == "rag_upload" else min(args.warmup, total)
+            results[name] = await run_scenario(
+                client, make_request, total, args.concurrency, server.proc.pid, warmup
+            )
+            print(f"{name:<12} {results[name]['rps']:>9.1f} rps  p50 {results[name]['p50_ms']:>8.2f} ms"
+                  f"  p95 {results[name]['p95_ms']:>8.2f} ms  p99 {results[name]['p99_ms']:>8.2f} ms"
+                  f"  errors {sum(results[name]['errors'].values())}", file=sys.stderr)
+        return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Scenarios whose p95 grew or whose throughput fell by more than the threshold"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']} ms -> {result['p95_ms']} ms")
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['rps']} -> {result['rps']} rps")
+        if sum(result["errors"].values()) > sum(base["errors"].values()):
+            regressions.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--reset-db", action="store_true",
+                        help="required with --database-url: drop and recreate all tables")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=200,
+                        help="login requests; each one costs a bcrypt verification")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--token-users", type=int, default=50, help="distinct users holding tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--no-rag", dest="rag", action="store_false")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="allowed relative p95/throughput change before failing")
+    parser.add_argument("--server", choices=sorted(SERVER_MODES), default="uvicorn")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary directory")
+    args = parser.parse_args()
+
+    if args.database_url and not args.reset_db:
+        parser.error("--database-url drops all tables; pass --reset-db to confirm")
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")])),
+        "DATABASE_URL": database_url,
+        "RAG_ENABLED": "true" if args.rag else "false",
+        "RAG_LLM_PROVIDER": "fake",
+        "TRACING_ENABLED": "false",
+        "USER_PURGE_ENABLED": "false",
+    })
+    for key, value in (("SECRET_KEY", "bench"), ("ADMIN_REGISTRATION_TOKEN", "bench"),
+                       ("GROQ_API_KEY", "unused")):
+        env.setdefault(key, value)
+
+    server = Server(env, workdir, args.server)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.fixtures", "--users", str(args.users), "--reset"],
+            env=env, cwd=workdir, check=True, stdout=subprocess.DEVNULL,
+        )
+        server.start()
+        scenarios = asyncio.run(drive(server, args))
+        usage = process_usage(server.proc.pid)
+    finally:
+        server.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "database": database_url.split(":", 1)[0],
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "users": args.users,
+            "pdfs": args.pdfs if args.rag else 0,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "server": args.server,
+        },
+        "server": {"cpu_s": usage["cpu_s"], "max_rss_mb": usage["max_rss_mb"],
+                   "processes": usage["processes"]},
+        "scenarios": scenarios,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
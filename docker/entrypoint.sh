@@ -32,5 +32,11 @@ if ! run_migrations; then
 fi
 
 # Start the application
-echo "Starting FastAPI application..."
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+if [ "$ENVIRONMENT" = "production" ]; then
+    # Multi-worker gunicorn with uvloop/httptools; sized and tuned by the SERVER_* settings
+    echo "Starting FastAPI application (production)..."
+    exec gunicorn -c python:app.gunicorn_conf app.main:app
+else
+    echo "Starting FastAPI application (development)..."
+    exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+fi
@@ -16,5 +16,7 @@ setup(
         "bcrypt>=4.1.2",
         "python-dotenv>=1.0.1",
         "oso>=0.27.0",
+        "orjson>=3.9.0",
+        "prometheus_client>=0.20.0",
     ],
 )
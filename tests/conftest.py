@@ -5,12 +5,22 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.api.health import readiness_probe
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.tracing import instrument_engine_tracing
 from app.db.base import Base, get_db
 from app.main import app
 from app.models.user import User
 from app.core.security import get_password_hash
 
+# Background writers and the invalidation listener would use the application
+# database; tests that need them configure or run them directly
+# (tests/test_audit.py, tests/test_outbox.py, tests/test_invalidation.py)
+settings.AUDIT_SINK = "none"
+settings.OUTBOX_RELAY_ENABLED = False
+settings.INVALIDATION_BUS = "local"
+
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 engine = create_engine(
@@ -18,6 +28,9 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool
 )
+# Mirror the instrumentation of the application engine
+instrument_engine(engine)
+instrument_engine_tracing(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
@@ -33,6 +46,11 @@ def setup_db():
     yield
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture(autouse=True)
+def readiness_engine(monkeypatch):
+    # Probe the test database rather than the application's
+    monkeypatch.setattr(readiness_probe, "engine", engine)
+
 @pytest.fixture
 def db():
     db = TestingSessionLocal()
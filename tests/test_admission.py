@@ -0,0 +1,112 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from app.core.admission import AdaptiveLimiter, AdmissionMiddleware, classify
+from app.core.security import create_access_token
+
+def scope(path, method="GET", token=False, authorization=None):
+    if token:
+        authorization = f"Bearer {create_access_token('test@example.com')}"
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return {"type": "http", "path": path, "method": method, "headers": headers}
+
+def test_classify():
+    """Test requests map to route classes before routing"""
+    assert classify(scope("/health/ready")) is None
+    assert classify(scope("/metrics")) is None
+    assert classify(scope("/api/v1/rag/ask_question/", "POST")) == "rag"
+    assert classify(scope("/api/v1/auth/login", "POST")) == "auth"
+    assert classify(scope("/api/v1/users/me", token=True)) == "read"
+    assert classify(scope("/api/v1/users/me")) == "default"
+    assert classify(scope("/api/v1/users/me", "PATCH", token=True)) == "default"
+    assert classify(scope("/api/v1/users/export", token=True)) == "default"
+    assert classify(scope("/api/v1/users", token=True)) == "read"
+    assert classify(scope("/api/v1/usersfoo", token=True)) == "default"
+
+def test_read_lane_needs_a_valid_bearer_token():
+    """Test junk credentials do not get into the priority lane"""
+    for authorization in ("Basic dXNlcjpwYXNz", "Bearer", "Bearer junk", "x"):
+        assert classify(scope("/api/v1/users/me", authorization=authorization)) == "default"
+
+def test_limit_adapts_to_latency():
+    """Test the limit grows while saturated and fast, and backs off when slow"""
+    async def main():
+        limiter = AdaptiveLimiter("test", limit=2, min_limit=1, max_limit=4, target_ms=100)
+        assert await limiter.acquire() and await limiter.acquire()
+        assert not await limiter.acquire()
+        limiter.release(0.01)
+        assert limiter.limit == 2.5
+        limiter.release(0.01)
+        # Not saturated, so no growth
+        assert limiter.limit == 2.5
+        await limiter.acquire()
+        limiter.release(1.0)
+        assert limiter.limit == 2.25
+        await limiter.acquire()
+        limiter.release(1.0)
+        # At most one cut per target interval
+        assert limiter.limit == 2.25
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+def test_queued_requests_get_released_slots():
+    """Test a queued request is admitted when a slot frees up, or times out"""
+    async def main():
+        limiter = AdaptiveLimiter("test_queue", limit=1, min_limit=1, max_limit=1,
+                                  target_ms=100, queue=1, max_wait_ms=200)
+        assert await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        # The queue holds one request
+        assert not await limiter.acquire()
+        limiter.release(0.01)
+        assert await waiting
+        assert limiter.in_flight == 1
+        assert not await limiter.acquire()
+        limiter.release(0.01)
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+def test_middleware_sheds_saturated_class_only():
+    """Test a saturated class gets 503 with Retry-After while other classes are served"""
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.post("/api/v1/rag/ask_question/")
+    async def slow():
+        await release.wait()
+        return {"answer": "done"}
+
+    @app.get("/api/v1/users/me")
+    async def me():
+        return {"id": 1}
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "ok"}
+
+    classes = {
+        "rag": {"limit": 1, "min_limit": 1, "max_limit": 1, "target_ms": 10000},
+        "read": {"limit": 8, "min_limit": 1, "max_limit": 8, "target_ms": 1000},
+    }
+    wrapped = AdmissionMiddleware(app, classes=classes, retry_after=3)
+
+    async def main():
+        transport = httpx.ASGITransport(app=wrapped)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/api/v1/rag/ask_question/"))
+            await asyncio.sleep(0.05)
+            shed = await client.post("/api/v1/rag/ask_question/")
+            read = await client.get("/api/v1/users/me", headers={"Authorization": "Bearer x"})
+            health = await client.get("/health/live")
+            release.set()
+            return (await first), shed, read, health
+
+    first, shed, read, health = asyncio.run(main())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "3"
+    assert read.status_code == 200
+    assert health.status_code == 200
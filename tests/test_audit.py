@@ -0,0 +1,120 @@
+import json
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+from app.core.audit import AuditLog, DatabaseAuditSink, audit_log
+from app.core.config import settings
+from app.models.audit import AuditEvent
+
+class FlakySink:
+    def __init__(self):
+        self.healthy = False
+        self.written = []
+
+    def write(self, events):
+        if not self.healthy:
+            raise ConnectionError("sink down")
+        self.written.extend(events)
+
+@pytest.fixture
+def audit_db(db):
+    # A long interval so events are only written by explicit flushes
+    audit_log.configure(DatabaseAuditSink(sessionmaker(bind=db.get_bind())), interval=3600)
+    yield
+    audit_log.configure(None)
+
+def _events(client, headers, **params):
+    audit_log.flush()
+    response = client.get(f"{settings.API_V1_STR}/admin/audit-events", headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+def test_auth_and_user_changes_are_audited(client: TestClient, admin_token_headers: Dict[str, str],
+                                           normal_user: Dict[str, str], audit_db):
+    """Test logins, registrations, updates and deletions land in the audit log"""
+    client.post(f"{settings.API_V1_STR}/auth/login", data={"username": normal_user["email"], "password": "wrong"})
+    login = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": normal_user["email"], "password": normal_user["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.patch(f"{settings.API_V1_STR}/users/me", headers=headers, json={"full_name": "New", "password": "newpassword"})
+    client.delete(f"{settings.API_V1_STR}/users/me", headers=headers)
+    registered = client.post(
+        f"{settings.API_V1_STR}/auth/register", json={"email": "new@example.com", "password": "password"}
+    ).json()
+
+    events = _events(client, admin_token_headers)["events"]
+    assert [e["action"] for e in events] == [
+        "user.register", "user.delete", "user.update", "auth.login", "auth.login_failed",
+    ]
+    register, delete, update, login_event, failed = events
+    assert register["target_id"] == registered["id"]
+    assert delete["actor_id"] == delete["target_id"] == normal_user["id"]
+    assert update["details"] == {"fields": ["full_name", "password"]}
+    assert login_event["trace_id"] == login.headers.get("X-Trace-Id")
+    assert failed["details"] == {"email": normal_user["email"], "reason": "invalid_credentials"}
+
+    only_failed = _events(client, admin_token_headers, action="auth.login_failed")["events"]
+    assert [e["id"] for e in only_failed] == [failed["id"]]
+
+def test_keyset_pagination(client: TestClient, admin_token_headers: Dict[str, str], audit_db):
+    """Test pages follow next_before_id until the oldest event"""
+    for i in range(5):
+        audit_log.record("test.event", target_id=i)
+    seen = []
+    params = {"action": "test.event", "limit": 2}
+    while True:
+        page = _events(client, admin_token_headers, **params)
+        seen += [e["target_id"] for e in page["events"]]
+        if page["next_before_id"] is None:
+            break
+        params["before_id"] = page["next_before_id"]
+    assert seen == [4, 3, 2, 1, 0]
+
+def test_failed_batches_are_retried_and_spilled_on_shutdown(tmp_path):
+    """Test a failing sink loses nothing: batches are retried, then spilled at shutdown"""
+    sink = FlakySink()
+    undelivered = tmp_path / "undelivered.jsonl"
+    log = AuditLog()
+    log.configure(sink, interval=3600, undelivered_path=str(undelivered))
+    log.record("a")
+    log.record("b")
+    assert not log.flush()
+    sink.healthy = True
+    assert log.flush()
+    assert [e["action"] for e in sink.written] == ["a", "b"]
+
+    sink.healthy = False
+    log.record("c")
+    log.shutdown()
+    assert [json.loads(line)["action"] for line in undelivered.read_text().splitlines()] == ["c"]
+
+def test_full_queue_applies_backpressure(tmp_path):
+    """Test a request that finds the queue full writes its own event"""
+    sink = FlakySink()
+    log = AuditLog()
+    log.configure(sink, interval=3600, max_queue_size=2, enqueue_timeout=0.01,
+                  undelivered_path=str(tmp_path / "undelivered.jsonl"))
+    for action in ("a", "b"):
+        log.record(action)
+    sink.healthy = True
+    log.record("c")
+    assert [e["action"] for e in sink.written] == ["c"]
+    log.shutdown()
+    assert sorted(e["action"] for e in sink.written) == ["a", "b", "c"]
+
+def test_redelivered_events_are_stored_once(db):
+    """Test the database sink skips events it already stored"""
+    captured = FlakySink()
+    captured.healthy = True
+    log = AuditLog()
+    log.configure(captured, interval=3600)
+    log.record("a", actor_id=1)
+    log.shutdown()
+    sink = DatabaseAuditSink(sessionmaker(bind=db.get_bind()))
+    sink.write(captured.written)
+    sink.write(captured.written)
+    assert db.scalar(select(func.count()).select_from(AuditEvent)) == 1
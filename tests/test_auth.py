@@ -98,3 +98,93 @@ def test_register_admin_invalid_token(client: TestClient):
         json=user_data
     )
     assert response.status_code == 400
+
+def _login(client: TestClient, user: Dict[str, str]) -> Dict[str, str]:
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={
+            "username": user["email"],
+            "password": user["password"]
+        }
+    )
+    return response.json()
+
+def test_login_returns_refresh_token(client: TestClient, normal_user: Dict[str, str]):
+    """Test login issues a refresh token"""
+    tokens = _login(client, normal_user)
+    assert tokens["refresh_token"]
+
+def test_refresh_token_rotation(client: TestClient, normal_user: Dict[str, str]):
+    """Test refresh issues new tokens and rejects the rotated one"""
+    tokens = _login(client, normal_user)
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    new_tokens = response.json()
+    assert new_tokens["refresh_token"] != tokens["refresh_token"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {new_tokens['access_token']}"}
+    )
+    assert response.status_code == 200
+
+    # Replaying the old token is rejected and revokes the rotated session too
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": new_tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+def test_refresh_invalid_token(client: TestClient):
+    """Test refresh with an unknown token"""
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": "invalid"}
+    )
+    assert response.status_code == 401
+
+def test_logout_revokes_refresh_token(client: TestClient, normal_user: Dict[str, str]):
+    """Test logout revokes the refresh token"""
+    tokens = _login(client, normal_user)
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/logout",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+def test_refresh_inactive_user_keeps_token_unclaimed(client: TestClient, db, normal_user: Dict[str, str]):
+    """Test refresh for a deactivated user neither burns the token nor opens a session"""
+    from app.core.security import hash_refresh_token
+    from app.models.session import UserSession
+    from app.models.user import User
+
+    tokens = _login(client, normal_user)
+    user = db.query(User).filter(User.email == normal_user["email"]).first()
+    user.is_active = False
+    db.commit()
+    sessions = db.query(UserSession).filter(UserSession.user_id == user.id).count()
+
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 400
+    db.expire_all()
+    session = db.query(UserSession).filter(
+        UserSession.refresh_token_hash == hash_refresh_token(tokens["refresh_token"])
+    ).one()
+    assert session.revoked_at is None and session.replaced_by_id is None
+    assert db.query(UserSession).filter(UserSession.user_id == user.id).count() == sessions
@@ -0,0 +1,38 @@
+import pytest
+from app.core.auth import (
+    ACTIONS,
+    ALLOW,
+    DENY,
+    OWNER,
+    ROLES,
+    authorized_filter,
+    get_decision,
+    is_allowed,
+    oso,
+)
+from app.models.user import User
+
+@pytest.mark.parametrize("role", ROLES)
+@pytest.mark.parametrize("action", ACTIONS)
+def test_compiled_policy_matches_oso(role, action):
+    """Test compiled decisions agree with the Polar policy"""
+    actor = User(id=1, role=role)
+    for resource in (User(id=1), User(id=2), "users"):
+        assert is_allowed(actor, action, resource) == oso.is_allowed(actor, action, resource)
+
+def test_compiled_decisions():
+    """Test ownership rules compile to owner decisions"""
+    assert get_decision("admin", "delete", "User") == ALLOW
+    assert get_decision("user", "read", "User") == OWNER
+    assert get_decision("user", "list", "users") == DENY
+
+def test_authorized_filter(db, admin_user, normal_user):
+    """Test the policy translated to SQL filters the visible rows"""
+    admin = db.query(User).filter(User.id == admin_user["id"]).first()
+    user = db.query(User).filter(User.id == normal_user["id"]).first()
+
+    visible = db.query(User).filter(authorized_filter(admin, "read", User)).all()
+    assert len(visible) == 2
+
+    visible = db.query(User).filter(authorized_filter(user, "read", User)).all()
+    assert [u.id for u in visible] == [user.id]
@@ -0,0 +1,61 @@
+import gzip
+import json
+import zlib
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from app.core.compression import ENCODERS, negotiate
+from app.core.config import settings
+
+OPENAPI_URL = f"{settings.API_V1_STR}/openapi.json"
+
+def _decode(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.decompress(data)
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+def test_negotiate():
+    """Test q-values win over server preference, which breaks ties"""
+    preference = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", preference) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", preference) == "gzip"
+    assert negotiate("*;q=0.1, zstd;q=0", preference) == "br"
+    assert negotiate("identity", preference) is None
+    assert negotiate("", preference) is None
+
+# brotli and zstd are only tested when their optional packages are installed
+@pytest.mark.parametrize("encoding", list(ENCODERS))
+def test_large_response_compressed(client: TestClient, encoding: str):
+    """Test a large body is compressed with the negotiated encoding"""
+    plain = client.get(OPENAPI_URL, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+
+    # Read the raw bytes so the client does not decode them
+    with client.stream("GET", OPENAPI_URL, headers={"Accept-Encoding": encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(raw) < len(plain.content)
+    assert _decode(encoding, raw) == plain.content
+
+def test_small_response_not_compressed(client: TestClient):
+    """Test bodies under the size threshold are sent as-is"""
+    response = client.get("/health/live", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+def test_streamed_export_compressed(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test streamed responses are compressed incrementally"""
+    with client.stream(
+        "GET",
+        f"{settings.API_V1_STR}/users/export?format=ndjson",
+        headers={**admin_token_headers, "Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    rows = [json.loads(line) for line in zlib.decompress(raw, 16 + zlib.MAX_WBITS).splitlines()]
+    assert {row["email"] for row in rows} >= {normal_user["email"]}
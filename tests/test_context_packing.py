@@ -0,0 +1,72 @@
+import random
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.api.v1.endpoints import rag as rag_endpoint
+from app.core.config import settings
+from app.core.context_packing import estimate_tokens, pack_context
+from app.core.rag import FAKE_LLM_ANSWER
+
+def make_chunks(pages=2, words=300, seed=0):
+    rng = random.Random(seed)
+    vocabulary = "token budget chunk overlap prompt latency retrieval answer page context 2024 42.".split()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=100, add_start_index=True)
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(words)) for _ in range(pages)]
+    documents = [Document(page_content=text, metadata={"page": page}) for page, text in enumerate(texts, 1)]
+    return texts, splitter.split_documents(documents)
+
+def test_overlap_is_trimmed_and_order_restored():
+    """Test neighbouring chunks are packed without their shared text, in page order"""
+    texts, chunks = make_chunks()
+    # Scored in an order unrelated to their position
+    scored = [(chunk, random.Random(i).random()) for i, chunk in enumerate(chunks)]
+    context, pieces, stats = pack_context(scored, budget=100000)
+
+    assert context.split() == " ".join(texts).split()
+    assert stats["packed"] == len(chunks)
+    assert stats["overlap_chars_trimmed"] > 0
+    assert stats["context_tokens"] == estimate_tokens(context)
+    assert [piece["metadata"]["page"] for piece in pieces] == sorted(piece["metadata"]["page"] for piece in pieces)
+
+def test_duplicates_are_dropped():
+    """Test chunks already in the context are not sent again"""
+    _, chunks = make_chunks(pages=1)
+    copy = Document(page_content=chunks[0].page_content, metadata={"page": 7})
+    part = Document(page_content=chunks[0].page_content[:200], metadata={"page": 8})
+    context, pieces, stats = pack_context([(chunks[0], 0.9), (copy, 0.8), (part, 0.7)], budget=100000)
+    assert stats["packed"] == 1 and stats["duplicates"] == 2
+    assert [piece["metadata"]["page"] for piece in pieces] == [1]
+
+def test_budget_is_respected():
+    """Test the most relevant chunks are kept, the last one cut to fit"""
+    _, chunks = make_chunks(pages=1)
+    scored = [(chunk, 1.0 - i / 100) for i, chunk in enumerate(chunks)]
+    first = estimate_tokens(chunks[0].page_content)
+    context, pieces, stats = pack_context(scored, budget=first + 30, min_chunk_tokens=20)
+
+    assert stats["context_tokens"] <= first + 30
+    assert stats["packed"] == 2 and stats["truncated"] == 1
+    assert stats["over_budget"] == len(chunks) - 2
+    assert pieces[0]["score"] == 1.0
+
+    _, _, stats = pack_context(scored, budget=first + 30, min_chunk_tokens=40)
+    assert stats["packed"] == 1 and stats["truncated"] == 0
+
+def test_answer_reports_packing(monkeypatch):
+    """Test answers carry prompt token counts and packing statistics"""
+    _, chunks = make_chunks(pages=3)
+
+    class VectorStore:
+        def similarity_search_with_score(self, question, k):
+            return [(chunk, i / 10) for i, chunk in enumerate(chunks[:k])]
+
+    monkeypatch.setattr(settings, "RAG_LLM_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "RAG_RETRIEVAL_K", 6)
+    monkeypatch.setattr(settings, "RAG_CONTEXT_TOKEN_BUDGET", 200)
+    response = rag_endpoint._answer_question(VectorStore(), "key", "What is the token budget?")
+
+    assert response["answer"] == FAKE_LLM_ANSWER
+    context = response["context"]
+    assert context["retrieved"] == 6 and context["budget"] == 200
+    assert context["context_tokens"] <= 200 < context["estimated_prompt_tokens"]
+    assert context["prompt_tokens"] is None
+    assert len(response["sources"]) == context["packed"]
@@ -0,0 +1,95 @@
+import json
+import string
+import subprocess
+import sys
+import numpy as np
+import pytest
+from app.core import health, rag
+from app.core.config import settings
+from app.core.embeddings import (
+    PROBE_TEXTS,
+    OnnxEmbeddings,
+    export_onnx,
+    onnx_space,
+    read_index_space,
+    write_index_space,
+)
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """A small random BERT sentence model, built offline"""
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling, Transformer
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("model")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *string.ascii_lowercase, *string.digits, *string.punctuation]
+    vocab += ["##" + c for c in string.ascii_lowercase + string.digits]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(str(path / "vocab.txt")).save_pretrained(path / "hf")
+    config = BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64)
+    BertModel(config).save_pretrained(path / "hf")
+    transformer = Transformer(str(path / "hf"), max_seq_length=64)
+    model = SentenceTransformer(modules=[transformer, Pooling(32, "mean"), Normalize()], device="cpu")
+    model.save(str(path / "st"))
+    return path
+
+@pytest.fixture(scope="module")
+def onnx_dir(model_dir):
+    export_onnx(str(model_dir / "st"), str(model_dir / "onnx"), quantize=True)
+    return model_dir / "onnx"
+
+def test_export_matches_source_model(model_dir, onnx_dir):
+    """Test the exported model reproduces the sentence-transformers vectors"""
+    from sentence_transformers import SentenceTransformer
+
+    manifest = json.loads((onnx_dir / "manifest.json").read_text())
+    assert manifest["files"]["fp32"]["min_cosine"] > 0.9999
+    assert manifest["files"]["int8"]["min_cosine"] > 0.99
+
+    texts = ["short", PROBE_TEXTS[-1], "a rather longer sentence than the first one"]
+    reference = SentenceTransformer(str(model_dir / "st"), device="cpu").encode(texts)
+    vectors = np.array(OnnxEmbeddings(str(onnx_dir), batch_size=2).embed_documents(texts))
+    np.testing.assert_allclose(vectors, reference, atol=1e-5)
+    assert np.allclose(OnnxEmbeddings(str(onnx_dir)).embed_query(texts[1]), reference[1], atol=1e-5)
+
+def test_onnx_backend_does_not_import_torch(onnx_dir):
+    """Test workers serving the ONNX model never load torch"""
+    code = (
+        "import sys; from app.core.embeddings import OnnxEmbeddings; "
+        f"OnnxEmbeddings({str(onnx_dir)!r}, quantized=True).embed_query('hello'); "
+        "assert 'torch' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_embedding_spaces(tmp_path, monkeypatch):
+    """Test which exports share their source model's space, and how indexes record theirs"""
+    manifest = {"source_model": "model", "files": {"fp32": {"min_cosine": 0.99999}, "int8": {"min_cosine": 0.97}}}
+    monkeypatch.setattr(settings, "EMBEDDING_COMPAT_MIN_COSINE", 0.99)
+    assert onnx_space(manifest, "fp32") == "model"
+    assert onnx_space(manifest, "int8") == "model:onnx-int8"
+
+    index = tmp_path / "chroma"
+    assert read_index_space(str(index), default="model") is None
+    index.mkdir()
+    (index / "chroma.sqlite3").write_bytes(b"")
+    assert read_index_space(str(index), default="model") == "model"
+    write_index_space(str(index), "model:onnx-int8")
+    assert read_index_space(str(index), default="model") == "model:onnx-int8"
+
+def test_incompatible_index_requires_reindex(onnx_dir, tmp_path, monkeypatch):
+    """Test loading a model from another space flags the index for re-indexing"""
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setattr(settings, "EMBEDDING_ONNX_PATH", str(onnx_dir))
+    monkeypatch.setattr(settings, "EMBEDDING_ONNX_QUANTIZED", True)
+    monkeypatch.setattr(settings, "EMBEDDING_COMPAT_MIN_COSINE", 1.01)
+    monkeypatch.setattr(rag, "CHROMA_PERSIST_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(rag, "_embeddings", None)
+    monkeypatch.setattr(rag, "reindex_required", False)
+    write_index_space(str(tmp_path), rag.EMBEDDING_MODEL_NAME)
+
+    rag.get_embeddings()
+    assert rag.reindex_required
+    check = health.check_vector_store()
+    assert check["reindex_required"] and check["embedding_backend"] == "onnx"
@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+from app.api.health import readiness_probe
+from app.core.config import settings
+from app.main import app
+
+def test_liveness():
+    """Test liveness probe"""
+    client = TestClient(app)
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+def test_readiness():
+    """Test readiness probe reports each dependency"""
+    readiness_probe.invalidate()
+    with TestClient(app) as client:
+        response = client.get("/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert set(data["checks"]) == {"database", "pool", "vector_store", "executor", "startup"}
+    assert data["checks"]["database"]["latency_ms"] >= 0
+
+def test_readiness_before_startup():
+    """Test readiness fails until the lifespan start-up has finished"""
+    app.state.ready = False
+    client = TestClient(app)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["startup"]["healthy"] is False
+
+def test_readiness_overloaded(monkeypatch):
+    """Test readiness fails when a dependency exceeds its threshold"""
+    monkeypatch.setattr(settings, "HEALTH_DB_LATENCY_THRESHOLD_MS", 0.0)
+    readiness_probe.invalidate()
+    with TestClient(app) as client:
+        response = client.get("/health/ready")
+    readiness_probe.invalidate()
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["healthy"] is False
+
+def test_readiness_is_cached():
+    """Test probe results are reused within the cache TTL"""
+    readiness_probe.invalidate()
+    with TestClient(app) as client:
+        first = client.get("/health/ready").json()
+        second = client.get("/health/ready").json()
+    assert first["checks"]["database"] == second["checks"]["database"]
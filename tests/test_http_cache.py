@@ -0,0 +1,88 @@
+from typing import Dict
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+def test_read_current_user_etag(client: TestClient, user_token_headers: Dict[str, str]):
+    """Test /users/me revalidates with If-None-Match and changes after an update"""
+    url = f"{settings.API_V1_STR}/users/me"
+    response = client.get(url, headers=user_token_headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get(url, headers={**user_token_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    client.patch(url, headers=user_token_headers, json={"full_name": "Changed"})
+    response = client.get(url, headers={**user_token_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["full_name"] == "Changed"
+
+def test_read_user_by_id_etag(client: TestClient, admin_token_headers: Dict[str, str], user_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test a user has the same ETag through /users/me and /users/{id}"""
+    etag = client.get(f"{settings.API_V1_STR}/users/me", headers=user_token_headers).headers["ETag"]
+    url = f"{settings.API_V1_STR}/users/{normal_user['id']}"
+    response = client.get(url, headers=admin_token_headers)
+    assert response.headers["ETag"] == etag
+
+    response = client.get(url, headers={**admin_token_headers, "If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    response = client.get(
+        url, headers={**admin_token_headers, "If-Modified-Since": response.headers["Last-Modified"]}
+    )
+    assert response.status_code == 304
+
+def test_read_user_by_id_etag_requires_permission(client: TestClient, user_token_headers: Dict[str, str], admin_user: Dict[str, str]):
+    """Test authorization is checked before answering 304"""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/{admin_user['id']}",
+        headers={**user_token_headers, "If-None-Match": "*"}
+    )
+    assert response.status_code == 403
+
+def test_read_users_list_etag(client: TestClient, admin_token_headers: Dict[str, str]):
+    """Test the list ETag follows the users table version"""
+    url = f"{settings.API_V1_STR}/users/"
+    etag = client.get(url, headers=admin_token_headers).headers["ETag"]
+    response = client.get(url, headers={**admin_token_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post(
+        f"{settings.API_V1_STR}/auth/register",
+        json={"email": "new@example.com", "password": "password"}
+    )
+    response = client.get(url, headers={**admin_token_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert any(user["email"] == "new@example.com" for user in response.json())
+
+def test_field_selections_have_their_own_etag(client: TestClient, user_token_headers: Dict[str, str], admin_token_headers: Dict[str, str]):
+    """Test an ETag for ?fields= does not validate the full representation"""
+    for url, headers in ((f"{settings.API_V1_STR}/users/me", user_token_headers),
+                         (f"{settings.API_V1_STR}/users/", admin_token_headers)):
+        etag = client.get(f"{url}?fields=id", headers=headers).headers["ETag"]
+        response = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        response = client.get(f"{url}?fields=id", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+def test_list_pages_and_filters_have_their_own_etag(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test each page and filter combination of the list has its own ETag"""
+    url = f"{settings.API_V1_STR}/users/"
+    etags = set()
+    for query in ("", "?limit=1", "?limit=1&after_id=1", "?role=user", "?is_active=false",
+                  "?created_after=2020-01-01T00:00:00"):
+        etag = client.get(url + query, headers=admin_token_headers).headers["ETag"]
+        etags.add(etag)
+        response = client.get(url + query, headers={**admin_token_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+    assert len(etags) == 6
+
+    first_page = client.get(f"{url}?limit=1", headers=admin_token_headers).headers["ETag"]
+    response = client.get(f"{url}?limit=1&after_id=1", headers={**admin_token_headers, "If-None-Match": first_page})
+    assert response.status_code == 200
+    assert response.json()[0]["id"] > 1
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.api.v1 import dependencies
+from app.core.config import settings
+from app.core.invalidation import (
+    InvalidatedCache,
+    InvalidationBus,
+    LocalTransport,
+    PostgresTransport,
+    invalidation_bus,
+)
+from app.core.sessions import revocation_cache
+
+def lag_count(channel: str) -> float:
+    return REGISTRY.get_sample_value("cache_invalidation_lag_seconds_count", {"channel": channel}) or 0.0
+
+def make_worker(network, ttl=60):
+    bus = InvalidationBus()
+    bus.configure(LocalTransport(network))
+    return bus, InvalidatedCache("test", maxsize=10, ttl=ttl, bus=bus)
+
+@pytest.fixture
+def peer(client: TestClient):
+    """Another worker on the application's bus"""
+    bus = InvalidationBus()
+    bus.configure(LocalTransport(invalidation_bus.transport.network))
+    yield bus
+    bus.shutdown()
+
+def test_invalidation_reaches_every_worker():
+    """Test keys are dropped on the publishing worker and its peers"""
+    network = []
+    (bus_a, cache_a), (bus_b, cache_b) = make_worker(network), make_worker(network)
+    for cache in (cache_a, cache_b):
+        cache.set("k", "v", cache.generation)
+        cache.set("other", "v", cache.generation)
+    before = lag_count("test")
+
+    cache_a.invalidate("k")
+    assert cache_a.get("k") is None and cache_b.get("k") is None
+    assert cache_a.get("other") == cache_b.get("other") == "v"
+    # Only the peer measures propagation
+    assert lag_count("test") - before == 1
+
+def test_stale_loads_are_not_cached():
+    """Test a value loaded before an invalidation arrived is not stored"""
+    _, cache = make_worker([])
+    generation = cache.generation
+    cache.invalidate("k")
+    cache.set("k", "stale", generation)
+    assert cache.get("k") is None
+    cache.set("k", "fresh", cache.generation)
+    assert cache.get("k") == "fresh"
+
+def test_large_invalidations_are_split():
+    """Test many keys are spread over messages that fit a Postgres NOTIFY"""
+    network, received, sizes = [], [], []
+    bus_a, _ = make_worker(network)
+    bus_b, _ = make_worker(network)
+    bus_b.subscribe("test", received.append)
+    send = bus_a.transport.send
+    bus_a.transport.send = lambda payload: (sizes.append(len(payload)), send(payload))
+
+    keys = [f"{i:064x}:{i}" for i in range(300)]
+    bus_a.publish("test", *keys)
+    assert len(sizes) > 1 and max(sizes) < 8000
+    assert received == keys
+
+    # A key that cannot fit resets the channel on peers instead
+    received.clear()
+    bus_a.publish("test", "k", "x" * 8000)
+    assert received == ["k", None]
+
+def test_revocations_are_broadcast(client: TestClient, normal_user: Dict[str, str], peer):
+    """Test a logout on one worker revokes the token on the others, and the reverse"""
+    received = []
+    peer.subscribe("refresh_tokens", received.append)
+    login = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": normal_user["email"], "password": normal_user["password"]},
+    ).json()
+    client.post(f"{settings.API_V1_STR}/auth/logout", json={"refresh_token": login["refresh_token"]})
+    assert len(received) == 1
+
+    peer.publish("refresh_tokens", "f" * 64 + ":")
+    assert "f" * 64 in revocation_cache
+
+def test_current_user_cache(client: TestClient, user_token_headers: Dict[str, str], normal_user: Dict[str, str],
+                            peer, monkeypatch):
+    """Test cached users are dropped when they change here or on another worker"""
+    monkeypatch.setattr(dependencies.current_user_cache, "ttl", 60)
+    loads = []
+    load_user_row = dependencies._load_user_row
+    monkeypatch.setattr(dependencies, "_load_user_row", lambda db, email: loads.append(email) or load_user_row(db, email))
+    url = f"{settings.API_V1_STR}/users/me"
+
+    for _ in range(3):
+        assert client.get(url, headers=user_token_headers).status_code == 200
+    assert len(loads) == 1
+
+    client.patch(url, headers=user_token_headers, json={"full_name": "Renamed"})
+    assert client.get(url, headers=user_token_headers).json()["full_name"] == "Renamed"
+    assert len(loads) == 2
+
+    peer.publish("users", normal_user["email"])
+    client.get(url, headers=user_token_headers)
+    assert len(loads) == 3
+    dependencies.current_user_cache.clear()
+
+def test_postgres_transport(db):
+    """Test LISTEN/NOTIFY carries invalidations between buses"""
+    engine = db.get_bind()
+    if engine.dialect.name != "postgresql":
+        pytest.skip("LISTEN/NOTIFY needs Postgres")
+    buses, transports, received = [], [], []
+    for _ in range(2):
+        bus, transport = InvalidationBus(), PostgresTransport(engine, channel="test_invalidation")
+        bus.configure(transport)
+        buses.append(bus)
+        transports.append(transport)
+    buses[1].subscribe("test", received.append)
+    try:
+        for transport in transports:
+            assert transport.listening.wait(5)
+        keys = [f"{i:064x}:{i}" for i in range(300)]
+        buses[0].publish("test", *keys)
+        deadline = time.monotonic() + 5
+        while len(received) < len(keys) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert received == keys
+    finally:
+        for bus in buses:
+            bus.shutdown()
+
+def test_lookup_started_before_an_invalidation_is_not_cached(monkeypatch):
+    """Test a miss after an invalidation neither joins nor caches an older in-flight load"""
+    monkeypatch.setattr(dependencies.current_user_cache, "ttl", 60)
+    rows = {"u@example.com": {"id": 1, "full_name": "Before"}}
+    started, release = threading.Event(), threading.Event()
+
+    def load(db, email):
+        row = dict(rows[email])
+        if row["full_name"] == "Before":
+            started.set()
+            release.wait(5)
+        return row
+
+    monkeypatch.setattr(dependencies, "_load_user_row", load)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(dependencies._get_user_row, None, "u@example.com")
+        assert started.wait(5)
+        # The update commits and invalidates while the leader's load is running
+        rows["u@example.com"]["full_name"] = "After"
+        dependencies.current_user_cache.invalidate("u@example.com")
+        follower = pool.submit(dependencies._get_user_row, None, "u@example.com")
+        assert follower.result(5)["full_name"] == "After"
+        release.set()
+        assert leader.result(5)["full_name"] == "Before"
+
+    assert dependencies.current_user_cache.get("u@example.com")["full_name"] == "After"
+    dependencies.current_user_cache.clear()
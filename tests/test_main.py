@@ -31,3 +31,23 @@ def test_app_exception_handlers():
     response = client.post("/health")
     assert response.status_code == 405
     assert "detail" in response.json()
+
+def test_rag_stack_loaded_lazily():
+    """Test importing the app does not import the RAG dependencies"""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, app.main; "
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'langchain', 'langchain_groq', 'pdfplumber', 'torch'}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_readiness_flips_after_startup():
+    """Test the app reports ready only once the lifespan start-up has run"""
+    app.state.ready = False
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.json()["ready"] is True
+    assert app.state.ready is False
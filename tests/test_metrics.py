@@ -0,0 +1,37 @@
+from typing import Dict
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.core.config import settings
+
+def _sample(name: str, labels: Dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_metrics_endpoint(client: TestClient):
+    """Test the scrape endpoint serves Prometheus text format"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+def test_request_metrics_use_route_template(client: TestClient, user_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test requests are counted per route template with DB usage"""
+    route = f"{settings.API_V1_STR}/users/{{user_id}}"
+    labels = {"method": "GET", "route": route, "status": "200"}
+    before = _sample("http_requests_total", labels)
+    queries_before = _sample("db_queries_per_request_sum", {"route": route})
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/{normal_user['id']}",
+        headers=user_token_headers
+    )
+    assert response.status_code == 200
+    assert _sample("http_requests_total", labels) == before + 1
+    assert _sample("db_queries_per_request_sum", {"route": route}) >= queries_before + 2
+
+def test_bcrypt_metrics(client: TestClient, normal_user: Dict[str, str]):
+    """Test password verification time is recorded"""
+    before = _sample("bcrypt_duration_seconds_count", {"operation": "verify"})
+    client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": normal_user["email"], "password": normal_user["password"]}
+    )
+    assert _sample("bcrypt_duration_seconds_count", {"operation": "verify"}) == before + 1
@@ -0,0 +1,93 @@
+import io
+import json
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.outbox import FileOutboxSink, QueueOutboxSink, relay_user_changes
+from app.models.user_change import UserChange
+
+def _changes(client, headers, since=0, limit=100):
+    response = client.get(
+        f"{settings.API_V1_STR}/users/changes", headers=headers, params={"since": since, "limit": limit}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+def test_user_changes_are_written_with_the_change(client: TestClient, db, normal_user: Dict[str, str],
+                                                  user_token_headers: Dict[str, str]):
+    """Test register, update and delete each add an outbox row in their transaction"""
+    client.post(f"{settings.API_V1_STR}/auth/register", json={"email": "new@example.com", "password": "password"})
+    client.post(f"{settings.API_V1_STR}/auth/register", json={"email": "new@example.com", "password": "password"})
+    client.patch(f"{settings.API_V1_STR}/users/me", headers=user_token_headers, json={"full_name": "Renamed"})
+    client.patch(f"{settings.API_V1_STR}/users/me", headers=user_token_headers, json={"email": "admin@example.com"})
+    client.delete(f"{settings.API_V1_STR}/users/me", headers=user_token_headers)
+
+    changes = db.scalars(select(UserChange).order_by(UserChange.id)).all()
+    # The duplicate registration and the conflicting update rolled back with their events
+    assert [(c.operation, c.user_id) for c in changes] == [
+        ("created", changes[0].user_id),
+        ("updated", normal_user["id"]),
+        ("deleted", normal_user["id"]),
+    ]
+    assert changes[0].user["email"] == "new@example.com"
+    assert changes[1].user["full_name"] == "Renamed"
+    assert changes[2].user is None
+    assert all(c.position is None for c in changes)
+
+def test_change_feed(client: TestClient, db, admin_token_headers: Dict[str, str]):
+    """Test the feed pages through relayed changes by position"""
+    for i in range(5):
+        client.post(f"{settings.API_V1_STR}/auth/register", json={"email": f"u{i}@example.com", "password": "password"})
+    assert _changes(client, admin_token_headers)["changes"] == []
+
+    sink = QueueOutboxSink()
+    assert relay_user_changes(db, sink, batch_size=2) == 5
+    assert [sink.queue.get_nowait()["position"] for _ in range(5)] == [1, 2, 3, 4, 5]
+
+    emails, since = [], 0
+    while True:
+        page = _changes(client, admin_token_headers, since=since, limit=2)
+        if not page["changes"]:
+            break
+        emails += [change["user"]["email"] for change in page["changes"]]
+        since = page["next_since"]
+    assert emails == [f"u{i}@example.com" for i in range(5)]
+    assert since == 5
+
+    # Only new changes are relayed and appended to the feed
+    client.post(f"{settings.API_V1_STR}/auth/register", json={"email": "late@example.com", "password": "password"})
+    assert relay_user_changes(db) == 1
+    page = _changes(client, admin_token_headers, since=since)
+    assert [(c["position"], c["user"]["email"]) for c in page["changes"]] == [(6, "late@example.com")]
+
+def test_bulk_import_writes_changes(client: TestClient, db, admin_token_headers: Dict[str, str], tmp_path):
+    """Test imported users are published like registered ones"""
+    rows = "\n".join(json.dumps({"email": f"bulk{i}@example.com", "password": "password"}) for i in range(3))
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import", headers=admin_token_headers,
+        files={"file": ("users.ndjson", io.BytesIO(rows.encode()), "application/x-ndjson")},
+    )
+    assert response.json()["created"] == 3
+
+    path = tmp_path / "changes.jsonl"
+    assert relay_user_changes(db, FileOutboxSink(str(path))) == 3
+    published = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(c["operation"], c["user"]["email"]) for c in published] == [
+        ("created", f"bulk{i}@example.com") for i in range(3)
+    ]
+
+def test_failed_publish_is_retried(db, normal_user):
+    """Test a batch the sink rejects keeps no position and is relayed again"""
+    class BrokenSink:
+        def publish(self, changes):
+            raise ConnectionError("sink down")
+
+    db.add(UserChange(user_id=normal_user["id"], operation="updated", user={"id": normal_user["id"]}))
+    db.commit()
+    with pytest.raises(ConnectionError):
+        relay_user_changes(db, BrokenSink())
+    db.rollback()
+    assert db.scalar(select(UserChange.position)) is None
+    assert relay_user_changes(db, QueueOutboxSink()) == 1
@@ -0,0 +1,106 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.profiling import SlowRequestSampler, _current_request
+
+def test_cpu_profile_requires_admin(client: TestClient, user_token_headers: Dict[str, str]):
+    """Test profiling endpoints are admin only"""
+    response = client.get(
+        f"{settings.API_V1_STR}/admin/profile/cpu?seconds=0.1",
+        headers=user_token_headers
+    )
+    assert response.status_code == 403
+
+def test_cpu_profile(client: TestClient, admin_token_headers: Dict[str, str]):
+    """Test a CPU profile returns folded stacks"""
+    response = client.get(
+        f"{settings.API_V1_STR}/admin/profile/cpu?seconds=0.2&interval_ms=2",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+def test_cpu_profile_duration_limit(client: TestClient, admin_token_headers: Dict[str, str]):
+    """Test overly long profiles are rejected"""
+    response = client.get(
+        f"{settings.API_V1_STR}/admin/profile/cpu?seconds={settings.PROFILING_MAX_SECONDS + 1}",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 400
+
+def test_memory_profile(client: TestClient, admin_token_headers: Dict[str, str]):
+    """Test tracemalloc snapshots report growth since start"""
+    url = f"{settings.API_V1_STR}/admin/profile/memory"
+    assert client.get(url, headers=admin_token_headers).status_code == 409
+    assert client.post(f"{url}/start", headers=admin_token_headers).status_code == 204
+    try:
+        response = client.get(f"{url}?limit=5", headers=admin_token_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["top"]) <= 5
+        assert "size_diff_kb" in data["top"][0]
+    finally:
+        assert client.post(f"{url}/stop", headers=admin_token_headers).status_code == 204
+
+def test_slow_request_sampler():
+    """Test only requests over the threshold are captured"""
+    sampler = SlowRequestSampler(threshold=0.05, interval=0.005, max_captures=2)
+    sampler.start()
+    try:
+        fast = sampler.begin("GET", "/fast")
+        sampler.end(fast)
+        for _ in range(3):
+            slow = sampler.begin("GET", "/slow")
+            time.sleep(0.15)
+            sampler.end(slow)
+    finally:
+        sampler.stop()
+
+    assert len(sampler.captures) == 2
+    capture = sampler.captures[-1]
+    assert capture["path"] == "/slow"
+    assert capture["duration_ms"] >= 150
+    assert "test_slow_request_sampler" in capture["folded"]
+
+def test_slow_requests_sample_only_their_own_thread():
+    """Test concurrent slow requests each capture the thread running their handler"""
+    sampler = SlowRequestSampler(threshold=0.02, interval=0.005, max_captures=2)
+
+    def spin():
+        deadline = time.perf_counter() + 0.15
+        while time.perf_counter() < deadline:
+            pass
+
+    def handler_a():
+        spin()
+
+    def handler_b():
+        spin()
+
+    def serve(path, handler):
+        request_id = sampler.begin("GET", path)
+        context = contextvars.copy_context()
+        context.run(_current_request.set, request_id)
+        # As a sync endpoint: begun on the event loop, run in the threadpool
+        return request_id, executor.submit(context.run, sampler.track_thread(handler))
+
+    sampler.start()
+    try:
+        with ThreadPoolExecutor(2) as executor:
+            requests = [serve("/a", handler_a), serve("/b", handler_b)]
+            for request_id, future in requests:
+                future.result()
+                sampler.end(request_id)
+    finally:
+        sampler.stop()
+
+    captures = {capture["path"]: capture["folded"] for capture in sampler.captures}
+    assert "handler_a" in captures["/a"] and "handler_b" not in captures["/a"]
+    assert "handler_b" in captures["/b"] and "handler_a" not in captures["/b"]
+    assert "test_slow_requests_sample_only_their_own_thread" not in captures["/a"]
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from app.core.purge import purge_deleted_users
+from app.core.sessions import create_session
+from app.models.session import UserSession
+from app.models.user import User
+
+def _soft_delete(db, user_id, deleted_at):
+    user = db.query(User).filter(User.id == user_id).first()
+    user.deleted_at = deleted_at
+    db.commit()
+    return user
+
+def test_purge_deleted_users(db, admin_user, normal_user):
+    """Test purge removes soft-deleted users and their sessions"""
+    user = db.query(User).filter(User.id == normal_user["id"]).first()
+    create_session(db, user)
+    _soft_delete(db, normal_user["id"], datetime.now(timezone.utc) - timedelta(hours=1))
+
+    purged = purge_deleted_users(db, grace_period=timedelta(0), pause=0)
+    assert purged == 1
+    assert db.query(User).filter(User.id == normal_user["id"]).first() is None
+    assert db.query(UserSession).filter(UserSession.user_id == normal_user["id"]).count() == 0
+    assert db.query(User).filter(User.id == admin_user["id"]).first() is not None
+
+def test_purge_respects_grace_period(db, normal_user):
+    """Test purge keeps users deleted within the grace period"""
+    _soft_delete(db, normal_user["id"], datetime.now(timezone.utc))
+
+    purged = purge_deleted_users(db, grace_period=timedelta(hours=1), pause=0)
+    assert purged == 0
+    assert db.query(User).filter(User.id == normal_user["id"]).first() is not None
+
+def test_purge_in_batches(db, normal_user):
+    """Test purge works through the backlog in bounded batches"""
+    deleted_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    for i in range(5):
+        db.add(User(email=f"gone{i}@example.com", hashed_password="x", deleted_at=deleted_at))
+    db.commit()
+
+    assert purge_deleted_users(db, grace_period=timedelta(0), batch_size=2, pause=0, max_batches=1) == 2
+    assert purge_deleted_users(db, grace_period=timedelta(0), batch_size=2, pause=0) == 3
@@ -0,0 +1,132 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+from app.core.config import settings
+from app.models.user import User
+
+SEEDED_USERS = 20_000
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Reading the table itself row by row; walking a (partial) index is fine
+TABLE_SCAN = {
+    "sqlite": re.compile(r"\bSCAN users$", re.MULTILINE),
+    "postgresql": re.compile(r"Seq Scan on users\b"),
+}
+SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+}
+
+def seed_users(db):
+    rows = [
+        {
+            "email": f"user{i}@example.com",
+            "hashed_password": "x",
+            "full_name": f"User {i}",
+            "role": "admin" if i % 100 == 0 else "user",
+            "is_active": i % 50 != 0,
+            "created_at": START + timedelta(minutes=i),
+            "deleted_at": START if i % 20 == 0 else None,
+        }
+        for i in range(SEEDED_USERS)
+    ]
+    db.execute(insert(User), rows)
+    db.commit()
+    engine = db.get_bind()
+    if engine.dialect.name == "postgresql":
+        # VACUUM also merges the GIN pending lists, as autovacuum would on a live table
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM ANALYZE users")
+    else:
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+def reads_whole_table(dialect, statement, plan):
+    """A table scan is only acceptable when it is already in ORDER BY order
+    and a LIMIT stops it after one page (SQLite reports walking the rowid
+    this way as SCAN)"""
+    if not TABLE_SCAN[dialect].search(plan):
+        return False
+    return " LIMIT " not in statement or bool(SORT[dialect].search(plan))
+
+def explain(db, statement, parameters):
+    dialect = db.get_bind().dialect.name
+    prefix = "EXPLAIN QUERY PLAN" if dialect == "sqlite" else "EXPLAIN"
+    rows = db.connection().exec_driver_sql(f"{prefix} {statement}", parameters).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+def test_endpoint_queries_use_indexes(client: TestClient, db, admin_user: Dict[str, str]):
+    """Test no users query issued by the endpoints scans the table"""
+    seed_users(db)
+    engine = db.get_bind()
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and re.search(r"\busers\b", statement):
+            queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": admin_user["email"].upper(), "password": admin_user["password"]},
+        )
+        assert response.status_code == 200
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        window = (START + timedelta(days=3)).isoformat()
+        window_end = (START + timedelta(days=4)).isoformat()
+        # The unfiltered, unpaginated list reads every live user by design
+        requests = [
+            ("/users/me", {}),
+            ("/users/1234", {}),
+            ("/users/", {"limit": 50}),
+            ("/users/", {"limit": 50, "after_id": 10_000}),
+            ("/users/", {"role": "admin"}),
+            ("/users/", {"role": "user", "limit": 50}),
+            ("/users/", {"is_active": "false"}),
+            ("/users/", {"created_after": window, "created_before": window_end}),
+        ]
+        # Elsewhere search loads its in-process index with one full read
+        if engine.dialect.name == "postgresql":
+            requests += [
+                ("/users/search", {"q": "user1234"}),
+                ("/users/search", {"q": "User 12"}),
+                ("/users/search", {"q": "r1234@"}),
+            ]
+        for path, params in requests:
+            response = client.get(f"{settings.API_V1_STR}{path}", params=params, headers=headers)
+            assert response.status_code == 200, (path, params)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(queries) >= 10
+    for statement, parameters in queries:
+        plan = explain(db, statement, parameters)
+        assert not reads_whole_table(engine.dialect.name, statement, plan), f"{statement}\n{plan}"
+
+def test_users_list_filters(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test filtering and keyset pagination of the users list"""
+    url = f"{settings.API_V1_STR}/users/"
+    response = client.get(url, params={"role": "user"}, headers=admin_token_headers)
+    assert [user["email"] for user in response.json()] == [normal_user["email"]]
+    response = client.get(url, params={"is_active": "false"}, headers=admin_token_headers)
+    assert response.json() == []
+    response = client.get(url, params={"limit": 1}, headers=admin_token_headers)
+    first = response.json()
+    assert len(first) == 1
+    response = client.get(url, params={"after_id": first[0]["id"]}, headers=admin_token_headers)
+    assert [user["id"] for user in response.json()] == [normal_user["id"]]
+
+def test_email_lookup_is_case_insensitive(client: TestClient, normal_user: Dict[str, str]):
+    """Test login ignores email case and registration rejects case variants"""
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": normal_user["email"].upper(), "password": normal_user["password"]},
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/register",
+        json={"email": "Test@Example.com", "password": "password"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.search import user_search_index
+from app.models.user import User
+
+URL = f"{settings.API_V1_STR}/users/search"
+
+@pytest.fixture(autouse=True)
+def clear_search_index():
+    # Every test starts from a fresh database whose table version may repeat
+    user_search_index.clear()
+    yield
+    user_search_index.clear()
+
+@pytest.fixture
+def people(db):
+    users = [
+        ("nobody@example.com", "Mary Alison"),
+        ("alice@example.com", "Zed"),
+        ("bob@example.com", "Alice Smith"),
+        ("malice@example.com", None),
+        ("al_100%@example.com", "Percent"),
+    ]
+    db.add_all(User(email=email, full_name=name, hashed_password="x") for email, name in users)
+    db.commit()
+
+def search(client, headers, q, **params):
+    response = client.get(URL, params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200
+    return [user["email"] for user in response.json()]
+
+def test_search_ranking(client: TestClient, admin_token_headers: Dict[str, str], people):
+    """Test email prefixes rank before name prefixes, then substrings shortest email first, then id"""
+    assert search(client, admin_token_headers, "ALI") == [
+        "alice@example.com", "bob@example.com", "nobody@example.com", "malice@example.com",
+    ]
+    assert search(client, admin_token_headers, "ali", limit=2) == [
+        "alice@example.com", "bob@example.com",
+    ]
+    # Too short for substring matching
+    assert search(client, admin_token_headers, "li") == []
+    assert search(client, admin_token_headers, "mary a") == ["nobody@example.com"]
+
+def test_search_escapes_wildcards(client: TestClient, admin_token_headers: Dict[str, str], people):
+    """Test LIKE wildcards in the query match literally"""
+    assert search(client, admin_token_headers, "al_") == ["al_100%@example.com"]
+    assert search(client, admin_token_headers, "100%") == ["al_100%@example.com"]
+    assert search(client, admin_token_headers, "%") == []
+
+def test_search_sees_changes(client: TestClient, admin_token_headers: Dict[str, str], people, db):
+    """Test new and deleted users show up in results straight away"""
+    assert search(client, admin_token_headers, "carol") == []
+    carol = User(email="carol@example.com", hashed_password="x")
+    db.add(carol)
+    db.commit()
+    assert search(client, admin_token_headers, "carol") == ["carol@example.com"]
+    carol.deleted_at = datetime.now(timezone.utc)
+    db.commit()
+    assert search(client, admin_token_headers, "carol") == []
+
+def test_search_requires_admin(client: TestClient, user_token_headers: Dict[str, str]):
+    """Test regular users cannot search"""
+    response = client.get(URL, params={"q": "test"}, headers=user_token_headers)
+    assert response.status_code == 403
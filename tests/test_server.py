@@ -0,0 +1,14 @@
+from app.core import server
+from app.core.server import private_memory_mb, worker_count
+
+def test_worker_count_follows_cpu_quota(monkeypatch):
+    """Test workers are sized from the CPU quota unless set explicitly"""
+    monkeypatch.setattr(server, "cpu_quota", lambda: 1.5)
+    assert worker_count(None, 1.0, 16) == 2
+    assert worker_count(None, 2.0, 16) == 4
+    assert worker_count(None, 2.0, 3) == 3
+    assert worker_count(6, 1.0, 3) == 6
+
+def test_private_memory():
+    """Test the worker memory measure is available and plausible"""
+    assert 0 < private_memory_mb() < 100_000
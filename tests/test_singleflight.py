@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.api.v1 import dependencies
+from app.core.config import settings
+from app.core.singleflight import AsyncSingleFlight, SingleFlight
+
+def coalesced(group: str) -> float:
+    return REGISTRY.get_sample_value(
+        "singleflight_calls_total", {"group": group, "role": "coalesced"}
+    ) or 0.0
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_concurrent_calls_share_one_execution():
+    """Test callers arriving while a key is in flight get the leader's result"""
+    flight = SingleFlight("test_sync")
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return {"value": value}
+
+    before = coalesced("test_sync")
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "key", work, i) for i in range(5)]
+        wait_for(lambda: coalesced("test_sync") - before == 4)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    # Nothing is cached once the flight lands
+    assert flight.do("key", lambda: "fresh") == "fresh"
+
+def test_errors_reach_every_caller():
+    """Test an exception raised by the leader is raised to coalesced callers"""
+    flight = SingleFlight("test_sync_error")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "key", fail) for _ in range(3)]
+        wait_for(lambda: coalesced("test_sync_error") == 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+def test_async_calls_share_one_execution():
+    """Test the asyncio group coalesces identical coroutines"""
+    flight = AsyncSingleFlight("test_async")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work, 21) for _ in range(4)),
+                                    flight.do("other", work, 1))
+
+    assert asyncio.run(main()) == [42, 42, 42, 42, 2]
+    assert len(calls) == 2
+
+def test_current_user_lookup_is_coalesced(client: TestClient, user_token_headers: Dict[str, str], monkeypatch):
+    """Test requests waiting on an in-flight user lookup reuse its row"""
+    release = threading.Event()
+    load_user_row = dependencies._load_user_row
+    loads = []
+
+    def slow_load(db, email):
+        loads.append(email)
+        release.wait(5)
+        return load_user_row(db, email)
+
+    monkeypatch.setattr(dependencies, "_load_user_row", slow_load)
+    before = coalesced("current_user")
+    url = f"{settings.API_V1_STR}/users/me"
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(client.get, url, headers=user_token_headers) for _ in range(3)]
+        wait_for(lambda: coalesced("current_user") - before == 2)
+        release.set()
+        responses = [future.result() for future in futures]
+
+    assert len(loads) == 1
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert len({response.json()["email"] for response in responses}) == 1
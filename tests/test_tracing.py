@@ -0,0 +1,77 @@
+import io
+import json
+import logging.config
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1 import dependencies
+from app.core.config import settings
+from app.core.logging_config import logging_config
+from app.core.tracing import JsonFileExporter, tracer
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer.configure(enabled=True, sample_rate=1.0, exporter=JsonFileExporter(str(path)))
+    yield path
+    tracer.configure(enabled=False)
+
+def _spans(path):
+    tracer.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_request_spans(client: TestClient, user_token_headers: Dict[str, str], trace_file):
+    """Test a sampled request records auth and SQL spans under one trace"""
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=user_token_headers)
+    assert response.status_code == 200
+    trace_id = response.headers["X-Trace-Id"]
+    assert response.headers["traceparent"].startswith(f"00-{trace_id}-")
+
+    spans = [s for s in _spans(trace_file) if s["trace_id"] == trace_id]
+    names = {s["name"] for s in spans}
+    assert f"GET {settings.API_V1_STR}/users/me" in names
+    assert {"decode_access_token", "get_current_user", "sql"} <= names
+
+    by_id = {s["span_id"]: s for s in spans}
+    decode = next(s for s in spans if s["name"] == "decode_access_token")
+    assert by_id[decode["parent_id"]]["name"] == "get_current_user"
+
+def test_incoming_traceparent_is_continued(client: TestClient, trace_file):
+    """Test the caller's trace id and sampling decision are honoured"""
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = client.get("/health", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-00"})
+    assert response.headers["X-Trace-Id"] == trace_id
+    assert response.headers["traceparent"].endswith("-00")
+    assert not trace_file.exists() or not _spans(trace_file)
+
+def test_tracing_disabled(client: TestClient):
+    """Test no trace headers are added when tracing is off"""
+    response = client.get("/health")
+    assert "X-Trace-Id" not in response.headers
+
+def test_log_lines_carry_the_trace_id(client: TestClient, user_token_headers: Dict[str, str], trace_file, monkeypatch):
+    """Test lines logged while serving a request include its trace and span ids"""
+    stream = io.StringIO()
+    config = logging_config()
+    config["handlers"]["console"]["stream"] = stream
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    logging.config.dictConfig(config)
+
+    load_user_row = dependencies._load_user_row
+
+    def logged_load(db, email):
+        logging.getLogger("app.test").warning("loading user")
+        return load_user_row(db, email)
+
+    monkeypatch.setattr(dependencies, "_load_user_row", logged_load)
+    try:
+        response = client.get(f"{settings.API_V1_STR}/users/me", headers=user_token_headers)
+        logging.getLogger("app.test").warning("outside")
+    finally:
+        root.handlers, root.level = handlers, level
+
+    inside, outside = [line for line in stream.getvalue().splitlines() if "app.test" in line]
+    assert f"trace_id={response.headers['X-Trace-Id']} span_id=" in inside
+    assert "span_id=-" not in inside
+    assert "trace_id=- span_id=-" in outside
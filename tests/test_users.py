@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from app.core.config import settings
 from app.models.user import User
+from app.schemas.user import UserResponse
 
 def test_read_current_user(client: TestClient, user_token_headers: Dict[str, str]):
     """Test reading current user profile"""
@@ -40,6 +41,20 @@ def test_update_user_email_exists(client: TestClient, user_token_headers: Dict[s
     )
     assert response.status_code == 400
 
+def test_update_current_user_password(client: TestClient, user_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test updating the password and logging in with it"""
+    response = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=user_token_headers,
+        json={"password": "changedpassword"}
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": normal_user["email"], "password": "changedpassword"}
+    )
+    assert response.status_code == 200
+
 def test_read_user_by_id_admin(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
     """Test reading user by ID as admin"""
     response = client.get(
@@ -70,6 +85,15 @@ def test_read_users_list_admin(client: TestClient, admin_token_headers: Dict[str
     assert any(user["email"] == "admin@example.com" for user in data)
     assert any(user["email"] == "test@example.com" for user in data)
 
+def test_read_users_list_matches_response_model(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str], db):
+    """Test the projected fast path returns exactly what UserResponse would"""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=admin_token_headers
+    )
+    users = db.query(User).filter(User.deleted_at.is_(None)).order_by(User.id).all()
+    assert response.json() == [UserResponse.model_validate(user).model_dump(mode="json") for user in users]
+
 def test_read_users_list_normal_user(client: TestClient, user_token_headers: Dict[str, str]):
     """Test reading users list as normal user"""
     response = client.get(
@@ -86,6 +110,140 @@ def test_delete_current_user(client: TestClient, user_token_headers: Dict[str, s
     )
     assert response.status_code == 200
     
-    # Verify user is deleted from database
+    # Verify user is soft deleted and can no longer authenticate
     user = db.query(User).filter(User.email == "test@example.com").first()
-    assert user is None
+    assert user.deleted_at is not None
+
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=user_token_headers)
+    assert response.status_code == 404
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "test@example.com", "password": "testpassword"}
+    )
+    assert response.status_code == 401
+
+def test_register_after_delete(client: TestClient, user_token_headers: Dict[str, str]):
+    """Test a deleted user's email can be registered again"""
+    client.delete(f"{settings.API_V1_STR}/users/me", headers=user_token_headers)
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/register",
+        json={"email": "test@example.com", "password": "newpassword"}
+    )
+    assert response.status_code == 201
+
+def test_import_users_csv(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str], db):
+    """Test bulk importing users from CSV reports bad rows without aborting"""
+    content = (
+        "email,password,full_name,role\n"
+        "bulk1@example.com,secret1,Bulk One,user\n"
+        f"{normal_user['email']},secret2,Existing,user\n"
+        "not-an-email,secret3,Invalid,user\n"
+        "bulk2@example.com,secret4,,admin\n"
+        "BULK1@example.com,secret5,Duplicate,user\n"
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=admin_token_headers,
+        files={"file": ("users.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [3, 4, 6]
+
+    user = db.query(User).filter(User.email == "bulk2@example.com").first()
+    assert user.role == "admin"
+    assert user.full_name is None
+
+def test_import_users_ndjson(client: TestClient, admin_token_headers: Dict[str, str]):
+    """Test bulk importing users from NDJSON"""
+    content = (
+        '{"email": "nd1@example.com", "password": "secret1"}\n'
+        '{"email": "nd2@example.com"}\n'
+        'not json\n'
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=admin_token_headers,
+        files={"file": ("users.ndjson", content, "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 1
+    assert result["failed"] == 2
+
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "nd1@example.com", "password": "secret1"}
+    )
+    assert response.status_code == 200
+
+def test_import_users_normal_user(client: TestClient, user_token_headers: Dict[str, str]):
+    """Test bulk import as normal user"""
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=user_token_headers,
+        files={"file": ("users.csv", "email,password\n", "text/csv")}
+    )
+    assert response.status_code == 403
+
+def test_export_users(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test streaming export of users"""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/export",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert len(lines) == 2
+    assert "hashed_password" not in response.text
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/export?format=csv",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,email,full_name,role,is_active,created_at"
+    assert len(lines) == 3
+
+def test_read_users_fields(client: TestClient, admin_token_headers: Dict[str, str], normal_user: Dict[str, str]):
+    """Test ?fields= limits the returned user fields"""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?fields=id,email",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 200
+    assert all(set(user) == {"id", "email"} for user in response.json())
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/{normal_user['id']}?fields=email",
+        headers=admin_token_headers
+    )
+    assert response.json() == {"email": normal_user["email"]}
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/me?fields=hashed_password",
+        headers=admin_token_headers
+    )
+    assert response.status_code == 400
+
+def test_null_role_and_is_active_are_served_as_defaults(client: TestClient, admin_token_headers: Dict[str, str], db):
+    """Test rows written outside the ORM with NULL role and is_active still match UserResponse"""
+    from sqlalchemy import text
+
+    db.execute(text(
+        "INSERT INTO users (email, hashed_password, role, is_active) "
+        "VALUES ('raw@example.com', 'x', NULL, NULL)"
+    ))
+    db.commit()
+    user_id = db.query(User.id).filter(User.email == "raw@example.com").scalar()
+
+    response = client.get(f"{settings.API_V1_STR}/users/{user_id}", headers=admin_token_headers)
+    assert response.status_code == 200
+    user = UserResponse.model_validate(response.json())
+    assert user.role == "user" and user.is_active is True
+
+    response = client.get(f"{settings.API_V1_STR}/users/?fields=id,role,is_active", headers=admin_token_headers)
+    assert {"id": user_id, "role": "user", "is_active": True} in response.json()